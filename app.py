@@ -7,11 +7,20 @@ from typing import List, Dict, Any, Callable
 
 # 페이지 임포트
 from page_list.home_page import home_page
+from page_list.prompt_list_page import prompt_list_page
 from page_list.favorite_page import favorite_page
 from page_list.langfuse_page import langfuse_page
+from page_list.instrumentation import begin_rerun
+from page_list.metrics import PAGE_RENDER_SECONDS, start_metrics_server, start_metrics_file_writer
+from page_list.profiler import run_profiled, display_profiler_sidebar
+from page_list.cache_warmer import start_cache_warmer
+from page_list.api_server import start_api_server
 from page_list.helpers import (
-    HOME_PAGE, FAVORITE_PAGE, LANGFUSE_PAGE,
-    APP_TITLE, APP_ICON, APP_LAYOUT, SIDEBAR_WIDTH
+    HOME_PAGE, PROMPT_LIST_PAGE, FAVORITE_PAGE, LANGFUSE_PAGE,
+    APP_TITLE, APP_ICON, APP_LAYOUT, SIDEBAR_WIDTH,
+    METRICS_HOST, METRICS_PORT, METRICS_FILE, METRICS_FILE_INTERVAL,
+    API_HOST, API_PORT,
+    CACHE_WARMER_ENABLED
 )
 
 class MultiApp:
@@ -60,16 +69,49 @@ class MultiApp:
             selected_app = next(app for app in self.apps if app["title"] == selected_app_title)
             
             st.markdown("---")
+            
+            # 프로파일링 모드 (페이지 함수와 주요 구간의 실행 시간 측정)
+            profiling = st.checkbox("프로파일링 모드", value=False, help="리런마다 페이지 실행 시간과 핫스팟을 측정합니다")
+            if profiling:
+                history_size = st.slider("표시할 최근 리런 수", min_value=1, max_value=30, value=10)
+        
+        # 리런 단위 계측 기록 시작
+        begin_rerun()
         
-        # 선택한 앱 실행
-        selected_app["function"]()
+        # 선택한 앱 실행 (렌더링 시간을 메트릭으로 기록)
+        with PAGE_RENDER_SECONDS.time(page=selected_app["title"]):
+            if profiling:
+                run_profiled(selected_app["title"], selected_app["function"], history_size)
+            else:
+                selected_app["function"]()
+        
+        # 프로파일링 결과 표시
+        if profiling:
+            display_profiler_sidebar()
 
 # 메인 실행 코드
 if __name__ == "__main__":
     app = MultiApp()
     
+    # 메트릭 HTTP 서버 시작 (설정된 경우, 프로세스당 한 번)
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT, METRICS_HOST)
+    
+    # 메트릭 파일 주기 기록 시작 (설정된 경우, 프로세스당 한 번)
+    if METRICS_FILE:
+        start_metrics_file_writer(METRICS_FILE, METRICS_FILE_INTERVAL)
+    
+    # 로컬 JSON API 서버 시작 (설정된 경우, 프로세스당 한 번)
+    if API_PORT:
+        start_api_server(API_PORT, API_HOST)
+    
+    # 캐시 예열 워커 시작 (설정된 경우, 프로세스당 한 번)
+    if CACHE_WARMER_ENABLED:
+        start_cache_warmer()
+    
     # 앱 페이지 추가
     app.add_app(HOME_PAGE, home_page)
+    app.add_app(PROMPT_LIST_PAGE, prompt_list_page)
     app.add_app(FAVORITE_PAGE, favorite_page)
     app.add_app(LANGFUSE_PAGE, langfuse_page)
     
@@ -0,0 +1,274 @@
+"""
+프롬프트 네스트 명령줄 도구 - 스트림릿 없이 트레이스 동기화, 즐겨찾기 내보내기, 프롬프트 추출 작업을 실행
+
+사용 예:
+    python cli.py sync --days 1 --limit 500
+    python cli.py export-favorites --type good
+    python cli.py extract trace-id-1 trace-id-2 --output prompts.jsonl
+    python cli.py serve --port 8600
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+
+from page_list.helpers import LANGFUSE_MAX_WORKERS, LANGFUSE_CASSETTE_MODE, API_HOST, API_PORT
+from page_list.projects import PROJECTS, use_project
+from page_list.langfuse_utils import iter_project_trace_pages, merge_traces_by_time, fetch_observations_batch
+from page_list.data_utils import load_favorites_index
+from page_list.jsonl_archive import EXPORT_DIR, append_records
+from page_list.trace_indexer import flush_trace_index
+from page_list.extraction import extraction_record
+
+# 종료 코드 (2는 argparse의 잘못된 인자)
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_USAGE = 2
+EXIT_FAILED = 3
+
+class Progress:
+    """표준 오류에 진행 상황을 표시합니다 (터미널이면 한 줄을 갱신하고, 아니면 10% 단위로 기록)"""
+
+    def __init__(self, label, quiet=False, stream=sys.stderr):
+        self.label = label
+        self.quiet = quiet
+        self.stream = stream
+        self.interactive = stream.isatty()
+        self._last_step = -1
+
+    def __call__(self, done, total):
+        if self.quiet or not total:
+            return
+        if self.interactive:
+            self.stream.write(f"\r{self.label}: {done}/{total}")
+            if done == total:
+                self.stream.write("\n")
+        else:
+            step = done * 10 // total
+            if step == self._last_step and done != total:
+                return
+            self._last_step = step
+            self.stream.write(f"{self.label}: {done}/{total}\n")
+        self.stream.flush()
+
+def _echo(args, message):
+    if not args.quiet:
+        print(message, file=sys.stderr)
+
+def _default_export_path(prefix):
+    return os.path.join(EXPORT_DIR, f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl")
+
+def _exit_code(succeeded, total):
+    """모두 성공하면 0, 일부만 성공하면 1, 하나도 성공하지 못하면 3"""
+    if total and not succeeded:
+        return EXIT_FAILED
+    return EXIT_OK if succeeded == total else EXIT_PARTIAL
+
+def _read_trace_ids(args):
+    """인자와 파일(한 줄에 하나, '-'는 표준 입력)에서 트레이스 ID를 순서대로 중복 없이 모읍니다"""
+    trace_ids = list(args.trace_ids)
+    if args.file:
+        handle = sys.stdin if args.file == "-" else open(args.file, "r", encoding="utf-8")
+        with handle:
+            trace_ids.extend(line.strip() for line in handle)
+    return list(dict.fromkeys(trace_id for trace_id in trace_ids if trace_id and not trace_id.startswith("#")))
+
+def _fetch_observations(args, trace_ids, label):
+    """관찰 데이터를 동시에 가져옵니다 (--project를 주면 해당 프로젝트에서만 조회)"""
+    progress = Progress(label, quiet=args.quiet)
+    if args.project:
+        with use_project(args.project):
+            return fetch_observations_batch(trace_ids, max_workers=args.workers, on_progress=progress)
+    return fetch_observations_batch(trace_ids, max_workers=args.workers, on_progress=progress)
+
+def cmd_sync(args):
+    """최근 기간의 트레이스 목록과 관찰 데이터를 가져와 로컬 아카이브에 색인하고 JSONL로 내보냅니다"""
+    names = args.projects.split(",") if args.projects else list(PROJECTS)
+    unknown = [name for name in names if name not in PROJECTS]
+    if unknown:
+        print(f"알 수 없는 프로젝트: {', '.join(unknown)} (설정된 프로젝트: {', '.join(PROJECTS)})", file=sys.stderr)
+        return EXIT_USAGE
+    # 자격 증명이 없으면 목록 조회가 경고만 남기고 빈 결과를 주므로, 성공으로 끝나지 않도록 먼저 확인 (재생 모드 제외)
+    unconfigured = [name for name in names if not PROJECTS[name].configured] if LANGFUSE_CASSETTE_MODE != "replay" else []
+    if unconfigured:
+        print(
+            f"랭퓨즈 자격 증명이 설정되지 않은 프로젝트: {', '.join(unconfigured)} "
+            "(LANGFUSE_PUBLIC_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_PROJECT 또는 프로젝트별 LANGFUSE_<이름>_* 값을 확인하세요)",
+            file=sys.stderr
+        )
+        return EXIT_USAGE
+
+    start = time.perf_counter()
+    errors = {}
+    by_project = {name: [] for name in names}
+    for name, page in iter_project_trace_pages(names, limit=args.limit, days=args.days, errors=errors):
+        by_project[name].extend(page)
+        _echo(args, f"트레이스 목록: {name} {len(by_project[name])}개")
+    for name, error in errors.items():
+        print(f"{name} 프로젝트의 트레이스 목록을 가져오지 못했습니다: {error}", file=sys.stderr)
+
+    traces = merge_traces_by_time(*by_project.values())
+    if not traces:
+        _echo(args, "가져온 트레이스가 없습니다.")
+        return EXIT_FAILED if errors else EXIT_OK
+
+    # 가져온 관찰 데이터는 백그라운드에서 프롬프트 카탈로그와 트레이스 아카이브에 색인되므로 끝날 때까지 기다림
+    observations_by_trace = _fetch_observations(args, [trace["id"] for trace in traces], "관찰 데이터")
+    flush_trace_index(timeout=None)
+    succeeded = sum(1 for observations in observations_by_trace.values() if observations)
+
+    if not args.no_export:
+        path = args.output or _default_export_path("traces")
+        count = append_records(path, (
+            {
+                "id": trace["id"],
+                "name": trace.get("name"),
+                "timestamp": trace.get("timestamp"),
+                "project": trace.get("project"),
+                "observations": observations_by_trace[trace["id"]],
+            }
+            for trace in traces if observations_by_trace.get(trace["id"])
+        ))
+        _echo(args, f"{count}개 트레이스를 {path}에 내보냈습니다.")
+
+    _echo(args, f"동기화 완료: 트레이스 {len(traces)}개, 관찰 데이터 {succeeded}개 ({time.perf_counter() - start:.1f}초)")
+    code = _exit_code(succeeded, len(traces))
+    return EXIT_PARTIAL if code == EXIT_OK and errors else code
+
+def cmd_export_favorites(args):
+    """즐겨찾기 트레이스를 관찰 데이터와 함께 JSONL로 내보냅니다"""
+    entries = [
+        entry for entry in load_favorites_index().newest_first()
+        if args.type == "all" or entry["type"] == args.type
+    ]
+    if not entries:
+        _echo(args, "내보낼 즐겨찾기가 없습니다.")
+        return EXIT_OK
+
+    observations_by_trace = _fetch_observations(args, [entry["id"] for entry in entries], "즐겨찾기 관찰 데이터")
+    records = [
+        {
+            "id": entry["id"],
+            "name": entry["name"],
+            "type": entry["type"],
+            "note": entry["data"].get("note", ""),
+            "created_at": entry["created_at"],
+            "project": entry["data"].get("project"),
+            "observations": observations_by_trace.get(entry["id"]) or [],
+        }
+        for entry in entries
+    ]
+    missing = [record["id"] for record in records if not record["observations"]]
+    for trace_id in missing:
+        print(f"관찰 데이터를 찾지 못했습니다: {trace_id}", file=sys.stderr)
+
+    path = args.output or _default_export_path("favorites")
+    count = append_records(path, records)
+    _echo(args, f"즐겨찾기 {count}개를 {path}에 내보냈습니다. (관찰 데이터 없음 {len(missing)}개)")
+    return _exit_code(count - len(missing), count)
+
+def cmd_extract(args):
+    """트레이스 ID 목록의 질문/답변/시스템 프롬프트를 추출해 JSONL로 출력합니다"""
+    trace_ids = _read_trace_ids(args)
+    if not trace_ids:
+        print("추출할 트레이스 ID가 없습니다.", file=sys.stderr)
+        return EXIT_USAGE
+
+    observations_by_trace = _fetch_observations(args, trace_ids, "관찰 데이터")
+    output = sys.stdout if args.output in (None, "-") else open(args.output, "w", encoding="utf-8")
+    succeeded = 0
+    try:
+        # 입력 순서대로 출력
+        for trace_id in trace_ids:
+            observations = observations_by_trace.get(trace_id)
+            if not observations:
+                print(f"관찰 데이터를 찾지 못했습니다: {trace_id}", file=sys.stderr)
+                continue
+            output.write(json.dumps(extraction_record(trace_id, observations), ensure_ascii=False) + "\n")
+            succeeded += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    _echo(args, f"{succeeded} / {len(trace_ids)}개 트레이스를 추출했습니다.")
+    return _exit_code(succeeded, len(trace_ids))
+
+def cmd_serve(args):
+    """로컬 JSON API 서버를 포그라운드에서 실행합니다"""
+    # 앱과 같은 모듈을 쓰지만 스트림릿 없이 API만 제공
+    from page_list.api_server import create_api_server
+
+    try:
+        server = create_api_server(args.port, args.host)
+    except OSError as e:
+        print(f"API 서버를 시작하지 못했습니다 ({args.host}:{args.port}): {e}", file=sys.stderr)
+        return EXIT_FAILED
+    _echo(args, f"API 서버 시작: http://{args.host}:{server.server_address[1]}/api")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+    return EXIT_OK
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="프롬프트 네스트 일괄 작업 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(subparser):
+        subparser.add_argument("--workers", type=int, default=LANGFUSE_MAX_WORKERS, help="동시 요청 수")
+        subparser.add_argument("--output", help="출력 파일 경로")
+        subparser.add_argument("-q", "--quiet", action="store_true", help="진행 상황을 표시하지 않습니다")
+        subparser.add_argument("-v", "--verbose", action="store_true", help="요청 로그를 자세히 표시합니다")
+
+    sync = subparsers.add_parser("sync", help="최근 트레이스를 가져와 색인하고 JSONL로 내보냅니다")
+    sync.add_argument("--days", type=int, default=1, help="조회 기간 (일)")
+    sync.add_argument("--limit", type=int, default=100, help="프로젝트별 최대 트레이스 수")
+    sync.add_argument("--projects", help=f"쉼표로 구분한 프로젝트 이름 (기본: 모두, 설정된 프로젝트: {', '.join(PROJECTS)})")
+    sync.add_argument("--no-export", action="store_true", help="색인만 하고 JSONL로 내보내지 않습니다")
+    add_common(sync)
+    sync.set_defaults(func=cmd_sync, project=None)
+
+    export = subparsers.add_parser("export-favorites", help="즐겨찾기를 관찰 데이터와 함께 JSONL로 내보냅니다")
+    export.add_argument("--type", choices=("good", "bad", "all"), default="all", help="내보낼 즐겨찾기 유형")
+    export.add_argument("--project", choices=list(PROJECTS), help="프로젝트를 모르는 즐겨찾기를 조회할 프로젝트")
+    add_common(export)
+    export.set_defaults(func=cmd_export_favorites)
+
+    extract = subparsers.add_parser("extract", help="트레이스의 질문/답변/시스템 프롬프트를 추출합니다")
+    extract.add_argument("trace_ids", nargs="*", help="트레이스 ID")
+    extract.add_argument("--file", help="트레이스 ID 목록 파일 (한 줄에 하나, '-'는 표준 입력)")
+    extract.add_argument("--project", choices=list(PROJECTS), help="조회할 프로젝트 (기본: 트레이스가 속한 프로젝트를 찾음)")
+    add_common(extract)
+    extract.set_defaults(func=cmd_extract)
+
+    serve = subparsers.add_parser("serve", help="즐겨찾기/프롬프트/추출 결과를 읽기 전용 JSON API로 제공합니다")
+    serve.add_argument("--host", default=API_HOST, help="바인드할 주소")
+    serve.add_argument("--port", type=int, default=API_PORT or 8600, help="포트")
+    serve.add_argument("-q", "--quiet", action="store_true", help="시작 메시지를 표시하지 않습니다")
+    serve.add_argument("-v", "--verbose", action="store_true", help="요청 로그를 자세히 표시합니다")
+    serve.set_defaults(func=cmd_serve, workers=1)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.ERROR,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        stream=sys.stderr,
+    )
+    args.workers = max(1, args.workers)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        print("중단되었습니다.", file=sys.stderr)
+        return 130
+    except OSError as e:
+        print(f"파일을 읽거나 쓰지 못했습니다: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+트레이스 분석 모듈 - 여러 트레이스의 관찰 데이터를 표로 모아 지연 시간 분포와 토큰 사용량/비용을 집계하는 기능
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from .cache import TTLCache
+from .langfuse_utils import fetch_langfuse_generations
+from .projects import current_project
+
+# 계산할 백분위수
+LATENCY_PERCENTILES = (0.5, 0.9, 0.99)
+
+def observations_to_frame(observations_by_trace):
+    """{트레이스 ID: 관찰 데이터 목록}을 관찰 하나당 한 행인 데이터프레임으로 변환합니다"""
+    columns = {"trace_id": [], "name": [], "type": [], "node": [], "start_time": [], "end_time": [], "latency": []}
+    for trace_id, observations in observations_by_trace.items():
+        for obs in observations or []:
+            metadata = obs.get("metadata")
+            columns["trace_id"].append(trace_id)
+            columns["name"].append(obs.get("name") or "무제")
+            columns["type"].append(obs.get("type") or "")
+            columns["node"].append(metadata.get("langgraph_node") if isinstance(metadata, dict) else None)
+            columns["start_time"].append(obs.get("startTime"))
+            columns["end_time"].append(obs.get("endTime"))
+            columns["latency"].append(obs.get("latency"))
+
+    df = pd.DataFrame(columns)
+    if df.empty:
+        df["latency_ms"] = pd.Series(dtype="float64")
+        return df
+
+    # 지연 시간: 시작/종료 시각 차이를 우선 사용하고, 없으면 latency 필드(ms) 사용
+    start = pd.to_datetime(df["start_time"], errors="coerce", utc=True, format="ISO8601")
+    end = pd.to_datetime(df["end_time"], errors="coerce", utc=True, format="ISO8601")
+    from_times = (end - start).dt.total_seconds().to_numpy(dtype="float64") * 1000
+    from_field = pd.to_numeric(df["latency"], errors="coerce").to_numpy(dtype="float64")
+    df["latency_ms"] = np.where(np.isnan(from_times), from_field, from_times)
+
+    for column in ("name", "type", "node"):
+        df[column] = df[column].astype("category")
+
+    return df.drop(columns=["start_time", "end_time", "latency"])
+
+def latency_percentiles(df, by):
+    """그룹별 호출 수, 평균, p50/p90/p99 지연 시간(ms)을 계산합니다"""
+    valid = df.dropna(subset=["latency_ms", by])
+    if valid.empty:
+        return pd.DataFrame(columns=[by, "count", "mean", "p50", "p90", "p99"])
+
+    grouped = valid.groupby(by, observed=True)["latency_ms"]
+    quantiles = grouped.quantile(list(LATENCY_PERCENTILES)).unstack()
+    quantiles.columns = [f"p{int(q * 100)}" for q in quantiles.columns]
+
+    result = pd.concat([grouped.size().rename("count"), grouped.mean().rename("mean"), quantiles], axis=1)
+    return result.sort_values("p90", ascending=False).reset_index()
+
+# 토큰 사용량/비용 집계 대상 수치 열
+USAGE_VALUE_COLUMNS = ["generations", "input_tokens", "output_tokens", "total_tokens", "cost"]
+
+# 일 단위 부분 집계 캐시 (지난 날짜는 거의 바뀌지 않으므로 길게, 오늘은 짧게 보관)
+DAILY_USAGE_CACHE = TTLCache("usage_daily", max_entries=400, ttl_seconds=6 * 3600)
+TODAY_USAGE_TTL = 60
+
+def _first_number(*values):
+    """값 목록에서 처음으로 나오는 숫자를 반환합니다 (없으면 NaN)"""
+    for value in values:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    return np.nan
+
+def generations_to_frame(generations):
+    """GENERATION 관찰 목록을 일자/모델/노드/토큰/비용 열을 가진 컴팩트한 표로 변환합니다"""
+    columns = {"start_time": [], "model": [], "node": [], "input_tokens": [], "output_tokens": [], "total_tokens": [], "cost": []}
+    for obs in generations:
+        usage = obs.get("usage") if isinstance(obs.get("usage"), dict) else {}
+        usage_details = obs.get("usageDetails") if isinstance(obs.get("usageDetails"), dict) else {}
+        cost_details = obs.get("costDetails") if isinstance(obs.get("costDetails"), dict) else {}
+        metadata = obs.get("metadata") if isinstance(obs.get("metadata"), dict) else {}
+
+        columns["start_time"].append(obs.get("startTime"))
+        columns["model"].append(obs.get("model") or "알 수 없음")
+        columns["node"].append(metadata.get("langgraph_node") or "알 수 없음")
+        columns["input_tokens"].append(_first_number(usage_details.get("input"), usage.get("input"), obs.get("promptTokens")))
+        columns["output_tokens"].append(_first_number(usage_details.get("output"), usage.get("output"), obs.get("completionTokens")))
+        columns["total_tokens"].append(_first_number(usage_details.get("total"), usage.get("total"), obs.get("totalTokens")))
+        columns["cost"].append(_first_number(obs.get("calculatedTotalCost"), cost_details.get("total"), usage.get("totalCost")))
+
+    df = pd.DataFrame(columns)
+    df["day"] = pd.to_datetime(df["start_time"], errors="coerce", utc=True, format="ISO8601").dt.tz_localize(None).dt.normalize()
+    df["generations"] = 1
+    df["total_tokens"] = df["total_tokens"].fillna(df["input_tokens"].fillna(0) + df["output_tokens"].fillna(0))
+    for column in ("input_tokens", "output_tokens", "total_tokens", "cost"):
+        df[column] = df[column].fillna(0.0)
+    for column in ("model", "node"):
+        df[column] = df[column].astype("category")
+
+    return df.drop(columns=["start_time"])[["day", "model", "node"] + USAGE_VALUE_COLUMNS]
+
+def daily_usage_partials(df):
+    """일자/모델/노드별 부분 합계를 계산합니다 (기간이 겹치는 재조회 시 재사용하는 단위)"""
+    if df.empty:
+        return pd.DataFrame(columns=["day", "model", "node"] + USAGE_VALUE_COLUMNS)
+    return df.groupby(["day", "model", "node"], observed=True)[USAGE_VALUE_COLUMNS].sum().reset_index()
+
+def _contiguous_ranges(days):
+    """정렬된 날짜 목록을 연속 구간 [(시작, 끝)] 목록으로 묶습니다"""
+    ranges = []
+    for day in days:
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return ranges
+
+def load_usage_partials(days, now=None):
+    """최근 며칠간의 일 단위 부분 집계를 반환합니다
+
+    캐시에 없는 날짜만 연속 구간으로 묶어 랭퓨즈에서 가져오고, 결과를 (프로젝트, 날짜)별로 캐시에 저장합니다.
+    """
+    project_name = current_project().name
+    today = (now or datetime.now(timezone.utc)).date()
+    window = [today - timedelta(days=offset) for offset in range(days)]
+
+    partials = {}
+    missing = []
+    for day in sorted(window):
+        cached = DAILY_USAGE_CACHE.get((project_name, day))
+        if cached is None:
+            missing.append(day)
+        else:
+            partials[day] = cached
+
+    for first_day, last_day in _contiguous_ranges(missing):
+        from_time = datetime.combine(first_day, datetime.min.time(), tzinfo=timezone.utc)
+        to_time = datetime.combine(last_day + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        range_partials = daily_usage_partials(generations_to_frame(fetch_langfuse_generations(from_time, to_time)))
+
+        day_values = range_partials["day"].dt.date if not range_partials.empty else pd.Series(dtype="object")
+        for offset in range((last_day - first_day).days + 1):
+            day = first_day + timedelta(days=offset)
+            day_partial = range_partials[day_values == day].reset_index(drop=True)
+            partials[day] = day_partial
+            DAILY_USAGE_CACHE.set((project_name, day), day_partial, ttl_seconds=TODAY_USAGE_TTL if day == today else None)
+
+    non_empty = [partials[day] for day in sorted(partials) if not partials[day].empty]
+    if not non_empty:
+        return daily_usage_partials(pd.DataFrame())
+    return pd.concat(non_empty, ignore_index=True)
+
+def usage_rollups(partials):
+    """부분 집계를 모델별, 노드별, 일자별 합계로 묶습니다"""
+    rollups = {}
+    for key in ("model", "node", "day"):
+        if partials.empty:
+            rollups[key] = pd.DataFrame(columns=[key] + USAGE_VALUE_COLUMNS)
+            continue
+        grouped = partials.groupby(key, observed=True)[USAGE_VALUE_COLUMNS].sum().reset_index()
+        rollups[key] = grouped.sort_values(key if key == "day" else "cost", ascending=key == "day").reset_index(drop=True)
+    return rollups
@@ -0,0 +1,350 @@
+"""
+로컬 JSON API 모듈 - 즐겨찾기, 프롬프트, 캐시된 추출 결과를 다른 도구에 읽기 전용 HTTP API로 제공하는 기능
+
+응답은 데이터가 바뀔 때만 다시 만드는 메모리 스냅숏에서 만들고, ETag/If-None-Match로 바뀌지 않은 응답은 본문 없이 돌려줍니다.
+
+    GET /api                          사용 가능한 경로와 현재 버전
+    GET /api/favorites                즐겨찾기 최신순 (type, limit, cursor)
+    GET /api/favorites/<트레이스 ID>   즐겨찾기 항목 하나 (type)
+    GET /api/prompts                  프롬프트 등록순과 패싯 값별 개수 (category, model, tag, favorite, limit, cursor)
+    GET /api/prompts/<프롬프트 ID>     프롬프트 하나
+    GET /api/extractions/<트레이스 ID> 캐시된 관찰 데이터의 질문/답변/시스템 프롬프트 (랭퓨즈에 요청하지 않음)
+"""
+
+import json
+import base64
+import hashlib
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from .helpers import API_PAGE_SIZE, OBSERVATION_CACHE_TTL
+from .cache import TTLCache
+from .data_utils import PROMPT_LIBRARY, favorites_version, load_langfuse_favorites
+from .favorites_index import FavoriteTimeIndex
+from .prompt_facets import FACET_FIELDS, PromptFacetIndex
+from .extraction import extraction_record
+from .jsonl_archive import load_exported_observations
+from .langfuse_utils import observation_cache_for
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+API_REQUESTS = REGISTRY.counter(
+    "prompt_nest_api_requests_total", "로컬 JSON API 요청 수", ("route", "status"))
+API_SNAPSHOT_BUILDS = REGISTRY.counter(
+    "prompt_nest_api_snapshot_builds_total", "로컬 JSON API 스냅숏을 다시 만든 횟수", ("resource",))
+
+# 한 번에 돌려줄 수 있는 최대 항목 수
+MAX_PAGE_SIZE = 500
+
+# 즐겨찾기 응답에 포함하는 필드
+FAVORITE_FIELDS = ("id", "name", "note", "created_at", "project")
+
+class ApiError(Exception):
+    """HTTP 상태 코드와 함께 돌려줄 요청 오류"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class Snapshot:
+    """버전 함수의 값이 바뀔 때만 다시 만드는 읽기 전용 스냅숏
+
+    같은 버전에서는 요청별로 직렬화한 응답 본문도 재사용합니다.
+    버전은 데이터를 읽기 전에 확인하므로 스냅숏은 항상 그 버전 이후의 데이터를 담습니다.
+    """
+
+    def __init__(self, name, version_fn, build_fn, max_responses=256):
+        self.name = name
+        self._version_fn = version_fn
+        self._build_fn = build_fn
+        self._max_responses = max_responses
+        self._lock = threading.RLock()
+        self._version = None
+        self._data = None
+        self._tag = None
+        self._responses = {}
+
+    def current(self):
+        """(데이터, 버전 태그)를 반환합니다"""
+        version = self._version_fn()
+        with self._lock:
+            if self._data is None or version != self._version:
+                self._data = self._build_fn()
+                self._version = version
+                self._tag = hashlib.sha1(repr((self.name, version)).encode("utf-8")).hexdigest()[:16]
+                self._responses = {}
+                API_SNAPSHOT_BUILDS.inc(resource=self.name)
+            return self._data, self._tag
+
+    def response(self, key, render):
+        """요청 키에 대한 (ETag, 본문 생성 함수)를 반환합니다 (본문은 같은 버전에서 한 번만 직렬화)"""
+        data, tag = self.current()
+        etag = f'"{tag}-{hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:8]}"'
+
+        def body():
+            with self._lock:
+                cached = self._responses.get(key)
+                if cached is not None and cached[0] == etag:
+                    return cached[1]
+            encoded = _encode(render(data))
+            with self._lock:
+                if len(self._responses) >= self._max_responses:
+                    self._responses.clear()
+                self._responses[key] = (etag, encoded)
+            return encoded
+
+        return etag, body
+
+def _encode(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def encode_cursor(value):
+    return base64.urlsafe_b64encode(_encode(value)).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ApiError(400, "잘못된 cursor 값입니다.")
+
+def _page_limit(params):
+    try:
+        limit = int(params.get("limit", API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, "limit은 정수여야 합니다.")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def _favorite_item(entry):
+    item = {field: entry["data"].get(field) for field in FAVORITE_FIELDS}
+    item["type"] = entry["type"]
+    item["created_at"] = entry["created_at"]
+    return item
+
+# 즐겨찾기: 파일이 바뀔 때만 다시 읽은 시간 색인 (앱이 제자리에서 고치는 색인과 분리해 읽는 중에 바뀌지 않음)
+FAVORITES_SNAPSHOT = Snapshot(
+    "favorites", favorites_version,
+    lambda: FavoriteTimeIndex.build(load_langfuse_favorites())
+)
+
+def _build_prompts():
+    prompts = PROMPT_LIBRARY.load()
+    return {
+        "items": prompts,
+        "by_id": {prompt["id"]: prompt for prompt in prompts},
+        # 등록 순서 (패싯 색인으로 고른 ID를 등록순으로 정렬)
+        "position": {prompt["id"]: position for position, prompt in enumerate(prompts)},
+        "facets": PromptFacetIndex.build(prompts),
+    }
+
+# 프롬프트: 이 프로세스의 쓰기나 다른 프로세스의 커밋이 있을 때만 다시 읽음
+PROMPTS_SNAPSHOT = Snapshot("prompts", PROMPT_LIBRARY.version, _build_prompts)
+
+# 트레이스별 추출 결과 (ETag, 본문) - 관찰 데이터는 트레이스 종료 후 거의 바뀌지 않음
+_extractions = TTLCache("api_extractions", max_entries=2000, ttl_seconds=OBSERVATION_CACHE_TTL)
+
+def _favorite_cursor(cursor):
+    """[생성 시각, 유형, 트레이스 ID] 형식의 커서만 받아들입니다"""
+    if (
+        isinstance(cursor, list) and len(cursor) == 3
+        and isinstance(cursor[0], (int, float)) and not isinstance(cursor[0], bool)
+        and cursor[1] in ("good", "bad")
+        and isinstance(cursor[2], str)
+    ):
+        return tuple(cursor)
+    raise ApiError(400, "잘못된 cursor 값입니다.")
+
+def favorites_page(params):
+    type_key = params.get("type")
+    if type_key not in (None, "good", "bad"):
+        raise ApiError(400, "type은 good 또는 bad여야 합니다.")
+    limit = _page_limit(params)
+    cursor = decode_cursor(params.get("cursor"))
+    after = _favorite_cursor(cursor) if cursor is not None else None
+
+    def render(index):
+        predicate = (lambda entry: entry["type"] == type_key) if type_key else None
+        entries, next_cursor = index.page(after=after, limit=limit, predicate=predicate)
+        return {
+            "items": [_favorite_item(entry) for entry in entries],
+            "next_cursor": encode_cursor(list(next_cursor)) if next_cursor else None,
+        }
+
+    return FAVORITES_SNAPSHOT.response(("page", type_key, after, limit), render)
+
+def favorite_detail(trace_id, params):
+    type_keys = [params["type"]] if params.get("type") else ["good", "bad"]
+
+    def render(index):
+        for type_key in type_keys:
+            entry = index.get(type_key, trace_id)
+            if entry is not None:
+                return _favorite_item(entry)
+        return None
+
+    data, _ = FAVORITES_SNAPSHOT.current()
+    if not any((type_key, trace_id) in data for type_key in type_keys):
+        raise ApiError(404, f"즐겨찾기에 없는 트레이스입니다: {trace_id}")
+    return FAVORITES_SNAPSHOT.response(("detail", trace_id, tuple(type_keys)), render)
+
+def _prompt_selections(params):
+    return {facet: [params[facet]] for facet in FACET_FIELDS if params.get(facet)}
+
+def prompts_page(params):
+    limit = _page_limit(params)
+    offset = decode_cursor(params.get("cursor")) or 0
+    if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+        raise ApiError(400, "잘못된 cursor 값입니다.")
+    selections = _prompt_selections(params)
+    favorite = params["favorite"].lower() in ("1", "true", "yes") if params.get("favorite") is not None else None
+    key = ("page", tuple(sorted((k, v) for k, v in params.items() if k not in ("cursor", "limit"))), offset, limit)
+
+    def render(data):
+        # 패싯 조건은 색인의 집합 연산으로 거르고, 즐겨찾기 여부는 남은 프롬프트에서만 확인
+        if selections:
+            ids = sorted(data["facets"].matching_ids(selections), key=data["position"].__getitem__)
+            matched = [data["by_id"][prompt_id] for prompt_id in ids]
+        else:
+            matched = data["items"]
+        if favorite is not None:
+            matched = [prompt for prompt in matched if bool(prompt.get("favorite")) == favorite]
+        items = matched[offset:offset + limit]
+        return {
+            "items": items,
+            "total": len(matched),
+            # 다른 조건을 유지하고 해당 패싯 값만 바꿨을 때의 프롬프트 수
+            "facets": {facet: data["facets"].counts(facet, selections) for facet in FACET_FIELDS},
+            "next_cursor": encode_cursor(offset + limit) if offset + limit < len(matched) else None,
+        }
+
+    return PROMPTS_SNAPSHOT.response(key, render)
+
+def prompt_detail(prompt_id):
+    data, _ = PROMPTS_SNAPSHOT.current()
+    if prompt_id not in data["by_id"]:
+        raise ApiError(404, f"없는 프롬프트입니다: {prompt_id}")
+    return PROMPTS_SNAPSHOT.response(("detail", prompt_id), lambda data: data["by_id"].get(prompt_id))
+
+def extraction_detail(trace_id):
+    """공유 캐시나 내보낸 아카이브에 있는 관찰 데이터만 추출합니다"""
+    cached = _extractions.get(trace_id)
+    if cached is None:
+        observations = observation_cache_for(trace_id).get(trace_id) or load_exported_observations(trace_id)
+        if not observations:
+            raise ApiError(404, f"캐시된 관찰 데이터가 없습니다: {trace_id}")
+        body = _encode(extraction_record(trace_id, observations))
+        cached = (f'"{hashlib.sha1(body).hexdigest()[:24]}"', body)
+        _extractions.set(trace_id, cached)
+    etag, body = cached
+    return etag, lambda: body
+
+def api_index():
+    _, favorites_tag = FAVORITES_SNAPSHOT.current()
+    _, prompts_tag = PROMPTS_SNAPSHOT.current()
+    body = _encode({
+        "routes": ["/api/favorites", "/api/favorites/<id>", "/api/prompts", "/api/prompts/<id>", "/api/extractions/<id>"],
+        "versions": {"favorites": favorites_tag, "prompts": prompts_tag},
+    })
+    return None, lambda: body
+
+def route(path, params):
+    """경로를 처리 함수에 연결해 (경로 이름, ETag, 본문 생성 함수)를 반환합니다"""
+    parts = [unquote(part) for part in path.strip("/").split("/")]
+    if parts[:1] != ["api"]:
+        raise ApiError(404, "없는 경로입니다.")
+    parts = parts[1:]
+    if not parts or parts == [""]:
+        return ("index",) + api_index()
+    resource, rest = parts[0], parts[1:]
+    if resource == "favorites" and not rest:
+        return ("favorites",) + favorites_page(params)
+    if resource == "favorites" and len(rest) == 1:
+        return ("favorite",) + favorite_detail(rest[0], params)
+    if resource == "prompts" and not rest:
+        return ("prompts",) + prompts_page(params)
+    if resource == "prompts" and len(rest) == 1:
+        return ("prompt",) + prompt_detail(rest[0])
+    if resource == "extractions" and len(rest) == 1:
+        return ("extraction",) + extraction_detail(rest[0])
+    raise ApiError(404, "없는 경로입니다.")
+
+def _etag_matches(header, etag):
+    if not header or not etag:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    """읽기 전용 JSON API 핸들러"""
+
+    def do_GET(self):
+        # 퍼센트 인코딩하지 않은 UTF-8 경로도 받아들임 (요청 줄은 latin-1로 디코딩되어 들어옴)
+        try:
+            path = self.path.encode("latin-1").decode("utf-8")
+        except UnicodeError:
+            path = self.path
+        url = urlsplit(path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        route_name = "unknown"
+        try:
+            route_name, etag, body = route(url.path, params)
+            not_modified = _etag_matches(self.headers.get("If-None-Match"), etag)
+            # 본문 생성(render) 중의 오류도 JSON 오류 응답으로 돌려줌
+            encoded = None if not_modified else body()
+        except ApiError as e:
+            self._send(e.status, _encode({"error": str(e)}))
+            API_REQUESTS.inc(route=route_name, status=e.status)
+            return
+        except Exception:
+            logger.exception("API 요청 처리 실패: %s", self.path)
+            self._send(500, _encode({"error": "서버 오류가 발생했습니다."}))
+            API_REQUESTS.inc(route=route_name, status=500)
+            return
+
+        if not_modified:
+            self._send(304, None, etag)
+            API_REQUESTS.inc(route=route_name, status=304)
+            return
+        self._send(200, encoded, etag)
+        API_REQUESTS.inc(route=route_name, status=200)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("api: " + format, *args)
+
+def create_api_server(port, host="127.0.0.1"):
+    return ThreadingHTTPServer((host, port), _ApiHandler)
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_api_server(port, host="127.0.0.1"):
+    """로컬 JSON API 서버를 백그라운드 스레드로 시작합니다 (프로세스당 한 번)"""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = create_api_server(port, host)
+        except OSError as e:
+            logger.warning("API 서버를 시작하지 못했습니다 (%s:%s): %s", host, port, e)
+            return None
+        thread = threading.Thread(target=_server.serve_forever, name="api-server", daemon=True)
+        thread.start()
+        logger.info("API 서버 시작: http://%s:%s/api", host, port)
+        return _server
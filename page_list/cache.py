@@ -0,0 +1,190 @@
+"""
+캐시 모듈 - 서버 프로세스 전체에서 공유하는 스레드 안전 TTL 캐시와 세션별 용량 제한 캐시
+"""
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+from .metrics import record_cache_lookup, CACHE_EVICTIONS
+from .lazy_json import LazyJSONObject
+
+class TTLCache:
+    """항목 수 상한과 만료 시간을 가진 스레드 안전 LRU 캐시"""
+
+    def __init__(self, name, max_entries=1000, ttl_seconds=600):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """만료되지 않은 값을 반환하고 적중/미적중을 메트릭으로 기록합니다"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] > now:
+                self._items.move_to_end(key)
+                record_cache_lookup(self.name, True)
+                return item[1]
+            if item is not None:
+                del self._items[key]
+        record_cache_lookup(self.name, False)
+        return default
+
+    def set(self, key, value, ttl_seconds=None):
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            self._items[key] = (expires_at, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            return item is not None and item[0] > time.monotonic()
+
+    def remaining_ttl(self, key):
+        """만료까지 남은 시간(초) (없거나 만료됐으면 None)"""
+        with self._lock:
+            item = self._items.get(key)
+        if item is None:
+            return None
+        remaining = item[0] - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._items.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+def estimate_size(value):
+    """객체가 참조하는 전체 메모리를 바이트 단위로 추정합니다 (같은 객체는 한 번만 계산)"""
+    total = 0
+    seen = set()
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(dict.values(obj))
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        # 인스턴스 속성 (지연 파싱 객체의 원본 문자열 등)
+        if hasattr(obj, "__dict__") and not isinstance(obj, type):
+            stack.append(vars(obj))
+    return total
+
+def _pending_raw_size(value):
+    """값 안의 지연 파싱 객체가 아직 디코딩하지 않은 원본 문자열 길이 합 (디코딩하면 줄어듦)"""
+    if isinstance(value, LazyJSONObject):
+        return value.raw_size
+    if isinstance(value, list):
+        return sum(item.raw_size for item in value if isinstance(item, LazyJSONObject))
+    return 0
+
+class ByteBudgetCache:
+    """항목별 크기를 기록하고 총 용량이 예산을 넘으면 오래 사용하지 않은 항목부터 제거하는 LRU 캐시
+
+    세션 상태에 두고 한 세션의 리런 안에서만 사용하므로 잠금을 두지 않습니다.
+    크기는 저장 시점에 추정하고, 지연 파싱 필드가 그 뒤에 디코딩되었으면 접근하거나 resize를 호출할 때 다시 추정합니다.
+    프로세스 공유 캐시와 같은 객체를 참조하더라도 세션 몫으로 계산합니다.
+    """
+
+    def __init__(self, name, max_bytes):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        # 키 -> (추정 크기, 값, 추정 당시 디코딩하지 않은 원본 길이)
+        self._items = OrderedDict()
+
+    def _evict(self):
+        CACHE_EVICTIONS.inc(cache=self.name)
+        self.evictions += 1
+
+    def _trim(self):
+        # 가장 최근 항목 하나는 남김 (방금 접근한 항목이 디코딩으로 커져도 사용 중에 사라지지 않도록)
+        while self.total_bytes > self.max_bytes and len(self._items) > 1:
+            _, (evicted_size, _, _) = self._items.popitem(last=False)
+            self.total_bytes -= evicted_size
+            self._evict()
+
+    def _refresh(self, key):
+        """디코딩으로 원본 길이가 바뀐 항목의 크기를 다시 추정합니다"""
+        size, value, raw = self._items[key]
+        current_raw = _pending_raw_size(value)
+        if current_raw == raw:
+            return
+        new_size = estimate_size(value)
+        self._items[key] = (new_size, value, current_raw)
+        self.total_bytes += new_size - size
+
+    def resize(self, key=None):
+        """디코딩 후 크기를 다시 추정하고 예산을 넘으면 오래된 항목을 제거합니다 (key가 없으면 모든 항목)"""
+        keys = [key] if key is not None else list(self._items)
+        for item_key in keys:
+            if item_key in self._items:
+                self._refresh(item_key)
+        self._trim()
+
+    def get(self, key, default=None):
+        if key not in self._items:
+            return default
+        return self[key]
+
+    def __getitem__(self, key):
+        self._items.move_to_end(key)
+        # 이전 리런에서 디코딩된 필드가 있으면 크기를 다시 추정
+        self._refresh(key)
+        self._trim()
+        return self._items[key][1]
+
+    def __setitem__(self, key, value):
+        size = estimate_size(value)
+        self.pop(key)
+        if size > self.max_bytes:
+            # 한 항목이 예산보다 크면 다른 항목을 모두 밀어내지 않도록 저장하지 않음
+            self._evict()
+            return
+
+        self._items[key] = (size, value, _pending_raw_size(value))
+        self.total_bytes += size
+        self._trim()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def pop(self, key, default=None):
+        item = self._items.pop(key, None)
+        if item is None:
+            return default
+        self.total_bytes -= item[0]
+        return item[1]
+
+    def clear(self):
+        self._items.clear()
+        self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def entry_sizes(self):
+        """(키, 바이트) 목록을 최근 사용 순으로 반환합니다"""
+        return [(key, item[0]) for key, item in reversed(self._items.items())]
@@ -0,0 +1,101 @@
+"""
+캐시 예열 워커 모듈 - 최근 트레이스와 즐겨찾기의 관찰 데이터를 백그라운드에서 공유 캐시에 미리 채우는 기능
+"""
+
+import time
+import logging
+import threading
+
+from .helpers import CACHE_WARMER_INTERVAL, CACHE_WARMER_DAYS, CACHE_WARMER_LIMIT, OBSERVATION_CACHE_TTL
+from .data_utils import load_langfuse_favorites
+from .langfuse_utils import fetch_cached_traces, fetch_observations_batch, observation_cache_for
+from .projects import PROJECTS, use_project
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+WARMER_RUNS = REGISTRY.counter(
+    "prompt_nest_cache_warmer_runs_total", "캐시 예열 실행 횟수", ("result",))
+WARMER_PREFETCHED = REGISTRY.counter(
+    "prompt_nest_cache_warmer_prefetched_total", "캐시 예열로 미리 가져온 트레이스 수")
+WARMER_LAST_RUN_SECONDS = REGISTRY.gauge(
+    "prompt_nest_cache_warmer_last_run_seconds", "마지막 캐시 예열 소요 시간(초)")
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def warm_once(limit=CACHE_WARMER_LIMIT, days=CACHE_WARMER_DAYS, refresh_within=CACHE_WARMER_INTERVAL):
+    """프로젝트마다 최근 트레이스 목록을 갱신하고, 트레이스와 즐겨찾기의 관찰 데이터를 미리 가져옵니다
+
+    캐시에 없거나 refresh_within초 안에 만료되는 항목만 가져오므로, 다음 실행 전에 만료될 항목은 읽는 쪽보다 먼저 갱신됩니다.
+    refresh_within이 캐시 TTL의 절반보다 짧아야 직전 실행에서 가져온 항목을 다시 가져오지 않습니다.
+    """
+    traces = []
+    for project in PROJECTS.values():
+        with use_project(project):
+            traces.extend(fetch_cached_traces(limit=limit, days=days, refresh=True))
+
+    favorites = load_langfuse_favorites()
+    favorite_ids = [item.get("id") for type_key in ("good", "bad") for item in favorites.get(type_key, [])]
+    trace_ids = [trace.get("id") for trace in traces] + favorite_ids
+
+    # 만료까지 충분히 남은 트레이스는 건너뜀 (관찰 데이터는 트레이스 종료 후 거의 바뀌지 않음)
+    pending = []
+    for trace_id in dict.fromkeys(trace_ids):
+        if not trace_id:
+            continue
+        remaining = observation_cache_for(trace_id).remaining_ttl(trace_id)
+        if remaining is None or remaining <= refresh_within:
+            pending.append(trace_id)
+    if pending:
+        # 곧 만료될 항목도 캐시를 건너뛰고 다시 가져와 교체
+        fetch_observations_batch(pending, refresh=True)
+    return len(pending)
+
+class CacheWarmer(threading.Thread):
+    """주기적으로 warm_once를 실행하는 데몬 스레드"""
+
+    def __init__(self, interval):
+        super().__init__(name="cache-warmer", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            start = time.perf_counter()
+            try:
+                # 다음 실행 전에 만료될 항목만 갱신
+                prefetched = warm_once(refresh_within=self.interval)
+                WARMER_PREFETCHED.inc(prefetched)
+                WARMER_RUNS.inc(result="success")
+                logger.info("캐시 예열 완료: %d개 트레이스를 미리 가져왔습니다.", prefetched)
+            except Exception:
+                WARMER_RUNS.inc(result="error")
+                logger.exception("캐시 예열 중 오류가 발생했습니다.")
+            WARMER_LAST_RUN_SECONDS.set(time.perf_counter() - start)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+def clamp_interval(interval, ttl=OBSERVATION_CACHE_TTL):
+    """예열 주기를 캐시 TTL의 절반 미만으로 제한합니다
+
+    주기가 TTL의 절반 이상이면 직전 실행에서 가져온 항목도 다음 실행에서 곧 만료될 항목으로 보여 매번 모두 다시 가져오게 됩니다.
+    """
+    limit = max(1, ttl // 2 - 1)
+    if interval > limit:
+        logger.warning("캐시 예열 주기(%d초)가 관찰 데이터 캐시 TTL(%d초)의 절반 이상이라 %d초로 줄입니다.", interval, ttl, limit)
+        return limit
+    return interval
+
+def start_cache_warmer(interval=CACHE_WARMER_INTERVAL):
+    """캐시 예열 워커를 시작합니다 (서버 프로세스당 한 번만 시작)"""
+    global _worker
+    interval = clamp_interval(interval)
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = CacheWarmer(interval)
+            _worker.start()
+            logger.info("캐시 예열 워커 시작 (주기: %d초)", interval)
+        return _worker
@@ -0,0 +1,97 @@
+"""
+카세트 모듈 - 랭퓨즈 HTTP 응답을 압축 파일로 기록하고 네트워크 없이 재생하는 기능 (벤치마크, 오프라인 데모, 페이지 테스트용)
+"""
+
+import os
+import glob
+import gzip
+import json
+import hashlib
+import logging
+from datetime import datetime, timezone
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .helpers import LANGFUSE_CASSETTE_DIR
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_SUFFIX = ".json.gz"
+
+# 호출 시각에 따라 달라지는 조회 기간 매개변수 (정확히 일치하는 카세트가 없으면 이 값을 빼고 찾음)
+VOLATILE_PARAMS = {"startTime", "fromStartTime", "toStartTime", "fromTimestamp", "toTimestamp"}
+
+# 재생할 때 돌려줄 응답 헤더
+_KEPT_HEADERS = ("Content-Type",)
+
+def _digest(url, params, namespace=""):
+    canonical = [url, sorted((str(key), str(value)) for key, value in (params or {}).items())]
+    # 같은 호스트를 쓰는 여러 프로젝트의 응답이 섞이지 않도록 프로젝트 이름을 키에 포함 (프로젝트가 하나면 예전 키 유지)
+    if namespace:
+        canonical.append(namespace)
+    canonical = json.dumps(canonical)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:20]
+
+def cassette_keys(url, params=None, namespace=""):
+    """(조회 기간을 뺀 키, 정확한 키) - 파일 이름은 "느슨한 키-정확한 키"로 만듭니다"""
+    stable = {key: value for key, value in (params or {}).items() if key not in VOLATILE_PARAMS}
+    return _digest(url, stable, namespace), _digest(url, params, namespace)
+
+def _cassette_path(url, params, namespace=""):
+    loose_key, exact_key = cassette_keys(url, params, namespace)
+    return os.path.join(LANGFUSE_CASSETTE_DIR, f"{loose_key}-{exact_key}{CASSETTE_SUFFIX}")
+
+def save_cassette(endpoint, url, params, response, namespace=""):
+    """응답을 카세트 파일로 기록합니다 (같은 요청은 덮어씀)"""
+    path = _cassette_path(url, params, namespace)
+    record = {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "endpoint": endpoint,
+        "project": namespace,
+        "url": url,
+        "params": params or {},
+        "status_code": response.status_code,
+        "reason": response.reason,
+        "headers": {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers},
+        "body": response.content.decode("utf-8", errors="replace"),
+    }
+    try:
+        os.makedirs(LANGFUSE_CASSETTE_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        # 기록 실패가 실제 요청을 막지 않도록 로그만 남김
+        logger.exception("카세트를 기록하지 못했습니다: %s", path)
+
+def _find_cassette(url, params, namespace=""):
+    exact_path = _cassette_path(url, params, namespace)
+    if os.path.exists(exact_path):
+        return exact_path
+    # 조회 기간만 다른 요청은 가장 최근에 기록한 카세트로 대신함
+    loose_key, _ = cassette_keys(url, params, namespace)
+    candidates = glob.glob(os.path.join(LANGFUSE_CASSETTE_DIR, f"{loose_key}-*{CASSETTE_SUFFIX}"))
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+def load_cassette(url, params=None, namespace=""):
+    """기록된 응답을 requests.Response로 복원합니다 (없으면 None)"""
+    path = _find_cassette(url, params, namespace)
+    if path is None:
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        logger.warning("카세트를 읽지 못했습니다: %s", path)
+        return None
+
+    response = requests.Response()
+    response.status_code = record["status_code"]
+    response.reason = record.get("reason") or ""
+    response.headers = CaseInsensitiveDict(record.get("headers") or {})
+    response.url = record.get("url", url)
+    response.encoding = "utf-8"
+    response._content = record["body"].encode("utf-8")
+    return response
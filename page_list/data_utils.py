@@ -1,25 +1,80 @@
 import os
 import json
-from .helpers import DATA_DIR, PROMPTS_FILE
+import threading
+from .helpers import DATA_DIR, PROMPTS_FILE, PROMPTS_DB_FILE
+from .metrics import FAVORITES_WRITES, FAVORITES_WRITE_SECONDS
+from .favorites_index import FavoriteTimeIndex, next_created_at
+from .prompt_library import PromptLibrary
+from .prompt_facets import PromptFacetIndex
+from .projects import PROJECTS, remember_trace_project, known_trace_project
 
 # 전체 파일 경로
 FULL_PROMPTS_FILE = os.path.join(DATA_DIR, PROMPTS_FILE)
+FULL_PROMPTS_DB_FILE = os.path.join(DATA_DIR, PROMPTS_DB_FILE)
 LANGFUSE_FAVORITES_FILE = os.path.join(DATA_DIR, "langfuse_favorites.json")
 
 # 데이터 디렉토리 생성
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# 프롬프트 불러오기
-def load_prompts():
-    if os.path.exists(FULL_PROMPTS_FILE):
-        with open(FULL_PROMPTS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+# 프롬프트 저장소 (예전 prompts.json이 있으면 처음 열 때 옮겨 옴)
+PROMPT_LIBRARY = PromptLibrary(FULL_PROMPTS_DB_FILE, legacy_path=FULL_PROMPTS_FILE)
 
-# 프롬프트 저장하기
-def save_prompts(prompts):
-    with open(FULL_PROMPTS_FILE, "w", encoding="utf-8") as f:
-        json.dump(prompts, f, ensure_ascii=False, indent=4)
+# 프롬프트 패싯 색인 (다른 프로세스가 저장소를 바꿨을 때만 다시 만들고, 이 프로세스의 쓰기는 제자리에 반영)
+_prompt_facets = None
+_prompt_facets_version = None
+_prompt_facets_lock = threading.RLock()
+
+# 즐겨찾기 시간 색인 (파일이 바뀌었을 때만 다시 만들고, 이 프로세스의 쓰기는 제자리에 반영)
+_favorites_index = None
+_favorites_index_stat = None
+_favorites_lock = threading.RLock()
+
+def _favorites_file_stat():
+    try:
+        stat = os.stat(LANGFUSE_FAVORITES_FILE)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+# 프롬프트 불러오기 (fields를 주면 해당 필드만 읽음)
+def load_prompts(fields=None):
+    return PROMPT_LIBRARY.load(fields)
+
+# 카테고리/모델/태그 패싯 색인 가져오기
+def load_prompt_facets():
+    global _prompt_facets, _prompt_facets_version
+    with _prompt_facets_lock:
+        version = PROMPT_LIBRARY.version()
+        if _prompt_facets is None or version != _prompt_facets_version:
+            _prompt_facets = PromptFacetIndex.build(load_prompts(fields=("id", "category", "model", "tags")))
+            _prompt_facets_version = version
+        return _prompt_facets
+
+def _write_prompts(write, apply=None):
+    """저장소에 쓰고 패싯 색인에 같은 변경을 반영합니다 (쓰기 전에 이미 낡은 색인은 다음 조회 때 다시 만듦)"""
+    global _prompt_facets, _prompt_facets_version
+    with _prompt_facets_lock:
+        stale = _prompt_facets is None or PROMPT_LIBRARY.version() != _prompt_facets_version
+        result = write()
+        if stale:
+            _prompt_facets = None
+        else:
+            if apply is not None:
+                apply(_prompt_facets)
+            _prompt_facets_version = PROMPT_LIBRARY.version()
+        return result
+
+# 프롬프트 추가/수정하기 (해당 레코드만 기록)
+def upsert_prompts(prompts):
+    _write_prompts(lambda: PROMPT_LIBRARY.upsert_many(prompts), lambda facets: facets.add_many(prompts))
+
+# 프롬프트 즐겨찾기 상태 변경하기 (패싯 값은 그대로)
+def set_prompt_favorite(prompt_id, favorite):
+    return _write_prompts(lambda: PROMPT_LIBRARY.set_favorite(prompt_id, favorite))
+
+# 프롬프트 삭제하기
+def delete_prompt(prompt_id):
+    return _write_prompts(lambda: PROMPT_LIBRARY.delete(prompt_id), lambda facets: facets.remove(prompt_id))
 
 # 랭퓨즈 즐겨찾기 불러오기
 def load_langfuse_favorites():
@@ -31,41 +86,99 @@ def load_langfuse_favorites():
             return {"good": [], "bad": []}
     return {"good": [], "bad": []}
 
-# 랭퓨즈 즐겨찾기 저장하기
+# 랭퓨즈 즐겨찾기 저장하기 (임시 파일에 쓴 뒤 교체하므로 다른 프로세스가 쓰는 중인 파일을 읽지 않음)
 def save_langfuse_favorites(favorites):
-    with open(LANGFUSE_FAVORITES_FILE, "w", encoding="utf-8") as f:
-        json.dump(favorites, f, ensure_ascii=False, indent=4)
+    with FAVORITES_WRITE_SECONDS.time():
+        tmp_path = f"{LANGFUSE_FAVORITES_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(favorites, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, LANGFUSE_FAVORITES_FILE)
+
+# 즐겨찾기 변경 감지용 버전 (파일 수정 시각과 크기, 파일이 없으면 None)
+def favorites_version():
+    return _favorites_file_stat()
+
+# 생성 시각 순 즐겨찾기 색인 가져오기
+def load_favorites_index():
+    global _favorites_index, _favorites_index_stat
+    with _favorites_lock:
+        stat = _favorites_file_stat()
+        if _favorites_index is None or stat != _favorites_index_stat:
+            favorites = load_langfuse_favorites()
+            # 다른 프로젝트의 즐겨찾기도 관찰 데이터를 해당 프로젝트에서 가져오도록 기록
+            for items in favorites.values():
+                for item in items:
+                    remember_trace_project(item.get("id"), item.get("project"))
+            _favorites_index = FavoriteTimeIndex.build(favorites)
+            _favorites_index_stat = stat
+        return _favorites_index
+
+# 최신순 즐겨찾기 페이지 (after 커서보다 오래된 항목부터 limit개, 다음 커서)
+def load_favorites_page(after=None, limit=20, predicate=None):
+    return load_favorites_index().page(after=after, limit=limit, predicate=predicate)
 
 # 랭퓨즈 트레이스를 즐겨찾기에 추가
 def add_to_langfuse_favorites(trace_id, trace_name, type_key="good", note=""):
-    favorites = load_langfuse_favorites()
-    
-    # 이미 등록된 즐겨찾기 확인
-    existing_item = next((item for item in favorites[type_key] if item["id"] == trace_id), None)
-    
-    if existing_item:
-        # 이미 존재하는 경우 노트를 업데이트
-        existing_item["note"] = note
-    else:
-        # 새로운 즐겨찾기 항목을 추가
-        favorites[type_key].append({
-            "id": trace_id,
-            "name": trace_name,
-            "timestamp": os.path.getmtime(LANGFUSE_FAVORITES_FILE) if os.path.exists(LANGFUSE_FAVORITES_FILE) else None,
-            "note": note
-        })
-    
-    # 저장
-    save_langfuse_favorites(favorites)
+    return add_many_to_langfuse_favorites([(trace_id, trace_name)], type_key, note)
+
+# 여러 랭퓨즈 트레이스를 한 번에 즐겨찾기에 추가 (파일은 한 번만 기록)
+def add_many_to_langfuse_favorites(traces, type_key="good", note=""):
+    global _favorites_index_stat
+    operations = []
+    with _favorites_lock:
+        index = load_favorites_index()
+        favorites = load_langfuse_favorites()
+        existing_items = {item["id"]: item for item in favorites[type_key]}
+        changed_items = []
+        latest = index.latest_created_at()
+        
+        for trace_id, trace_name in traces:
+            existing_item = existing_items.get(trace_id)
+            if existing_item:
+                # 이미 존재하는 경우 노트를 업데이트
+                existing_item["note"] = note
+                item = existing_item
+                operations.append("update")
+            else:
+                # 새로운 즐겨찾기 항목을 추가 (생성 시각은 항상 기존 항목보다 늦게)
+                latest = next_created_at(latest)
+                item = {
+                    "id": trace_id,
+                    "name": trace_name,
+                    "created_at": latest,
+                    "note": note
+                }
+                # 여러 프로젝트를 조회하는 경우 트레이스가 속한 프로젝트를 함께 저장
+                project = known_trace_project(trace_id)
+                if project is not None and len(PROJECTS) > 1:
+                    item["project"] = project.name
+                favorites[type_key].append(item)
+                existing_items[trace_id] = item
+                operations.append("add")
+            changed_items.append(item)
+        
+        # 저장 후 색인에도 반영
+        save_langfuse_favorites(favorites)
+        for item in changed_items:
+            index.insert(type_key, item)
+        _favorites_index_stat = _favorites_file_stat()
+    for operation in operations:
+        FAVORITES_WRITES.inc(operation=operation)
     return True
 
 # 랭퓨즈 트레이스를 즐겨찾기에서 제거
 def remove_from_langfuse_favorites(trace_id, type_key="good"):
-    favorites = load_langfuse_favorites()
-    
-    # 해당 ID를 가진 항목 제거
-    favorites[type_key] = [item for item in favorites[type_key] if item["id"] != trace_id]
-    
-    # 저장
-    save_langfuse_favorites(favorites)
-    return True 
\ No newline at end of file
+    global _favorites_index_stat
+    with _favorites_lock:
+        index = load_favorites_index()
+        favorites = load_langfuse_favorites()
+        
+        # 해당 ID를 가진 항목 제거
+        favorites[type_key] = [item for item in favorites[type_key] if item["id"] != trace_id]
+        
+        # 저장 후 색인에도 반영
+        save_langfuse_favorites(favorites)
+        index.remove(type_key, trace_id)
+        _favorites_index_stat = _favorites_file_stat()
+    FAVORITES_WRITES.inc(operation="remove")
+    return True
\ No newline at end of file
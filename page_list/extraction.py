@@ -0,0 +1,288 @@
+"""
+추출 모듈 - 관찰 데이터에서 사용자 질문, 최종 답변, 시스템 프롬프트를 찾고 시스템 프롬프트를 내용 해시로 공유하는 기능
+"""
+
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+class PromptStore:
+    """시스템 프롬프트를 내용 해시 하나당 한 번만 보관하는 프로세스 공유 저장소
+
+    같은 내용의 문자열은 처음 등록된 객체 하나를 모든 관찰 데이터와 추출 결과가 함께 참조합니다.
+    상한을 넘으면 오래 쓰지 않은 항목부터 저장소에서 빠지지만, 이미 참조 중인 문자열은 그대로 유효합니다.
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._hash_by_content = OrderedDict()
+        self._content_by_hash = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(content):
+        """프롬프트 내용의 해시 (문자열이 아니면 정렬된 JSON으로 변환해 계산)"""
+        text = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+    def intern(self, content):
+        """(해시, 공유 객체)를 반환합니다. 문자열이 아닌 내용은 해시만 계산하고 그대로 돌려줍니다"""
+        if not isinstance(content, str):
+            return self.content_hash(content), content
+
+        with self._lock:
+            # 문자열 자체를 키로 조회하므로 이미 본 내용은 다시 해시하지 않음
+            content_hash = self._hash_by_content.get(content)
+            if content_hash is not None:
+                self._hash_by_content.move_to_end(content)
+                return content_hash, self._content_by_hash[content_hash]
+
+        content_hash = self.content_hash(content)
+        with self._lock:
+            canonical = self._content_by_hash.setdefault(content_hash, content)
+            self._hash_by_content[canonical] = content_hash
+            while len(self._hash_by_content) > self.max_entries:
+                evicted, evicted_hash = self._hash_by_content.popitem(last=False)
+                self._content_by_hash.pop(evicted_hash, None)
+        return content_hash, canonical
+
+    def get(self, content_hash):
+        with self._lock:
+            return self._content_by_hash.get(content_hash)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._content_by_hash)
+
+# 프로세스 전역 프롬프트 저장소
+PROMPT_STORE = PromptStore()
+
+def _node_of(obs):
+    """관찰 데이터의 LangGraph 노드 이름"""
+    metadata = obs.get("metadata")
+    return (metadata.get("langgraph_node") if isinstance(metadata, dict) else None) or "알 수 없음"
+
+def find_user_question(observations):
+    """사용자의 처음 질문을 찾습니다"""
+    for obs in observations:
+        # LangGraph 형식의 messages 배열 확인
+        if isinstance(obs.get("output"), dict) and "messages" in obs.get("output", {}):
+            messages = obs.get("output", {}).get("messages", [])
+            for msg in messages:
+                if isinstance(msg, dict) and msg.get("type") == "human":
+                    return {
+                        "id": obs.get("id", ""),
+                        "name": obs.get("name", ""),
+                        "input": {"content": msg.get("content", "")}
+                    }
+        
+        # 입력 데이터에서 사용자 질문을 찾습니다
+        if obs.get("input") and isinstance(obs.get("input"), dict):
+            # human_input 키가 있는 경우
+            if "human_input" in obs.get("input"):
+                return obs
+                
+            # messages 배열이 있는 경우
+            if "messages" in obs.get("input"):
+                messages = obs.get("input").get("messages", [])
+                for msg in messages:
+                    if isinstance(msg, dict) and msg.get("type", "").lower() == "human":
+                        return obs
+        
+        # 출력 데이터에서 메시지를 확인합니다
+        if obs.get("output") and isinstance(obs.get("output"), dict):
+            # messages 배열이 있는 경우
+            if "messages" in obs.get("output"):
+                messages = obs.get("output").get("messages", [])
+                for msg in messages:
+                    if isinstance(msg, dict) and msg.get("type", "").lower() == "human":
+                        # 사용자 메시지를 발견하면 해당 관찰 데이터로 가상의 사용자 질문 객체 생성
+                        return {
+                            "id": obs.get("id", ""),
+                            "name": "사용자 메시지",
+                            "input": {"content": msg.get("content", "")}
+                        }
+        
+        # 이름이 "user" 또는 "human"을 포함하는 관찰 데이터를 찾습니다
+        if "user" in str(obs.get("name", "")).lower() or "human" in str(obs.get("name", "")).lower():
+            return obs
+        
+        # 메타데이터에서 사용자 질문 힌트를 찾습니다
+        if obs.get("metadata") and ("user_message" in str(obs.get("metadata")) or "human_message" in str(obs.get("metadata"))):
+            return obs
+            
+        # 입력 또는 출력 데이터에서 content 키가 있고 type이 "human"인 경우
+        for data_key in ["input", "output"]:
+            data = obs.get(data_key, {})
+            if isinstance(data, dict):
+                if "content" in data and "type" in data and data.get("type", "").lower() == "human":
+                    return obs
+    
+    return None
+
+def find_final_answer(observations):
+    """최종 답변을 찾습니다"""
+    # 시간순으로 정렬 (가장 마지막 응답을 찾기 위해)
+    # None값이 있는 경우 빈 문자열로 대체하여 정렬 오류 방지
+    sorted_obs = sorted(observations, key=lambda x: x.get("endTime") or "", reverse=True)
+    
+    for obs in sorted_obs:
+        # 출력 데이터에서 메시지 배열이 있는지 확인 (LangGraph 형식)
+        if isinstance(obs.get("output"), dict) and "messages" in obs.get("output", {}):
+            messages = obs.get("output", {}).get("messages", [])
+            if messages:
+                # 마지막 메시지를 찾아서 최종 답변으로 사용
+                last_message = messages[-1]
+                if isinstance(last_message, dict) and "content" in last_message:
+                    # 가상의 최종 답변 객체 생성
+                    return {
+                        "id": obs.get("id", ""),
+                        "name": obs.get("name", "") or "최종 답변",
+                        "output": {"content": last_message.get("content", "")}
+                    }
+                    
+        # 출력 데이터가 있는 관찰 중 응답 또는 답변으로 보이는 것을 찾습니다
+        if obs.get("output") and isinstance(obs.get("output"), dict):
+            return obs
+            
+        # 이름에 "response", "answer", "output" 등이 포함된 관찰을 찾습니다
+        if any(key in str(obs.get("name", "")).lower() for key in ["response", "answer", "output", "assistant"]):
+            return obs
+    
+    return None
+
+def find_system_prompts(observations):
+    """ChatVertexAI의 시스템 프롬프트를 찾습니다"""
+    system_prompts = []
+    unique_hashes = set()  # 중복 제거를 위한 세트 (내용 해시 기준)
+    
+    for obs in observations:
+        # ChatVertexAI 생성 관찰 데이터 확인 (GENERATION 타입)
+        if obs.get("type") == "GENERATION" and obs.get("name") == "ChatVertexAI":
+            # 입력 메시지 배열에서 시스템 프롬프트 검색
+            input_messages = obs.get("input", [])
+            
+            for msg in input_messages:
+                if isinstance(msg, dict) and msg.get("role") == "system":
+                    content = msg.get("content")
+                    if content:
+                        content_hash, content = PROMPT_STORE.intern(content)
+                        # 캐시된 관찰 데이터도 공유 문자열을 참조하도록 읽은 시점에 바꿔 넣음 (입력은 이때 처음 디코딩됨)
+                        msg["content"] = content
+                        if content_hash not in unique_hashes:
+                            unique_hashes.add(content_hash)
+                            system_prompts.append({
+                                "id": obs.get("id", ""),
+                                "name": f"{obs.get('name', '')} - {obs.get('metadata', {}).get('langgraph_node', '알 수 없음')}",
+                                "node": _node_of(obs),
+                                "content_hash": content_hash,
+                                "content": content
+                            })
+        
+        # 기존 검색 로직 유지 (메타데이터나 입력에서 시스템 프롬프트 검색)        
+        metadata = obs.get("metadata", {})
+        input_data = obs.get("input", {})
+        
+        is_system_prompt = False
+        content = None
+        source = None
+        
+        # 이름에 "system", "prompt", "chatvertexai" 등이 포함된 경우
+        if any(key in str(obs.get("name", "")).lower() for key in ["system", "prompt", "chatvertexai", "vertex"]):
+            is_system_prompt = True
+        
+        # 메타데이터에 시스템 프롬프트 관련 키워드가 있는 경우
+        if isinstance(metadata, dict) and any(key in str(metadata).lower() for key in ["system_prompt", "system_message", "instructions"]):
+            is_system_prompt = True
+            # 메타데이터에서 프롬프트 내용 추출
+            for key in ["system_prompt", "system_message", "system_content", "instructions"]:
+                if key in metadata:
+                    content = metadata[key]
+                    break
+        
+        # 입력이 리스트인 경우 (LangGraph 형식) - 메시지 배열 확인
+        if isinstance(input_data, list):
+            for item in input_data:
+                if isinstance(item, dict):
+                    # role이 system인 메시지 찾기
+                    if item.get("role") == "system" or item.get("type") == "system":
+                        content = item.get("content")
+                        source = item
+                        is_system_prompt = True
+                        break
+                    # content 필드와 type이 system인 메시지 찾기
+                    elif "content" in item and item.get("type") == "system":
+                        content = item.get("content")
+                        source = item
+                        is_system_prompt = True
+                        break
+            
+        # 입력 데이터에 시스템 프롬프트 관련 키워드가 있는 경우
+        if isinstance(input_data, dict) and any(key in str(input_data).lower() for key in ["system_prompt", "system_message", "instructions"]):
+            is_system_prompt = True
+            # 입력 데이터에서 프롬프트 내용 추출
+            for key in ["system_prompt", "system_message", "system_content", "instructions"]:
+                if key in input_data:
+                    content = input_data[key]
+                    break
+                    
+        if is_system_prompt:
+            # 중복 검사 - 같은 내용의 프롬프트는 추가하지 않음
+            if content:
+                content_hash, content = PROMPT_STORE.intern(content)
+                if source is not None:
+                    source["content"] = content
+                if content_hash not in unique_hashes:
+                    unique_hashes.add(content_hash)
+                    system_prompts.append({
+                        "id": obs.get("id", ""),
+                        "name": obs.get("name", ""),
+                        "node": _node_of(obs),
+                        "content_hash": content_hash,
+                        "content": content
+                    })
+    
+    return system_prompts
+
+def question_text(user_question):
+    """find_user_question 결과에서 질문 본문을 문자열로 꺼냅니다"""
+    if not user_question:
+        return ""
+    input_data = user_question.get("input", {})
+    if isinstance(input_data, dict):
+        for key in ("content", "message", "human_input"):
+            if input_data.get(key):
+                return str(input_data[key])
+        for msg in input_data.get("messages", []) or []:
+            if isinstance(msg, dict) and str(msg.get("type", "")).lower() == "human":
+                return str(msg.get("content", ""))
+        return ""
+    return str(input_data or "")
+
+def answer_text(final_answer):
+    """find_final_answer 결과에서 답변 본문을 문자열로 꺼냅니다"""
+    if not final_answer:
+        return ""
+    output_data = final_answer.get("output", {})
+    if isinstance(output_data, dict):
+        messages = output_data.get("messages")
+        if messages and isinstance(messages[-1], dict):
+            return str(messages[-1].get("content", ""))
+        for key in ("content", "message", "response", "answer"):
+            if output_data.get(key):
+                return str(output_data[key])
+        return ""
+    return str(output_data or "")
+
+def extraction_record(trace_id, observations):
+    """관찰 데이터에서 질문/답변/시스템 프롬프트를 추출해 직렬화 가능한 레코드로 만듭니다"""
+    return {
+        "id": trace_id,
+        "question": question_text(find_user_question(observations)),
+        "answer": answer_text(find_final_answer(observations)),
+        "system_prompts": [
+            {"node": prompt["node"], "content_hash": prompt["content_hash"], "content": prompt["content"]}
+            for prompt in find_system_prompts(observations)
+        ],
+    }
@@ -1,9 +1,18 @@
 import streamlit as st
 import datetime
 from .data_utils import (
-    load_langfuse_favorites, remove_from_langfuse_favorites
+    PROMPT_LIBRARY, load_favorites_index, load_favorites_page, remove_from_langfuse_favorites, load_prompts
 )
-from .langfuse_utils import fetch_langfuse_observations
+from .langfuse_utils import fetch_cached_observations, fetch_observations_batch
+from .extraction import find_user_question, find_final_answer, find_system_prompts, question_text, answer_text
+from .prompt_diff import diff_texts, pair_system_prompts
+from .cache import ByteBudgetCache
+from .helpers import SESSION_CACHE_MAX_BYTES, FAVORITES_PAGE_SIZE
+from .metrics import record_cache_lookup
+from .profiler import profile_section
+from .prompt_catalog import PROMPT_CATALOG
+from .similarity_index import SIMILARITY_INDEX, favorite_text, index_favorite, remove_favorite, sync_prompts_if_changed
+from .similar_examples import display_similar_examples
 
 def favorite_page():
     """즐겨찾기 페이지"""
@@ -15,119 +24,293 @@ def favorite_page():
     if 'expanded_favorite' not in st.session_state:
         st.session_state.expanded_favorite = None
     
-    if 'favorite_observations' not in st.session_state:
-        st.session_state.favorite_observations = {}
+    # 관찰 데이터는 세션별 용량 예산 안에서만 보관
+    if not isinstance(st.session_state.get('favorite_observations'), ByteBudgetCache):
+        st.session_state.favorite_observations = ByteBudgetCache("favorite_observations", SESSION_CACHE_MAX_BYTES)
     
     # 모든 즐겨찾기 데이터 불러오기
-    all_favorites = load_all_favorites()
+    with profile_section("데이터 로드"):
+        all_favorites = load_all_favorites()
     
     if not all_favorites:
         st.info("즐겨찾기한 항목이 없습니다. 랭퓨즈 데이터 페이지에서 항목을 즐겨찾기로 등록해보세요.")
         return
     
+    # 질문/답변 내용으로 비슷한 즐겨찾기와 프롬프트 검색
+    display_similarity_search(all_favorites)
+    
+    # 두 즐겨찾기의 시스템 프롬프트/질문/답변 비교
+    display_favorite_comparison(all_favorites)
+    
+    # 프롬프트 버전으로 필터링 (카탈로그 색인만 사용하므로 트레이스를 다시 가져오지 않음)
+    filtered_favorites = filter_favorites_by_prompt_version(all_favorites)
+    
     # 즐겨찾기 목록 표시
     st.markdown("---")
-    st.markdown(f"### 즐겨찾기 목록: {len(all_favorites)}개 항목")
+    st.markdown(f"### 즐겨찾기 목록: {len(filtered_favorites)}개 항목")
+    
+    # 현재 페이지만 시간 색인에서 꺼냄 (필터가 바뀌면 첫 페이지로)
+    page_favorites, page_number, next_cursor = load_current_favorites_page(all_favorites, filtered_favorites)
     
     # 데이터 표시 - 테이블 형태로
-    for i, favorite in enumerate(all_favorites):
-        # 현재 아이템의 확장 상태 확인
-        current_id = favorite.get('id', '')
-        is_expanded = st.session_state.expanded_favorite == current_id
+    with profile_section("목록 렌더링"):
+        for i, favorite in enumerate(page_favorites):
+            # 현재 아이템의 확장 상태 확인
+            current_id = favorite.get('id', '')
+            is_expanded = st.session_state.expanded_favorite == current_id
         
-        # 행 생성
-        col1, col2, col3 = st.columns([3, 1, 1])
+            # 행 생성
+            col1, col2, col3 = st.columns([3, 1, 1])
         
-        with col1:
-            st.caption(f"{current_id[:100]}")
+            with col1:
+                st.caption(f"{current_id[:100]}")
+                if favorite.get('created_at'):
+                    st.caption(f"등록일: {datetime.datetime.fromtimestamp(favorite['created_at']).strftime('%Y-%m-%d %H:%M:%S')}")
         
-        with col2:
-            # 유형 표시 (좋은 예제, 나쁜 예제)
-            type_text = ""
-            type_color = ""
+            with col2:
+                # 유형 표시 (좋은 예제, 나쁜 예제)
+                type_text = ""
+                type_color = ""
             
-            if favorite.get('type') == 'good':
-                type_text = "✅ 좋은 예제"
-                type_color = "#a0d8b3"
-            elif favorite.get('type') == 'bad':
-                type_text = "❌ 나쁜 예제"
-                type_color = "#ffcdd2"
+                if favorite.get('type') == 'good':
+                    type_text = "✅ 좋은 예제"
+                    type_color = "#a0d8b3"
+                elif favorite.get('type') == 'bad':
+                    type_text = "❌ 나쁜 예제"
+                    type_color = "#ffcdd2"
             
-            st.markdown(f"""
-            <div style="
-                background-color: {type_color};
-                padding: 5px 10px;
-                border-radius: 5px;
-                text-align: center;
-                margin-top: 10px;
-            ">
-                <p style="margin: 0;">{type_text}</p>
-            </div>
-            """, unsafe_allow_html=True)
+                st.markdown(f"""
+                <div style="
+                    background-color: {type_color};
+                    padding: 5px 10px;
+                    border-radius: 5px;
+                    text-align: center;
+                    margin-top: 10px;
+                ">
+                    <p style="margin: 0;">{type_text}</p>
+                </div>
+                """, unsafe_allow_html=True)
         
-        with col3:
-            # 상세보기/접기 버튼
-            button_label = "접기" if is_expanded else "상세보기"
+            with col3:
+                # 상세보기/접기 버튼
+                button_label = "접기" if is_expanded else "상세보기"
             
-            if st.button(button_label, key=f"view_{i}_{is_expanded}"):
-                # 상태 변경
-                if is_expanded:
-                    # 접기
-                    st.session_state.expanded_favorite = None
-                else:
-                    # 펼치기
-                    st.session_state.expanded_favorite = current_id
-                    # 관찰 데이터 로딩
-                    if current_id not in st.session_state.favorite_observations:
-                        load_observations_for_favorite(favorite)
+                if st.button(button_label, key=f"view_{i}_{is_expanded}"):
+                    # 상태 변경
+                    if is_expanded:
+                        # 접기
+                        st.session_state.expanded_favorite = None
+                    else:
+                        # 펼치기
+                        st.session_state.expanded_favorite = current_id
+                        # 관찰 데이터 로딩
+                        if current_id not in st.session_state.favorite_observations:
+                            load_observations_for_favorite(favorite)
                 
-                # 상태가 변경되었으므로 페이지 리로드
+                    # 상태가 변경되었으므로 페이지 리로드
+                    st.rerun()
+        
+            # 구분선 추가
+            st.markdown("---")
+        
+            # 확장된 상세 정보 표시
+            if is_expanded:
+                display_langfuse_details(favorite)
+    
+    display_favorites_pager(page_number, next_cursor)
+
+def display_similarity_search(all_favorites):
+    """즐겨찾기 질문/답변과 프롬프트 목록을 대상으로 한 유사 예제 검색"""
+    with st.expander("🔎 유사 예제 검색", expanded=False):
+        # 프롬프트 저장소가 바뀐 경우에만 목록을 읽고, 내용이 바뀐 항목만 다시 색인
+        sync_prompts_if_changed(PROMPT_LIBRARY.version(), lambda: load_prompts(fields=("id", "title", "content")))
+        
+        missing = [favorite for favorite in all_favorites if ("favorite", favorite.get('id')) not in SIMILARITY_INDEX]
+        if missing:
+            st.caption(f"색인되지 않은 즐겨찾기 {len(missing)}개가 있습니다.")
+            if st.button("즐겨찾기 색인하기", key="index_favorites"):
+                with st.spinner("즐겨찾기 트레이스를 가져와 색인하는 중..."):
+                    observations_by_trace = fetch_observations_batch([favorite.get('id') for favorite in missing])
+                    for favorite in missing:
+                        index_favorite(favorite.get('id'), favorite.get('type'), favorite.get('name'),
+                                       observations_by_trace.get(favorite.get('id')))
                 st.rerun()
         
-        # 구분선 추가
-        st.markdown("---")
+        query = st.text_area("검색할 질문 또는 답변", key="similarity_query", placeholder="비슷한 과거 예제를 찾을 내용을 입력하세요.")
+        col1, col2 = st.columns(2)
+        with col1:
+            k = st.slider("결과 수", min_value=1, max_value=20, value=5, key="similarity_k")
+        with col2:
+            kind_labels = st.multiselect("대상", ["즐겨찾기", "프롬프트"], default=["즐겨찾기", "프롬프트"], key="similarity_kinds")
         
-        # 확장된 상세 정보 표시
-        if is_expanded:
-            display_langfuse_details(favorite)
+        if query:
+            kinds = {{"즐겨찾기": "favorite", "프롬프트": "prompt"}[label] for label in kind_labels}
+            display_similar_examples(query, k=k, kinds=kinds)
+
+def _favorite_observations(favorite_id):
+    """세션 캐시에 있으면 사용하고, 없으면 가져와서 세션 캐시에 저장합니다"""
+    observations = st.session_state.favorite_observations.get(favorite_id)
+    if not observations:
+        observations = fetch_cached_observations(favorite_id)
+        st.session_state.favorite_observations[favorite_id] = observations
+    return observations
+
+def _display_diff(old_text, new_text, context):
+    result = diff_texts(old_text, new_text, context=context)
+    stats = result["stats"]
+    if result["identical"]:
+        st.info("두 내용이 같습니다.")
+        return
+    st.caption(f"유사도 {stats['ratio']:.0%} · 변경 {stats['changed']}줄 · 삭제 {stats['removed']}줄 · 추가 {stats['added']}줄")
+    st.markdown(result["html"], unsafe_allow_html=True)
+
+def display_favorite_comparison(all_favorites):
+    """두 즐겨찾기의 시스템 프롬프트, 질문, 답변을 줄/단어 단위로 비교합니다"""
+    with st.expander("🆚 즐겨찾기 비교", expanded=False):
+        if len(all_favorites) < 2:
+            st.info("비교하려면 즐겨찾기가 2개 이상 필요합니다.")
+            return
+        
+        type_icons = {"good": "✅", "bad": "❌"}
+        labels = {
+            f"{type_icons.get(favorite.get('type'), '')} {favorite.get('name', '무제 트레이스')} ({favorite.get('id', '')})": favorite
+            for favorite in all_favorites
+        }
+        options = list(labels)
+        # 기본값: 좋은 예제 하나와 나쁜 예제 하나
+        default_a = next((i for i, label in enumerate(options) if labels[label].get('type') == 'good'), 0)
+        default_b = next((i for i, label in enumerate(options) if labels[label].get('type') == 'bad' and i != default_a), 1 if default_a == 0 else 0)
+        
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            favorite_a = labels[st.selectbox("기준 (A)", options, index=default_a, key="compare_favorite_a")]
+        with col2:
+            favorite_b = labels[st.selectbox("비교 대상 (B)", options, index=default_b, key="compare_favorite_b")]
+        with col3:
+            only_changes = st.checkbox("변경 부분만", value=True, key="compare_only_changes")
+        context = 3 if only_changes else None
+        
+        if favorite_a.get('id') == favorite_b.get('id'):
+            st.info("서로 다른 즐겨찾기를 선택하세요.")
+            return
+        
+        # 익스팬더 본문은 닫혀 있어도 리런마다 실행되므로, 비교 버튼을 누른 조합만 데이터를 가져와 비교
+        pair = (favorite_a.get('id'), favorite_b.get('id'))
+        if st.button("비교", key="compare_run"):
+            st.session_state["compare_pair"] = pair
+        if st.session_state.get("compare_pair") != pair:
+            st.caption("두 즐겨찾기를 고른 뒤 '비교'를 누르세요.")
+            return
+        
+        with st.spinner("트레이스 데이터를 가져오는 중..."), profile_section("데이터 로드"):
+            observations_a = _favorite_observations(favorite_a.get('id'))
+            observations_b = _favorite_observations(favorite_b.get('id'))
+        if not observations_a or not observations_b:
+            st.warning("관찰 데이터가 없는 트레이스가 있어 비교할 수 없습니다.")
+            return
+        
+        tabs = st.tabs(["시스템 프롬프트", "사용자 질문", "최종 답변"])
+        with tabs[0], profile_section("비교 렌더링"):
+            pairs = pair_system_prompts(find_system_prompts(observations_a), find_system_prompts(observations_b))
+            if not pairs:
+                st.info("시스템 프롬프트를 찾을 수 없습니다.")
+            for node, prompt_a, prompt_b in pairs:
+                same = prompt_a and prompt_b and prompt_a["content_hash"] == prompt_b["content_hash"]
+                st.markdown(f"#### {node}" + (" (동일)" if same else ""))
+                if prompt_a is None or prompt_b is None:
+                    st.caption(f"{'A' if prompt_a is None else 'B'}에는 이 노드의 프롬프트가 없습니다.")
+                if not same:
+                    _display_diff((prompt_a or {}).get("content", ""), (prompt_b or {}).get("content", ""), context)
+        with tabs[1], profile_section("비교 렌더링"):
+            _display_diff(question_text(find_user_question(observations_a)), question_text(find_user_question(observations_b)), context)
+        with tabs[2], profile_section("비교 렌더링"):
+            _display_diff(answer_text(find_final_answer(observations_a)), answer_text(find_final_answer(observations_b)), context)
+
+def filter_favorites_by_prompt_version(all_favorites):
+    """선택한 노드의 시스템 프롬프트 버전을 사용한 즐겨찾기만 남깁니다"""
+    with st.expander("🔖 프롬프트 버전으로 필터", expanded=False):
+        nodes = PROMPT_CATALOG.nodes()
+        if not nodes:
+            st.info("색인된 프롬프트 버전이 없습니다. 트레이스를 조회하면 시스템 프롬프트가 자동으로 색인됩니다.")
+            return all_favorites
+        
+        indexed = sum(1 for favorite in all_favorites if PROMPT_CATALOG.has_trace(favorite.get('id')))
+        st.caption(f"색인된 즐겨찾기: {indexed} / {len(all_favorites)}개 (상세보기로 조회한 트레이스가 색인됩니다)")
+        
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            node = st.selectbox("노드", ["전체"] + nodes, key="prompt_version_node")
+        if node == "전체":
+            return all_favorites
+        
+        versions = PROMPT_CATALOG.versions_for_node(node)
+        labels = {
+            f"{version['hash'][:8]} · {version['trace_count']}개 트레이스 · "
+            f"{str(version['first_seen'])[:10]} ~ {str(version['last_seen'])[:10]}": version
+            for version in versions
+        }
+        with col2:
+            selected = labels[st.selectbox("프롬프트 버전", list(labels), key="prompt_version_label")]
+        with col3:
+            type_filter = st.selectbox("유형", ["전체", "좋은 예제", "나쁜 예제"], key="prompt_version_type")
+        
+        content = selected["content"] if isinstance(selected["content"], str) else str(selected["content"])
+        st.code(content[:2000] + ("..." if len(content) > 2000 else ""), language="")
+        
+        trace_ids = PROMPT_CATALOG.traces_for_version(selected["node"], selected["hash"])
+        type_key = {"좋은 예제": "good", "나쁜 예제": "bad"}.get(type_filter)
+        return [
+            favorite for favorite in all_favorites
+            if favorite.get('id') in trace_ids and (type_key is None or favorite.get('type') == type_key)
+        ]
 
 def load_all_favorites():
-    """모든 즐겨찾기 항목을 불러와 시간순으로 정렬합니다"""
-    all_favorites = []
-    
-    # 랭퓨즈 즐겨찾기 불러오기
-    langfuse_favorites = load_langfuse_favorites()
-    
-    # 좋은 예제 추가
-    for favorite in langfuse_favorites.get('good', []):
-        all_favorites.append({
-            'id': favorite.get('id', ''),
-            'name': favorite.get('name', '무제 트레이스'),
-            'type': 'good',
-            'data': favorite,
-            'timestamp': favorite.get('timestamp') or 0
-        })
+    """모든 즐겨찾기 항목을 최신순으로 불러옵니다 (생성 시각 색인 순서 그대로)"""
+    return load_favorites_index().newest_first()
+
+def load_current_favorites_page(all_favorites, filtered_favorites):
+    """세션의 커서로 현재 페이지를 꺼내 (항목 목록, 페이지 번호, 다음 커서)를 반환합니다"""
+    # 이전 페이지로 돌아갈 수 있도록 페이지별 시작 커서를 쌓아 둠
+    filter_key = tuple(st.session_state.get(key) for key in ("prompt_version_node", "prompt_version_label", "prompt_version_type"))
+    if st.session_state.get('favorite_page_filter') != filter_key or 'favorite_page_cursors' not in st.session_state:
+        st.session_state.favorite_page_filter = filter_key
+        st.session_state.favorite_page_cursors = [None]
     
-    # 나쁜 예제 추가
-    for favorite in langfuse_favorites.get('bad', []):
-        all_favorites.append({
-            'id': favorite.get('id', ''),
-            'name': favorite.get('name', '무제 트레이스'),
-            'type': 'bad',
-            'data': favorite,
-            'timestamp': favorite.get('timestamp') or 0
-        })
+    predicate = None
+    if filtered_favorites is not all_favorites:
+        keys = {(favorite['type'], favorite['id']) for favorite in filtered_favorites}
+        predicate = lambda favorite: (favorite['type'], favorite['id']) in keys
     
-    # 시간순으로 정렬 (최신순)
-    sorted_favorites = sorted(all_favorites, key=lambda x: x.get('timestamp') or 0, reverse=True)
+    cursors = st.session_state.favorite_page_cursors
+    page_favorites, next_cursor = load_favorites_page(after=cursors[-1], limit=FAVORITES_PAGE_SIZE, predicate=predicate)
+    # 삭제 등으로 현재 페이지가 비면 첫 페이지로
+    if not page_favorites and len(cursors) > 1:
+        st.session_state.favorite_page_cursors = cursors = [None]
+        page_favorites, next_cursor = load_favorites_page(limit=FAVORITES_PAGE_SIZE, predicate=predicate)
+    return page_favorites, len(cursors), next_cursor
+
+def display_favorites_pager(page_number, next_cursor):
+    """이전/다음 페이지 버튼을 표시합니다"""
+    if page_number == 1 and next_cursor is None:
+        return
     
-    return sorted_favorites
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("◀ 이전", key="favorites_prev_page", disabled=page_number == 1):
+            st.session_state.favorite_page_cursors.pop()
+            st.rerun()
+    with col2:
+        st.markdown(f"<p style='text-align: center;'>{page_number} 페이지</p>", unsafe_allow_html=True)
+    with col3:
+        if st.button("다음 ▶", key="favorites_next_page", disabled=next_cursor is None):
+            st.session_state.favorite_page_cursors.append(next_cursor)
+            st.rerun()
 
 def load_observations_for_favorite(favorite):
     """즐겨찾기한 랭퓨즈 트레이스의 관찰 데이터를 로드합니다"""
     try:
-        with st.spinner("랭퓨즈에서 트레이스 데이터를 가져오는 중..."):
-            observations = fetch_langfuse_observations(favorite.get('id', ''))
+        with st.spinner("랭퓨즈에서 트레이스 데이터를 가져오는 중..."), profile_section("데이터 로드"):
+            observations = fetch_cached_observations(favorite.get('id', ''))
             st.session_state.favorite_observations[favorite.get('id')] = observations
             
         if not observations:
@@ -140,175 +323,6 @@ def display_favorite_details(favorite):
     """즐겨찾기 항목의 상세 정보를 표시합니다"""
     display_langfuse_details(favorite)
 
-def find_user_question(observations):
-    """사용자의 처음 질문을 찾습니다"""
-    for obs in observations:
-        # LangGraph 형식의 messages 배열 확인
-        if isinstance(obs.get("output"), dict) and "messages" in obs.get("output", {}):
-            messages = obs.get("output", {}).get("messages", [])
-            for msg in messages:
-                if isinstance(msg, dict) and msg.get("type") == "human":
-                    return {
-                        "id": obs.get("id", ""),
-                        "name": obs.get("name", ""),
-                        "input": {"content": msg.get("content", "")}
-                    }
-        
-        # 입력 데이터에서 사용자 질문을 찾습니다
-        if obs.get("input") and isinstance(obs.get("input"), dict):
-            # human_input 키가 있는 경우
-            if "human_input" in obs.get("input"):
-                return obs
-                
-            # messages 배열이 있는 경우
-            if "messages" in obs.get("input"):
-                messages = obs.get("input").get("messages", [])
-                for msg in messages:
-                    if isinstance(msg, dict) and msg.get("type", "").lower() == "human":
-                        return obs
-        
-        # 출력 데이터에서 메시지를 확인합니다
-        if obs.get("output") and isinstance(obs.get("output"), dict):
-            # messages 배열이 있는 경우
-            if "messages" in obs.get("output"):
-                messages = obs.get("output").get("messages", [])
-                for msg in messages:
-                    if isinstance(msg, dict) and msg.get("type", "").lower() == "human":
-                        # 사용자 메시지를 발견하면 해당 관찰 데이터로 가상의 사용자 질문 객체 생성
-                        return {
-                            "id": obs.get("id", ""),
-                            "name": "사용자 메시지",
-                            "input": {"content": msg.get("content", "")}
-                        }
-        
-        # 이름이 "user" 또는 "human"을 포함하는 관찰 데이터를 찾습니다
-        if "user" in str(obs.get("name", "")).lower() or "human" in str(obs.get("name", "")).lower():
-            return obs
-        
-        # 메타데이터에서 사용자 질문 힌트를 찾습니다
-        if obs.get("metadata") and ("user_message" in str(obs.get("metadata")) or "human_message" in str(obs.get("metadata"))):
-            return obs
-            
-        # 입력 또는 출력 데이터에서 content 키가 있고 type이 "human"인 경우
-        for data_key in ["input", "output"]:
-            data = obs.get(data_key, {})
-            if isinstance(data, dict):
-                if "content" in data and "type" in data and data.get("type", "").lower() == "human":
-                    return obs
-    
-    return None
-
-def find_final_answer(observations):
-    """최종 답변을 찾습니다"""
-    # 시간순으로 정렬 (가장 마지막 응답을 찾기 위해)
-    # None값이 있는 경우 빈 문자열로 대체하여 정렬 오류 방지
-    sorted_obs = sorted(observations, key=lambda x: x.get("endTime") or "", reverse=True)
-    
-    for obs in sorted_obs:
-        # 출력 데이터에서 메시지 배열이 있는지 확인 (LangGraph 형식)
-        if isinstance(obs.get("output"), dict) and "messages" in obs.get("output", {}):
-            messages = obs.get("output", {}).get("messages", [])
-            if messages:
-                # 마지막 메시지를 찾아서 최종 답변으로 사용
-                last_message = messages[-1]
-                if isinstance(last_message, dict) and "content" in last_message:
-                    # 가상의 최종 답변 객체 생성
-                    return {
-                        "id": obs.get("id", ""),
-                        "name": obs.get("name", "") or "최종 답변",
-                        "output": {"content": last_message.get("content", "")}
-                    }
-                    
-        # 출력 데이터가 있는 관찰 중 응답 또는 답변으로 보이는 것을 찾습니다
-        if obs.get("output") and isinstance(obs.get("output"), dict):
-            return obs
-            
-        # 이름에 "response", "answer", "output" 등이 포함된 관찰을 찾습니다
-        if any(key in str(obs.get("name", "")).lower() for key in ["response", "answer", "output", "assistant"]):
-            return obs
-    
-    return None
-
-def find_system_prompts(observations):
-    """ChatVertexAI의 시스템 프롬프트를 찾습니다"""
-    system_prompts = []
-    unique_contents = set()  # 중복 제거를 위한 세트
-    
-    for obs in observations:
-        # ChatVertexAI 생성 관찰 데이터 확인 (GENERATION 타입)
-        if obs.get("type") == "GENERATION" and obs.get("name") == "ChatVertexAI":
-            # 입력 메시지 배열에서 시스템 프롬프트 검색
-            input_messages = obs.get("input", [])
-            
-            for msg in input_messages:
-                if isinstance(msg, dict) and msg.get("role") == "system":
-                    content = msg.get("content")
-                    if content and str(content) not in unique_contents:
-                        unique_contents.add(str(content))
-                        system_prompts.append({
-                            "id": obs.get("id", ""),
-                            "name": f"{obs.get('name', '')} - {obs.get('metadata', {}).get('langgraph_node', '알 수 없음')}",
-                            "content": content,
-                            "original_obs": obs
-                        })
-        
-        # 기존 검색 로직 유지 (메타데이터나 입력에서 시스템 프롬프트 검색)        
-        metadata = obs.get("metadata", {})
-        input_data = obs.get("input", {})
-        
-        is_system_prompt = False
-        content = None
-        
-        # 이름에 "system", "prompt", "chatvertexai" 등이 포함된 경우
-        if any(key in str(obs.get("name", "")).lower() for key in ["system", "prompt", "chatvertexai", "vertex"]):
-            is_system_prompt = True
-        
-        # 메타데이터에 시스템 프롬프트 관련 키워드가 있는 경우
-        if isinstance(metadata, dict) and any(key in str(metadata).lower() for key in ["system_prompt", "system_message", "instructions"]):
-            is_system_prompt = True
-            # 메타데이터에서 프롬프트 내용 추출
-            for key in ["system_prompt", "system_message", "system_content", "instructions"]:
-                if key in metadata:
-                    content = metadata[key]
-                    break
-        
-        # 입력이 리스트인 경우 (LangGraph 형식) - 메시지 배열 확인
-        if isinstance(input_data, list):
-            for item in input_data:
-                if isinstance(item, dict):
-                    # role이 system인 메시지 찾기
-                    if item.get("role") == "system" or item.get("type") == "system":
-                        content = item.get("content")
-                        is_system_prompt = True
-                        break
-                    # content 필드와 type이 system인 메시지 찾기
-                    elif "content" in item and item.get("type") == "system":
-                        content = item.get("content")
-                        is_system_prompt = True
-                        break
-            
-        # 입력 데이터에 시스템 프롬프트 관련 키워드가 있는 경우
-        if isinstance(input_data, dict) and any(key in str(input_data).lower() for key in ["system_prompt", "system_message", "instructions"]):
-            is_system_prompt = True
-            # 입력 데이터에서 프롬프트 내용 추출
-            for key in ["system_prompt", "system_message", "system_content", "instructions"]:
-                if key in input_data:
-                    content = input_data[key]
-                    break
-                    
-        if is_system_prompt:
-            # 중복 검사 - 같은 내용의 프롬프트는 추가하지 않음
-            if content and str(content) not in unique_contents:
-                unique_contents.add(str(content))
-                system_prompts.append({
-                    "id": obs.get("id", ""),
-                    "name": obs.get("name", ""),
-                    "content": content,
-                    "original_obs": obs
-                })
-    
-    return system_prompts
-
 def display_langfuse_details(favorite):
     """랭퓨즈 트레이스 상세 정보를 표시합니다"""
     st.markdown(f"### {favorite.get('name', '무제 트레이스')}")
@@ -319,22 +333,26 @@ def display_langfuse_details(favorite):
     
     # 현재 관찰 데이터 가져오기
     observations = st.session_state.favorite_observations.get(favorite.get('id'), [])
+    record_cache_lookup("favorite_observations", bool(observations))
     
     if not observations:
-        with st.spinner("랭퓨즈에서 트레이스 데이터를 가져오는 중..."):
-            observations = fetch_langfuse_observations(favorite.get('id', ''))
+        with st.spinner("랭퓨즈에서 트레이스 데이터를 가져오는 중..."), profile_section("데이터 로드"):
+            observations = fetch_cached_observations(favorite.get('id', ''))
             st.session_state.favorite_observations[favorite.get('id')] = observations
     
     if observations:
         # 사용자 질문, 최종 답변, 시스템 프롬프트 추출
-        user_question = find_user_question(observations)
-        final_answer = find_final_answer(observations)
-        system_prompts = find_system_prompts(observations)
+        with profile_section("추출"):
+            user_question = find_user_question(observations)
+            final_answer = find_final_answer(observations)
+            system_prompts = find_system_prompts(observations)
+        # 추출하며 디코딩된 입력/출력까지 세션 캐시 용량에 반영
+        st.session_state.favorite_observations.resize(favorite.get('id'))
         
         # 주요 데이터 표시
         tabs = st.tabs(["사용자 질문", "최종 답변", "시스템 프롬프트"])
         
-        with tabs[0]:  # 사용자 질문 탭
+        with tabs[0], profile_section("상세 렌더링"):  # 사용자 질문 탭
             if user_question:
                 # 입력 데이터에서 사용자 질문 찾기
                 input_data = user_question.get("input", {})
@@ -362,7 +380,7 @@ def display_langfuse_details(favorite):
             else:
                 st.info("사용자 질문을 찾을 수 없습니다.")
         
-        with tabs[1]:  # 최종 답변 탭
+        with tabs[1], profile_section("상세 렌더링"):  # 최종 답변 탭
             if final_answer:
                 # 출력 데이터에서 최종 답변 찾기
                 output_data = final_answer.get("output", {})
@@ -407,7 +425,7 @@ def display_langfuse_details(favorite):
             else:
                 st.info("최종 답변을 찾을 수 없습니다.")
         
-        with tabs[2]:  # 시스템 프롬프트 탭
+        with tabs[2], profile_section("상세 렌더링"):  # 시스템 프롬프트 탭
             if system_prompts:
                 st.markdown("### 시스템 프롬프트")
                 for idx, prompt in enumerate(system_prompts):
@@ -422,11 +440,19 @@ def display_langfuse_details(favorite):
                     
             else:
                 st.info("시스템 프롬프트를 찾을 수 없습니다.")
+        
+        # 이 즐겨찾기와 비슷한 다른 예제 (아직 색인되지 않았으면 지금 색인)
+        favorite_key = ("favorite", favorite.get('id'))
+        if favorite_key not in SIMILARITY_INDEX:
+            index_favorite(favorite.get('id'), favorite.get('type'), favorite.get('name'), observations)
+        st.markdown("#### 🔎 비슷한 예제")
+        display_similar_examples(favorite_text(observations), exclude=favorite_key)
     else:
         st.warning("이 트레이스에는 관찰 데이터가 없습니다. 삭제되었거나 접근할 수 없는 트레이스일 수 있습니다.")
     
     # 즐겨찾기 해제 버튼
     if st.button("즐겨찾기 해제", key=f"unfav_{favorite.get('id')}"):
         remove_from_langfuse_favorites(favorite.get('id'), favorite.get('type'))
+        remove_favorite(favorite.get('id'))
         st.success("즐겨찾기에서 해제되었습니다!")
         st.rerun() 
\ No newline at end of file
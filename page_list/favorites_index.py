@@ -0,0 +1,113 @@
+"""
+즐겨찾기 시간 색인 모듈 - 즐겨찾기를 생성 시각 순으로 유지하고 커서 기반으로 최신순 페이지를 꺼내는 기능
+"""
+
+import time
+import threading
+from bisect import bisect_left, insort
+
+def favorite_entry(type_key, item):
+    """즐겨찾기 파일의 항목을 목록 표시용 항목으로 변환합니다"""
+    return {
+        'id': item.get('id', ''),
+        'name': item.get('name', '무제 트레이스'),
+        'type': type_key,
+        'data': item,
+        # 생성 시각이 없는 예전 항목은 당시 파일 수정 시각(timestamp)으로 대신함
+        'created_at': item.get('created_at') or item.get('timestamp') or 0
+    }
+
+def next_created_at(latest):
+    """가장 최근 생성 시각보다 항상 큰 현재 시각 (시계가 뒤로 가도 순서가 유지되도록)"""
+    return round(max(time.time(), (latest or 0) + 1e-6), 6)
+
+class FavoriteTimeIndex:
+    """(생성 시각, 유형, ID) 키를 오름차순으로 유지하는 정렬 색인
+
+    추가/삭제는 이분 탐색으로 제자리에 반영하므로 렌더링마다 전체를 정렬하지 않습니다.
+    커서는 마지막으로 받은 항목의 키이며, 다음 페이지는 그보다 오래된 항목부터 시작합니다.
+    프로세스 전체에서 공유되어 다른 세션이 추가/삭제하는 동안에도 읽으므로 읽기와 쓰기 모두 잠금 안에서 처리합니다.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._entries = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls, favorites):
+        """{유형: [항목]} 형식의 즐겨찾기 데이터로 색인을 만듭니다"""
+        index = cls()
+        for type_key, items in favorites.items():
+            for item in items:
+                entry = favorite_entry(type_key, item)
+                index._entries[(type_key, entry['id'])] = entry
+        index._keys = sorted((entry['created_at'], type_key, favorite_id) for (type_key, favorite_id), entry in index._entries.items())
+        return index
+
+    @staticmethod
+    def cursor_of(entry):
+        return (entry['created_at'], entry['type'], entry['id'])
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+    def __contains__(self, key):
+        """(유형, ID) 키가 색인에 있는지 확인합니다"""
+        with self._lock:
+            return key in self._entries
+
+    def get(self, type_key, favorite_id):
+        with self._lock:
+            return self._entries.get((type_key, favorite_id))
+
+    def latest_created_at(self):
+        with self._lock:
+            return self._keys[-1][0] if self._keys else None
+
+    def insert(self, type_key, item):
+        """항목을 추가합니다 (같은 유형/ID가 있으면 교체)"""
+        with self._lock:
+            self.remove(type_key, item.get('id', ''))
+            entry = favorite_entry(type_key, item)
+            self._entries[(type_key, entry['id'])] = entry
+            insort(self._keys, self.cursor_of(entry))
+
+    def remove(self, type_key, favorite_id):
+        with self._lock:
+            entry = self._entries.pop((type_key, favorite_id), None)
+            if entry is None:
+                return False
+            key = self.cursor_of(entry)
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+            return True
+
+    def newest_first(self):
+        """모든 항목을 최신순으로 반환합니다"""
+        with self._lock:
+            return [self._entries[(type_key, favorite_id)] for _, type_key, favorite_id in reversed(self._keys)]
+
+    def page(self, after=None, limit=20, predicate=None):
+        """커서 이후(더 오래된) 항목을 최신순으로 최대 limit개 반환합니다
+
+        반환값은 (항목 목록, 다음 커서)이며 더 가져올 항목이 없으면 다음 커서는 None입니다.
+        """
+        # 다음 페이지가 있는지 알기 위해 하나 더 찾음
+        entries = []
+        with self._lock:
+            end = bisect_left(self._keys, after) if after is not None else len(self._keys)
+            for position in range(end - 1, -1, -1):
+                _, type_key, favorite_id = self._keys[position]
+                entry = self._entries[(type_key, favorite_id)]
+                if predicate is None or predicate(entry):
+                    entries.append(entry)
+                    if len(entries) > limit:
+                        break
+
+        if len(entries) > limit:
+            entries = entries[:limit]
+            return entries, self.cursor_of(entries[-1])
+        return entries, None
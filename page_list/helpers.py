@@ -18,7 +18,9 @@ SIDEBAR_WIDTH = int(os.getenv("SIDEBAR_WIDTH", "290"))
 
 # 데이터 관련 상수
 DATA_DIR = os.getenv("DATA_DIRECTORY", "data")
+# 예전 JSON 형식의 프롬프트 파일은 처음 실행할 때 PROMPTS_DB_FILE(SQLite)로 옮겨짐
 PROMPTS_FILE = os.getenv("PROMPTS_FILENAME", "prompts.json")
+PROMPTS_DB_FILE = os.getenv("PROMPTS_DB_FILENAME", "prompts.db")
 
 # 카테고리 및 모델 관련 상수
 CATEGORIES = os.getenv("CATEGORIES", "일반,비즈니스,교육,창작,기술,마케팅,기타").split(",")
@@ -28,4 +30,48 @@ MODELS = os.getenv("MODELS", "모든 모델,GPT-3.5,GPT-4,Claude,Gemini,DALL-E,M
 LANGFUSE_HOST = os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
 LANGFUSE_PROJECT = os.getenv("LANGFUSE_PROJECT", "")
 LANGFUSE_PUBLIC_KEY = os.getenv("LANGFUSE_PUBLIC_KEY", "")
-LANGFUSE_SECRET_KEY = os.getenv("LANGFUSE_SECRET_KEY", "") 
\ No newline at end of file
+LANGFUSE_SECRET_KEY = os.getenv("LANGFUSE_SECRET_KEY", "") 
+
+# 여러 랭퓨즈 프로젝트 (쉼표로 구분한 이름, 프로젝트별 값은 LANGFUSE_<이름>_HOST 등으로 지정하고 없으면 위 값을 사용)
+LANGFUSE_PROJECTS = os.getenv("LANGFUSE_PROJECTS", "")
+
+LANGFUSE_TIMEOUT = float(os.getenv("LANGFUSE_TIMEOUT", "30"))
+LANGFUSE_MAX_RETRIES = int(os.getenv("LANGFUSE_MAX_RETRIES", "2"))
+LANGFUSE_MAX_WORKERS = int(os.getenv("LANGFUSE_MAX_WORKERS", "8"))
+LANGFUSE_PAGE_SIZE = int(os.getenv("LANGFUSE_PAGE_SIZE", "50"))
+
+# 랭퓨즈 응답 카세트 (off: 사용 안 함, record: 실제 응답을 기록, replay: 기록된 응답만 사용하고 네트워크 요청 없음)
+LANGFUSE_CASSETTE_MODE = os.getenv("LANGFUSE_CASSETTE_MODE", "off").lower()
+LANGFUSE_CASSETTE_DIR = os.getenv("LANGFUSE_CASSETTE_DIR", os.path.join(DATA_DIR, "cassettes"))
+
+# 트레이스 등록 페이지의 일괄 조회 설정 (한 번에 붙여넣을 수 있는 최대 ID 수, 동시 요청 수)
+BATCH_LOOKUP_MAX_IDS = int(os.getenv("BATCH_LOOKUP_MAX_IDS", "100"))
+BATCH_LOOKUP_MAX_WORKERS = int(os.getenv("BATCH_LOOKUP_MAX_WORKERS", "16"))
+
+# 관찰 데이터 공유 캐시 설정 (서버 프로세스 전체에서 공유)
+OBSERVATION_CACHE_TTL = int(os.getenv("OBSERVATION_CACHE_TTL", "600"))
+OBSERVATION_CACHE_MAX_ENTRIES = int(os.getenv("OBSERVATION_CACHE_MAX_ENTRIES", "2000"))
+TRACE_LIST_CACHE_TTL = int(os.getenv("TRACE_LIST_CACHE_TTL", "60"))
+
+# 캐시 예열 워커 설정 (서버 프로세스당 하나의 백그라운드 스레드, 주기는 OBSERVATION_CACHE_TTL의 절반 미만이어야 함)
+CACHE_WARMER_ENABLED = os.getenv("CACHE_WARMER_ENABLED", "false").lower() in ("1", "true", "yes")
+CACHE_WARMER_INTERVAL = int(os.getenv("CACHE_WARMER_INTERVAL", "240"))
+CACHE_WARMER_DAYS = int(os.getenv("CACHE_WARMER_DAYS", "7"))
+CACHE_WARMER_LIMIT = int(os.getenv("CACHE_WARMER_LIMIT", "100"))
+
+# 즐겨찾기 목록 페이지당 항목 수
+FAVORITES_PAGE_SIZE = int(os.getenv("FAVORITES_PAGE_SIZE", "20"))
+
+# 세션별 관찰 데이터 캐시 용량 (MB, 캐시마다 적용되며 초과 시 오래 사용하지 않은 트레이스부터 제거)
+SESSION_CACHE_MAX_BYTES = int(float(os.getenv("SESSION_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+# 메트릭 노출 설정 (포트가 0이면 HTTP 노출 비활성화, 파일 경로가 비어 있으면 파일 기록 비활성화)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+
+# 로컬 JSON API 설정 (포트가 0이면 비활성화, 페이지당 기본 항목 수)
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "0"))
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
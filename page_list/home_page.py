@@ -1,182 +1,23 @@
+import re
+import time
 import streamlit as st
+import pandas as pd
 from datetime import datetime
-from .langfuse_utils import fetch_langfuse_observations
-from .data_utils import add_to_langfuse_favorites
-
-def find_user_question(observations):
-    """사용자의 처음 질문을 찾습니다"""
-    for obs in observations:
-        # LangGraph 형식의 messages 배열 확인
-        if isinstance(obs.get("output"), dict) and "messages" in obs.get("output", {}):
-            messages = obs.get("output", {}).get("messages", [])
-            for msg in messages:
-                if isinstance(msg, dict) and msg.get("type") == "human":
-                    return {
-                        "id": obs.get("id", ""),
-                        "name": obs.get("name", ""),
-                        "input": {"content": msg.get("content", "")}
-                    }
-        
-        # 입력 데이터에서 사용자 질문을 찾습니다
-        if obs.get("input") and isinstance(obs.get("input"), dict):
-            # human_input 키가 있는 경우
-            if "human_input" in obs.get("input"):
-                return obs
-                
-            # messages 배열이 있는 경우
-            if "messages" in obs.get("input"):
-                messages = obs.get("input").get("messages", [])
-                for msg in messages:
-                    if isinstance(msg, dict) and msg.get("type", "").lower() == "human":
-                        return obs
-        
-        # 출력 데이터에서 메시지를 확인합니다
-        if obs.get("output") and isinstance(obs.get("output"), dict):
-            # messages 배열이 있는 경우
-            if "messages" in obs.get("output"):
-                messages = obs.get("output").get("messages", [])
-                for msg in messages:
-                    if isinstance(msg, dict) and msg.get("type", "").lower() == "human":
-                        # 사용자 메시지를 발견하면 해당 관찰 데이터로 가상의 사용자 질문 객체 생성
-                        return {
-                            "id": obs.get("id", ""),
-                            "name": "사용자 메시지",
-                            "input": {"content": msg.get("content", "")}
-                        }
-        
-        # 이름이 "user" 또는 "human"을 포함하는 관찰 데이터를 찾습니다
-        if "user" in str(obs.get("name", "")).lower() or "human" in str(obs.get("name", "")).lower():
-            return obs
-        
-        # 메타데이터에서 사용자 질문 힌트를 찾습니다
-        if obs.get("metadata") and ("user_message" in str(obs.get("metadata")) or "human_message" in str(obs.get("metadata"))):
-            return obs
-            
-        # 입력 또는 출력 데이터에서 content 키가 있고 type이 "human"인 경우
-        for data_key in ["input", "output"]:
-            data = obs.get(data_key, {})
-            if isinstance(data, dict):
-                if "content" in data and "type" in data and data.get("type", "").lower() == "human":
-                    return obs
-    
-    return None
-
-def find_final_answer(observations):
-    """최종 답변을 찾습니다"""
-    # 시간순으로 정렬 (가장 마지막 응답을 찾기 위해)
-    # None값이 있는 경우 빈 문자열로 대체하여 정렬 오류 방지
-    sorted_obs = sorted(observations, key=lambda x: x.get("endTime") or "", reverse=True)
-    
-    for obs in sorted_obs:
-        # 출력 데이터에서 메시지 배열이 있는지 확인 (LangGraph 형식)
-        if isinstance(obs.get("output"), dict) and "messages" in obs.get("output", {}):
-            messages = obs.get("output", {}).get("messages", [])
-            if messages:
-                # 마지막 메시지를 찾아서 최종 답변으로 사용
-                last_message = messages[-1]
-                if isinstance(last_message, dict) and "content" in last_message:
-                    # 가상의 최종 답변 객체 생성
-                    return {
-                        "id": obs.get("id", ""),
-                        "name": obs.get("name", "") or "최종 답변",
-                        "output": {"content": last_message.get("content", "")}
-                    }
-                    
-        # 출력 데이터가 있는 관찰 중 응답 또는 답변으로 보이는 것을 찾습니다
-        if obs.get("output") and isinstance(obs.get("output"), dict):
-            return obs
-            
-        # 이름에 "response", "answer", "output" 등이 포함된 관찰을 찾습니다
-        if any(key in str(obs.get("name", "")).lower() for key in ["response", "answer", "output", "assistant"]):
-            return obs
-    
-    return None
-
-def find_system_prompts(observations):
-    """ChatVertexAI의 시스템 프롬프트를 찾습니다"""
-    system_prompts = []
-    unique_contents = set()  # 중복 제거를 위한 세트
-    
-    for obs in observations:
-        # ChatVertexAI 생성 관찰 데이터 확인 (GENERATION 타입)
-        if obs.get("type") == "GENERATION" and obs.get("name") == "ChatVertexAI":
-            # 입력 메시지 배열에서 시스템 프롬프트 검색
-            input_messages = obs.get("input", [])
-            
-            for msg in input_messages:
-                if isinstance(msg, dict) and msg.get("role") == "system":
-                    content = msg.get("content")
-                    if content and str(content) not in unique_contents:
-                        unique_contents.add(str(content))
-                        system_prompts.append({
-                            "id": obs.get("id", ""),
-                            "name": f"{obs.get('name', '')} - {obs.get('metadata', {}).get('langgraph_node', '알 수 없음')}",
-                            "content": content,
-                            "original_obs": obs
-                        })
-        
-        # 기존 검색 로직 유지 (메타데이터나 입력에서 시스템 프롬프트 검색)        
-        metadata = obs.get("metadata", {})
-        input_data = obs.get("input", {})
-        
-        is_system_prompt = False
-        content = None
-        
-        # 이름에 "system", "prompt", "chatvertexai" 등이 포함된 경우
-        if any(key in str(obs.get("name", "")).lower() for key in ["system", "prompt", "chatvertexai", "vertex"]):
-            is_system_prompt = True
-        
-        # 메타데이터에 시스템 프롬프트 관련 키워드가 있는 경우
-        if isinstance(metadata, dict) and any(key in str(metadata).lower() for key in ["system_prompt", "system_message", "instructions"]):
-            is_system_prompt = True
-            # 메타데이터에서 프롬프트 내용 추출
-            for key in ["system_prompt", "system_message", "system_content", "instructions"]:
-                if key in metadata:
-                    content = metadata[key]
-                    break
-        
-        # 입력이 리스트인 경우 (LangGraph 형식) - 메시지 배열 확인
-        if isinstance(input_data, list):
-            for item in input_data:
-                if isinstance(item, dict):
-                    # role이 system인 메시지 찾기
-                    if item.get("role") == "system" or item.get("type") == "system":
-                        content = item.get("content")
-                        is_system_prompt = True
-                        break
-                    # content 필드와 type이 system인 메시지 찾기
-                    elif "content" in item and item.get("type") == "system":
-                        content = item.get("content")
-                        is_system_prompt = True
-                        break
-            
-        # 입력 데이터에 시스템 프롬프트 관련 키워드가 있는 경우
-        if isinstance(input_data, dict) and any(key in str(input_data).lower() for key in ["system_prompt", "system_message", "instructions"]):
-            is_system_prompt = True
-            # 입력 데이터에서 프롬프트 내용 추출
-            for key in ["system_prompt", "system_message", "system_content", "instructions"]:
-                if key in input_data:
-                    content = input_data[key]
-                    break
-                    
-        if is_system_prompt:
-            # 중복 검사 - 같은 내용의 프롬프트는 추가하지 않음
-            if content and str(content) not in unique_contents:
-                unique_contents.add(str(content))
-                system_prompts.append({
-                    "id": obs.get("id", ""),
-                    "name": obs.get("name", ""),
-                    "content": content,
-                    "original_obs": obs
-                })
-    
-    return system_prompts
+from .langfuse_utils import fetch_cached_observations, fetch_observations_batch
+from .extraction import find_user_question, find_final_answer, find_system_prompts, question_text, answer_text
+from .data_utils import add_to_langfuse_favorites, add_many_to_langfuse_favorites, load_favorites_index
+from .metrics import record_cache_lookup
+from .cache import ByteBudgetCache
+from .helpers import SESSION_CACHE_MAX_BYTES, BATCH_LOOKUP_MAX_IDS, BATCH_LOOKUP_MAX_WORKERS
+from .similarity_index import favorite_text, index_favorite, index_favorites
+from .similar_examples import display_similar_examples
 
 def display_trace_data(trace_id):
     """트레이스 데이터를 가져와서 표시합니다"""
     # 초기화
-    if 'trace_observations' not in st.session_state:
-        st.session_state.trace_observations = {}
+    # 관찰 데이터는 세션별 용량 예산 안에서만 보관
+    if not isinstance(st.session_state.get('trace_observations'), ByteBudgetCache):
+        st.session_state.trace_observations = ByteBudgetCache("trace_observations", SESSION_CACHE_MAX_BYTES)
     
     if 'favorite_success' not in st.session_state:
         st.session_state.favorite_success = None
@@ -197,8 +38,10 @@ def display_trace_data(trace_id):
     # 관찰 데이터 가져오기
     try:
         with st.spinner("랭퓨즈에서 트레이스 데이터를 가져오는 중..."):
-            if trace_id not in st.session_state.trace_observations:
-                observations = fetch_langfuse_observations(trace_id)
+            cache_hit = trace_id in st.session_state.trace_observations
+            record_cache_lookup("trace_observations", cache_hit)
+            if not cache_hit:
+                observations = fetch_cached_observations(trace_id)
                 st.session_state.trace_observations[trace_id] = observations
             else:
                 observations = st.session_state.trace_observations[trace_id]
@@ -211,6 +54,8 @@ def display_trace_data(trace_id):
         user_question = find_user_question(observations)
         final_answer = find_final_answer(observations)
         system_prompts = find_system_prompts(observations)
+        # 추출하며 디코딩된 입력/출력까지 세션 캐시 용량에 반영
+        st.session_state.trace_observations.resize(trace_id)
         
         # 데이터 표시
         st.success(f"트레이스 ID: {trace_id}")
@@ -306,6 +151,10 @@ def display_trace_data(trace_id):
             else:
                 st.info("시스템 프롬프트를 찾을 수 없습니다.")
         
+        # 질문/답변이 비슷한 과거 즐겨찾기와 프롬프트
+        with st.expander("🔎 비슷한 과거 예제", expanded=False):
+            display_similar_examples(favorite_text(observations), exclude=("favorite", trace_id))
+        
         # 즐겨찾기 등록 버튼
         st.markdown("### 즐겨찾기 등록")
         col1, col2 = st.columns(2)
@@ -347,6 +196,9 @@ def display_trace_data(trace_id):
                         )
                         
                         if success:
+                            # 유사 예제 검색 색인에 추가
+                            index_favorite(trace_id, st.session_state.add_favorite_type, trace_name, observations)
+                            
                             # 성공 메시지 상태 저장 (페이지 리로드 후에도 표시)
                             st.session_state.favorite_success = {
                                 "type": "success",
@@ -387,8 +239,9 @@ def home_page():
     if 'trace_id' not in st.session_state:
         st.session_state.trace_id = ""
     
-    if 'trace_observations' not in st.session_state:
-        st.session_state.trace_observations = {}
+    # 관찰 데이터는 세션별 용량 예산 안에서만 보관
+    if not isinstance(st.session_state.get('trace_observations'), ByteBudgetCache):
+        st.session_state.trace_observations = ByteBudgetCache("trace_observations", SESSION_CACHE_MAX_BYTES)
     
     if 'show_note_input' not in st.session_state:
         st.session_state.show_note_input = False
@@ -433,6 +286,10 @@ def home_page():
         # 저장된 트레이스 ID로 데이터 표시
         display_trace_data(st.session_state.trace_id)
     
+    # 여러 트레이스 ID를 붙여넣어 한 번에 조회/등록
+    st.markdown("---")
+    display_batch_lookup()
+    
     # 등록된 최근 즐겨찾기 표시 (나중에 필요하면 구현)
     st.markdown("---")
     st.markdown("### 🔍 트레이스 검색 및 등록 방법")
@@ -441,4 +298,132 @@ def home_page():
     2. 위 입력창에 ID를 붙여넣고 검색 버튼을 클릭합니다.
     3. 검색된 트레이스 데이터를 확인하고 좋은 예제 또는 나쁜 예제로 등록합니다.
     4. 등록된 트레이스는 '즐겨찾기' 페이지에서 확인할 수 있습니다.
-    """) 
\ No newline at end of file
+    """) 
+
+# 붙여넣은 텍스트에서 트레이스 ID 구분 (공백, 줄바꿈, 쉼표, 따옴표)
+_TRACE_ID_SEPARATOR_RE = re.compile(r"[\s,;'\"`]+")
+
+def parse_trace_ids(text):
+    """붙여넣은 텍스트에서 트레이스 ID 목록을 순서대로 중복 없이 꺼냅니다"""
+    return list(dict.fromkeys(token for token in _TRACE_ID_SEPARATOR_RE.split(text or "") if token))
+
+def _favorite_name(observations):
+    """질문 앞부분으로 즐겨찾기 이름을 만듭니다"""
+    content = question_text(find_user_question(observations)).strip()
+    if not content:
+        return "트레이스"
+    return content[:30] + "..." if len(content) > 30 else content
+
+def _shorten(text, length=80):
+    text = " ".join(str(text).split())
+    return text[:length] + "..." if len(text) > length else text
+
+def display_batch_lookup():
+    """여러 트레이스를 동시에 조회해 질문/답변/즐겨찾기 상태를 표로 보여 주고 한 번에 등록합니다"""
+    st.markdown("### 📑 여러 트레이스 한 번에 조회")
+    
+    text = st.text_area(
+        "트레이스 ID 목록",
+        placeholder="트레이스 ID를 줄바꿈, 공백 또는 쉼표로 구분해 붙여넣으세요",
+        key="batch_trace_ids"
+    )
+    trace_ids = parse_trace_ids(text)
+    if len(trace_ids) > BATCH_LOOKUP_MAX_IDS:
+        st.warning(f"한 번에 최대 {BATCH_LOOKUP_MAX_IDS}개까지 조회합니다. 앞의 {BATCH_LOOKUP_MAX_IDS}개만 조회합니다.")
+        trace_ids = trace_ids[:BATCH_LOOKUP_MAX_IDS]
+    
+    if st.button(f"일괄 조회 ({len(trace_ids)}개)", key="batch_lookup_button", disabled=not trace_ids):
+        progress = st.progress(0.0, text="트레이스를 가져오는 중...")
+        
+        def on_progress(done, total):
+            progress.progress(done / total, text=f"트레이스를 가져오는 중... ({done}/{total})")
+        
+        # 제한된 크기의 스레드 풀로 동시에 가져오므로 전체 시간은 가장 느린 요청에 가까움
+        start = time.perf_counter()
+        observations_by_trace = fetch_observations_batch(trace_ids, max_workers=BATCH_LOOKUP_MAX_WORKERS, on_progress=on_progress)
+        elapsed = time.perf_counter() - start
+        progress.empty()
+        
+        # 단건 조회에서도 다시 가져오지 않도록 세션 캐시에 보관
+        for trace_id, observations in observations_by_trace.items():
+            if observations:
+                st.session_state.trace_observations[trace_id] = observations
+        st.session_state.batch_lookup = {
+            "trace_ids": trace_ids,
+            "rows": {
+                trace_id: {
+                    "question": question_text(find_user_question(observations)) if observations else "",
+                    "answer": answer_text(find_final_answer(observations)) if observations else "",
+                    "name": _favorite_name(observations) if observations else "",
+                    "observation_count": len(observations or [])
+                }
+                for trace_id, observations in observations_by_trace.items()
+            },
+            "elapsed": elapsed
+        }
+    
+    batch = st.session_state.get("batch_lookup")
+    if not batch:
+        return
+    
+    # 즐겨찾기 상태는 매번 시간 색인에서 확인 (등록 직후에도 바로 반영)
+    favorites_index = load_favorites_index()
+    
+    def favorite_status(trace_id):
+        labels = []
+        if ("good", trace_id) in favorites_index:
+            labels.append("✅ 좋은 예제")
+        if ("bad", trace_id) in favorites_index:
+            labels.append("❌ 나쁜 예제")
+        return ", ".join(labels)
+    
+    if st.session_state.get("batch_register_message"):
+        st.success(st.session_state.pop("batch_register_message"))
+    
+    rows = batch["rows"]
+    found = [trace_id for trace_id in batch["trace_ids"] if rows.get(trace_id, {}).get("observation_count")]
+    st.caption(f"{len(found)} / {len(batch['trace_ids'])}개 트레이스를 찾았습니다. (전체 {batch['elapsed']:.2f}초)")
+    st.dataframe(pd.DataFrame([
+        {
+            "트레이스 ID": trace_id,
+            "질문": _shorten(rows.get(trace_id, {}).get("question", "")),
+            "답변": _shorten(rows.get(trace_id, {}).get("answer", "")),
+            "관찰 수": rows.get(trace_id, {}).get("observation_count", 0),
+            "즐겨찾기": favorite_status(trace_id) if trace_id in found else "찾을 수 없음"
+        }
+        for trace_id in batch["trace_ids"]
+    ]), hide_index=True, use_container_width=True)
+    
+    if not found:
+        return
+    
+    # 아직 즐겨찾기에 없는 트레이스를 기본으로 선택
+    selected = st.multiselect(
+        "등록할 트레이스",
+        options=found,
+        default=[trace_id for trace_id in found if not favorite_status(trace_id)],
+        key="batch_register_ids"
+    )
+    note = st.text_input("메모 (선택사항)", key="batch_register_note")
+    
+    col1, col2 = st.columns(2)
+    type_key = None
+    with col1:
+        if st.button(f"✅ 선택한 {len(selected)}개를 좋은 예제로 등록", key="batch_register_good", disabled=not selected):
+            type_key = "good"
+    with col2:
+        if st.button(f"❌ 선택한 {len(selected)}개를 나쁜 예제로 등록", key="batch_register_bad", disabled=not selected):
+            type_key = "bad"
+    
+    if type_key:
+        add_many_to_langfuse_favorites([(trace_id, rows[trace_id]["name"]) for trace_id in selected], type_key, note)
+        # 유사 예제 검색 색인에도 한 번에 추가 (세션 캐시에서 밀려난 트레이스는 공유 캐시에서 가져옴)
+        index_favorites([
+            (trace_id, type_key, rows[trace_id]["name"],
+             st.session_state.trace_observations.get(trace_id) or fetch_cached_observations(trace_id))
+            for trace_id in selected
+        ])
+        st.session_state.pop("batch_register_ids", None)
+        # 리런 후에도 보이도록 세션에 저장
+        st.session_state.batch_register_message = f"{len(selected)}개 트레이스를 {'좋은' if type_key == 'good' else '나쁜'} 예제로 즐겨찾기에 등록했습니다."
+        st.rerun()
@@ -0,0 +1,85 @@
+"""
+요청 계측 모듈 - 랭퓨즈 요청과 추출 단계의 소요 시간을 리런 단위로 기록하는 기능
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# 현재 리런의 계측 기록 (스레드 풀에서도 copy_context로 전파 가능)
+_current_trace = ContextVar("rerun_trace", default=None)
+
+class RerunTrace:
+    """한 번의 스크립트 리런 동안 발생한 요청과 단계 기록"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.requests = []
+        self.steps = []
+        self._lock = threading.Lock()
+
+    def add_request(self, record):
+        with self._lock:
+            self.requests.append(record)
+
+    def add_step(self, record):
+        with self._lock:
+            self.steps.append(record)
+
+def begin_rerun():
+    """새 리런의 계측 기록을 시작합니다"""
+    trace = RerunTrace()
+    _current_trace.set(trace)
+    return trace
+
+def current_rerun():
+    """현재 리런의 계측 기록을 반환합니다 (없으면 None)"""
+    return _current_trace.get()
+
+def record_request(endpoint, url, status, latency_ms, bytes_received, retries, error=None):
+    """랭퓨즈 요청 한 건의 결과를 기록합니다"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace.add_request({
+        "endpoint": endpoint,
+        "url": url,
+        "status": status,
+        "latency_ms": round(latency_ms, 1),
+        "bytes": bytes_received,
+        "retries": retries,
+        "error": error
+    })
+
+@contextmanager
+def timed_step(name):
+    """블록의 소요 시간을 단계 기록으로 남깁니다"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_step({
+                "step": name,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1)
+            })
+
+def rerun_summary():
+    """현재 리런의 요청/단계 기록과 합계를 반환합니다"""
+    trace = _current_trace.get()
+    if trace is None:
+        return {"requests": [], "steps": [], "total_ms": 0.0, "request_ms": 0.0, "bytes": 0}
+
+    with trace._lock:
+        requests_ = list(trace.requests)
+        steps = list(trace.steps)
+
+    return {
+        "requests": requests_,
+        "steps": steps,
+        "total_ms": round((time.perf_counter() - trace.started_at) * 1000, 1),
+        "request_ms": round(sum(r["latency_ms"] for r in requests_), 1),
+        "bytes": sum(r["bytes"] or 0 for r in requests_)
+    }
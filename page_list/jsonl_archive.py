@@ -0,0 +1,251 @@
+"""
+JSONL 트레이스 아카이브 모듈 - 내보낸 대용량 JSONL 파일에 오프셋 색인(사이드카)을 두고 mmap으로 레코드 하나만 읽는 기능
+"""
+
+import os
+import re
+import json
+import mmap
+import glob
+import hashlib
+import logging
+import threading
+
+from .helpers import DATA_DIR
+from .lazy_json import loads_lazy
+
+logger = logging.getLogger(__name__)
+
+# 내보낸 트레이스 아카이브(*.jsonl)를 두는 디렉토리
+EXPORT_DIR = os.path.join(DATA_DIR, "exports")
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 2
+
+# 덧붙이기인지 확인할 때 비교하는 색인 구간의 앞/뒤 바이트 수
+FINGERPRINT_BYTES = 4096
+
+# 이 모듈이 쓰는 레코드는 "id"가 맨 앞이므로 줄 전체를 파싱하지 않고 ID만 꺼냄
+_LEADING_ID_RE = re.compile(rb'\{\s*"id"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+def _record_id(line):
+    match = _LEADING_ID_RE.match(line)
+    if match:
+        return json.loads(b'"' + match.group(1) + b'"')
+    # 다른 도구가 만든 파일은 줄 전체를 파싱
+    record = json.loads(line)
+    return record.get("id") if isinstance(record, dict) else None
+
+def _fingerprint(mm, indexed_size):
+    """색인한 구간의 앞/뒤 일부로 만든 지문 (덧붙이기가 아닌 변경을 알아내는 데 사용)"""
+    digest = hashlib.sha1(mm[:min(indexed_size, FINGERPRINT_BYTES)])
+    digest.update(mm[max(0, indexed_size - FINGERPRINT_BYTES):indexed_size])
+    return digest.hexdigest()
+
+def append_records(path, records):
+    """레코드({"id": 트레이스 ID, ...})를 JSONL 아카이브 끝에 추가합니다 (같은 ID는 나중 레코드가 우선)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    count = 0
+    with open(path, "ab") as f:
+        for record in records:
+            record = {"id": record["id"], **{key: value for key, value in record.items() if key != "id"}}
+            f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+            count += 1
+    return count
+
+class JsonlArchive:
+    """JSONL 아카이브의 읽기 전용 뷰
+
+    사이드카 색인({ID: [오프셋, 길이]})은 처음 열 때 만들고 파일 옆(.idx)에 저장합니다.
+    크기, 수정 시각(st_mtime_ns), inode를 색인과 함께 기록해 두고 셋 중 하나라도 바뀌면 다시 확인합니다.
+    같은 inode에 뒤로 덧붙여졌고 색인한 구간의 지문이 그대로면 색인된 위치 이후만 추가로 훑고,
+    그 밖의 경우(교체, 줄어듦, 같은 크기로 다시 쓰기 등)는 처음부터 다시 만듭니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self._lock = threading.RLock()
+        self._file = None
+        self._mmap = None
+        self._signature = None
+        self._indexed_size = 0
+        self._fingerprint = None
+        self._offsets = {}
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return None
+        return data
+
+    def _save_index(self, signature, indexed_size, fingerprint, offsets):
+        _, mtime_ns, inode = signature
+        data = {
+            "version": INDEX_VERSION,
+            "size": indexed_size,
+            "mtime_ns": mtime_ns,
+            "inode": inode,
+            "fingerprint": fingerprint,
+            "offsets": offsets,
+        }
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            # 읽기 전용 위치여도 메모리 색인으로는 동작
+            logger.warning("아카이브 색인을 저장하지 못했습니다: %s", self.index_path)
+
+    @staticmethod
+    def _reusable(base, signature, mm):
+        """이전 색인을 이어서 쓸 수 있으면 (색인된 크기, 오프셋)을, 아니면 (0, {})를 반환합니다"""
+        if not base:
+            return 0, {}
+        size, mtime_ns, inode = signature
+        indexed_size = base.get("size", 0)
+        if base.get("inode") != inode or indexed_size > size:
+            return 0, {}
+        if base.get("mtime_ns") == mtime_ns:
+            # 색인 이후 파일이 바뀌지 않음
+            return indexed_size, base.get("offsets", {})
+        if not indexed_size:
+            return 0, {}
+        # 수정 시각이 바뀌었으면 색인한 구간이 그대로인지(덧붙이기만 했는지) 확인
+        if mm[indexed_size - 1:indexed_size] != b"\n" or base.get("fingerprint") != _fingerprint(mm, indexed_size):
+            return 0, {}
+        return indexed_size, base.get("offsets", {})
+
+    def _scan(self, mm, start, offsets):
+        """start부터 파일 끝까지 줄 단위로 훑어 색인에 추가하고, 끝까지 완성된 줄의 끝 위치를 반환합니다"""
+        position = start
+        size = len(mm)
+        while position < size:
+            end = mm.find(b"\n", position)
+            if end < 0:
+                # 쓰는 중인 마지막 줄은 다음에 다시 훑음
+                break
+            line = mm[position:end].rstrip(b"\r")
+            if line.strip():
+                try:
+                    record_id = _record_id(line)
+                except ValueError:
+                    logger.warning("아카이브의 잘못된 줄을 건너뜁니다: %s (오프셋 %d)", self.path, position)
+                    record_id = None
+                if record_id is not None:
+                    offsets[str(record_id)] = [position, len(line)]
+            position = end + 1
+        return position
+
+    def _open(self):
+        stat = os.stat(self.path)
+        signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        if self._file is not None and signature == self._signature:
+            return
+        # 열려 있으면 메모리의 색인을, 처음 열면 사이드카 색인을 이어서 쓸 수 있는지 확인
+        if self._file is not None:
+            base = {
+                "size": self._indexed_size,
+                "mtime_ns": self._signature[1],
+                "inode": self._signature[2],
+                "fingerprint": self._fingerprint,
+                "offsets": self._offsets,
+            }
+        else:
+            base = self._load_index()
+        self.close()
+
+        self._file = open(self.path, "rb")
+        self._signature = signature
+        if stat.st_size == 0:
+            self._indexed_size, self._fingerprint, self._offsets = 0, None, {}
+            return
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        indexed_size, offsets = self._reusable(base, signature, self._mmap)
+        scanned = self._scan(self._mmap, indexed_size, offsets)
+        fingerprint = _fingerprint(self._mmap, scanned)
+        if scanned != indexed_size or not base or base.get("mtime_ns") != signature[1]:
+            self._save_index(signature, scanned, fingerprint, offsets)
+        self._indexed_size = scanned
+        self._fingerprint = fingerprint
+        self._offsets = offsets
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __contains__(self, record_id):
+        with self._lock:
+            self._open()
+            return record_id in self._offsets
+
+    def __len__(self):
+        with self._lock:
+            self._open()
+            return len(self._offsets)
+
+    def ids(self):
+        with self._lock:
+            self._open()
+            return list(self._offsets)
+
+    def get(self, record_id):
+        """레코드 하나를 읽어 반환합니다 (observations의 input/output은 접근할 때 디코딩)"""
+        with self._lock:
+            self._open()
+            location = self._offsets.get(record_id)
+            if location is None or self._mmap is None:
+                return None
+            offset, length = location
+            line = self._mmap[offset:offset + length]
+        return loads_lazy(line.decode("utf-8"), array_keys=("observations",))
+
+# 경로별로 열어 둔 아카이브 (파일이 바뀌면 각 아카이브가 알아서 다시 색인)
+_archives = {}
+_archives_lock = threading.Lock()
+
+def open_archive(path):
+    with _archives_lock:
+        archive = _archives.get(path)
+        if archive is None:
+            archive = _archives[path] = JsonlArchive(path)
+        return archive
+
+def export_archive_paths():
+    """내보내기 디렉토리의 JSONL 아카이브 경로 (최근 파일 먼저)"""
+    paths = []
+    for path in glob.glob(os.path.join(EXPORT_DIR, "*.jsonl")):
+        try:
+            paths.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    return [path for _, path in sorted(paths, reverse=True)]
+
+def load_exported_record(trace_id):
+    """내보낸 아카이브에서 트레이스 레코드를 찾습니다 (없으면 None)"""
+    for path in export_archive_paths():
+        try:
+            record = open_archive(path).get(trace_id)
+        except (OSError, ValueError):
+            logger.exception("아카이브에서 트레이스를 읽지 못했습니다: %s", path)
+            continue
+        if record is not None:
+            return record
+    return None
+
+def load_exported_observations(trace_id):
+    """내보낸 아카이브에 저장된 트레이스의 관찰 데이터 (없으면 None)"""
+    record = load_exported_record(trace_id)
+    if record is None:
+        return None
+    return record.get("observations") or None
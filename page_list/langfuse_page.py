@@ -1,11 +1,30 @@
 import streamlit as st
 import pandas as pd
+import altair as alt
 import traceback
 import sys
+import time
 import datetime
-from .langfuse_utils import fetch_langfuse_traces, fetch_langfuse_observations
-from .helpers import LANGFUSE_HOST, LANGFUSE_PROJECT, LANGFUSE_PUBLIC_KEY
+from .langfuse_utils import (
+    TraceListLoader, fetch_cached_observations, fetch_observations_batch, observation_cache_for
+)
+from .extraction import find_user_question, find_final_answer, find_system_prompts
+from .instrumentation import timed_step, rerun_summary
+from .profiler import profile_section
+from .span_tree import build_span_tree, flatten_span_tree
+from .cache import ByteBudgetCache, estimate_size
+from .analytics import observations_to_frame, latency_percentiles, load_usage_partials, usage_rollups
+from .projects import PROJECTS, use_project
 from .data_utils import load_langfuse_favorites, add_to_langfuse_favorites, remove_from_langfuse_favorites
+from .similarity_index import index_favorite
+from .trace_archive import TRACE_ARCHIVE, SEARCH_COLUMNS
+from .trace_indexer import flush_trace_index
+
+# 워터폴 차트에 표시할 최대 스팬 수
+MAX_WATERFALL_ROWS = 1500
+
+# 트레이스 목록 조회 중 화면을 갱신하는 간격 (초)
+TRACE_POLL_INTERVAL = 0.5
 
 def langfuse_page():
     """랭퓨즈 데이터를 표시하는 페이지"""
@@ -28,15 +47,19 @@ def langfuse_page():
     
     # 연결 정보 표시
     with st.expander("랭퓨즈 연결 정보"):
-        st.markdown(f"**호스트:** {LANGFUSE_HOST}")
-        st.markdown(f"**프로젝트:** {LANGFUSE_PROJECT}")
-        st.markdown(f"**Public Key:** {LANGFUSE_PUBLIC_KEY[:5]}...")
+        for project in PROJECTS.values():
+            if len(PROJECTS) > 1:
+                st.markdown(f"#### {project.name}")
+            st.markdown(f"**호스트:** {project.host}")
+            st.markdown(f"**프로젝트:** {project.project}")
+            st.markdown(f"**Public Key:** {project.public_key[:5]}...")
         st.markdown("""
         연결에 문제가 있다면 .env 파일에서 다음 설정을 확인하세요:
         - LANGFUSE_HOST
         - LANGFUSE_PROJECT
         - LANGFUSE_PUBLIC_KEY
         - LANGFUSE_SECRET_KEY
+        - LANGFUSE_PROJECTS (여러 프로젝트를 조회하는 경우 LANGFUSE_<이름>_HOST 등 프로젝트별 값)
         """)
     
     # 검색 컨트롤 영역
@@ -53,231 +76,358 @@ def langfuse_page():
         # 최대 트레이스 수
         limit = st.slider("조회할 최대 트레이스 수", min_value=10, max_value=500, value=100)
     
+    # 여러 프로젝트가 설정되어 있으면 조회할 프로젝트 선택 (동시에 조회해 시각 순으로 병합)
+    project_names = list(PROJECTS)
+    if len(PROJECTS) > 1:
+        project_names = st.multiselect("조회할 프로젝트", options=list(PROJECTS), default=list(PROJECTS), key="trace_projects")
+        if not project_names:
+            st.warning("조회할 프로젝트를 하나 이상 선택하세요.")
+            return
+    
     # 디버그 모드 (개발용 토글)
     debug_mode = st.checkbox("디버그 모드 활성화", value=False, help="API 호출 및 오류 정보를 상세하게 표시합니다")
     
-    # 트레이스 데이터 가져오기
+    # 트레이스 데이터 가져오기 (백그라운드 스레드가 받는 동안에도 받은 만큼 표시하고 선택 가능)
     if st.button("트레이스 조회") or ('should_load_traces' in st.session_state and st.session_state.should_load_traces):
         # 다음 자동 조회 방지
         if 'should_load_traces' in st.session_state:
             st.session_state.should_load_traces = False
-            
-        try:
-            with st.spinner("랭퓨즈에서 트레이스를 가져오는 중..."):
-                traces = fetch_langfuse_traces(limit=limit, days=days)
-                st.session_state.traces = traces  # 세션에 트레이스 저장
-            
-            if not traces:
-                st.warning("랭퓨즈에서 가져온 트레이스가 없습니다. 설정을 확인하거나 시간 범위를 늘려보세요.")
-            else:
-                # 트레이스 수 표시
-                st.success(f"총 {len(traces)}개의 트레이스를 가져왔습니다.")
-                display_traces_and_details()
-        except Exception as e:
-            st.error(f"트레이스 조회 중 오류가 발생했습니다: {str(e)}")
-            with st.expander("오류 세부 정보"):
-                st.code(traceback.format_exc())
-                
-                # 디버그 모드에서 추가 오류 정보 표시
-                if debug_mode and hasattr(e, 'response'):
-                    st.markdown("**응답 상태 및 내용:**")
-                    st.markdown(f"상태 코드: {e.response.status_code}")
-                    st.code(e.response.text)
-    
-    # 트레이스가 이미 로드되어 있는 경우 (페이지 새로고침시에도 데이터 유지)
-    elif st.session_state.traces:
+        start_trace_loading(limit, days, project_names)
+    
+    loader = st.session_state.get("trace_loader")
+    if loader is not None:
+        show_trace_loading_status(loader, debug_mode)
+    
+    # 트레이스가 있으면 목록과 세부 정보 표시 (조회 중이면 지금까지 받은 트레이스, 페이지 새로고침시에도 데이터 유지)
+    if st.session_state.traces:
         display_traces_and_details()
+    
+    # 조회된 트레이스 전체에 대한 노드별 지연 시간 분석
+    if st.session_state.traces:
+        display_latency_analytics()
+    
+    # 조회 기간의 토큰 사용량/비용 집계
+    display_usage_analytics(days, project_names)
+    
+    # 지금까지 조회한 트레이스 전체에서 질문/답변/시스템 프롬프트 전문 검색
+    display_archive_search(project_names)
+    
+    # 디버그 모드에서 이번 리런의 요청/단계별 소요 시간 표시
+    if debug_mode:
+        display_rerun_breakdown()
+        display_session_memory()
+    
+    # 조회 중이면 잠시 뒤 다시 실행해 새로 도착한 트레이스를 반영 (그 사이 위젯을 조작하면 바로 리런됨)
+    if st.session_state.get("trace_loader") is not None:
+        time.sleep(TRACE_POLL_INTERVAL)
+        st.rerun()
 
-def find_user_question(observations):
-    """사용자의 처음 질문을 찾습니다"""
-    for obs in observations:
-        # LangGraph 형식의 messages 배열 확인 (스크린샷에서 확인한 형식)
-        if isinstance(obs.get("output"), dict) and "messages" in obs.get("output", {}):
-            messages = obs.get("output", {}).get("messages", [])
-            for msg in messages:
-                if isinstance(msg, dict) and msg.get("type") == "human":
-                    return {
-                        "id": obs.get("id", ""),
-                        "name": obs.get("name", ""),
-                        "input": {"content": msg.get("content", "")}
-                    }
-        
-        # 입력 데이터에서 사용자 질문을 찾습니다
-        if obs.get("input") and isinstance(obs.get("input"), dict):
-            # human_input 키가 있는 경우
-            if "human_input" in obs.get("input"):
-                return obs
-                
-            # messages 배열이 있는 경우
-            if "messages" in obs.get("input"):
-                messages = obs.get("input").get("messages", [])
-                for msg in messages:
-                    if isinstance(msg, dict) and msg.get("type", "").lower() == "human":
-                        return obs
+def build_trace_table(traces):
+    """트레이스 목록을 표시용 데이터프레임으로 변환합니다 (여러 프로젝트가 설정되어 있으면 프로젝트 열 추가)"""
+    columns = ["이름", "상태", "생성일", "ID"]
+    if len(PROJECTS) > 1:
+        columns.insert(0, "프로젝트")
+    return pd.DataFrame([{
+        "프로젝트": trace.get("project", ""),
+        "이름": trace.get("name", ""),
+        "상태": trace.get("status", ""),
+        "생성일": trace.get("timestamp", ""),
+        "ID": trace.get("id", "")
+    } for trace in traces], columns=columns)
+
+def start_trace_loading(limit, days, project_names):
+    """진행 중인 조회를 취소하고 백그라운드 트레이스 목록 조회를 시작합니다"""
+    previous = st.session_state.get("trace_loader")
+    if previous is not None:
+        previous.cancel()
+    loader = TraceListLoader(project_names, limit=limit, days=days)
+    loader.start()
+    st.session_state.trace_loader = loader
+    st.session_state.traces = []
+    st.session_state.trace_loading = True
+
+def show_trace_loading_status(loader, debug_mode=False):
+    """조회 스레드가 지금까지 받은 트레이스를 세션에 반영하고 진행 상태나 결과를 표시합니다
+
+    조회가 끝나거나 취소되면 받은 트레이스 수와 관계없이 조회 상태를 정리합니다.
+    """
+    if not loader.cancelled:
+        if st.button("조회 취소", key="cancel_trace_loading", help="지금까지 가져온 트레이스만 표시합니다"):
+            loader.cancel()
+    
+    with profile_section("데이터 로드"):
+        st.session_state.traces = loader.snapshot()
+    traces = st.session_state.traces
+    
+    if loader.is_alive() and not loader.cancelled:
+        st.info(f"랭퓨즈에서 트레이스를 가져오는 중... {len(traces)} / 최대 {loader.limit}개 (받은 트레이스는 바로 선택할 수 있습니다)")
+        return
+    
+    # 완료, 취소, 오류 모두 조회 상태를 정리
+    st.session_state.trace_loading = False
+    st.session_state.trace_loader = None
+    
+    if loader.error is not None:
+        e = loader.error
+        st.error(f"트레이스 조회 중 오류가 발생했습니다: {str(e)}")
+        with st.expander("오류 세부 정보"):
+            st.code("".join(traceback.format_exception(type(e), e, e.__traceback__)))
+            
+            # 디버그 모드에서 추가 오류 정보 표시
+            if debug_mode and getattr(e, 'response', None) is not None:
+                st.markdown("**응답 상태 및 내용:**")
+                st.markdown(f"상태 코드: {e.response.status_code}")
+                st.code(e.response.text)
+    for name, error in loader.errors.items():
+        st.warning(f"{name} 프로젝트의 트레이스를 가져오지 못했습니다: {error}")
+    
+    if loader.cancelled:
+        st.info(f"트레이스 조회가 중단되었습니다. 지금까지 가져온 {len(traces)}개의 트레이스를 표시합니다.")
+    elif not traces:
+        if loader.error is None:
+            st.warning("랭퓨즈에서 가져온 트레이스가 없습니다. 설정을 확인하거나 시간 범위를 늘려보세요.")
+    else:
+        # 트레이스 수 표시
+        st.success(f"총 {len(traces)}개의 트레이스를 가져왔습니다.")
+
+def display_latency_analytics():
+    """조회된 트레이스들의 관찰 데이터를 모아 노드/관찰 이름별 지연 시간 백분위수를 표시합니다"""
+    st.markdown("---")
+    st.markdown("### 📊 노드별 지연 시간 분석")
+    
+    traces = st.session_state.traces
+    trace_ids = [trace.get("id") for trace in traces if trace.get("id")]
+    st.caption(f"현재 조회된 {len(trace_ids)}개 트레이스의 관찰 데이터를 동시에 가져와 분석합니다. (가져온 관찰 데이터는 서버 캐시에 보관됩니다)")
+    
+    if st.button("지연 시간 분석 실행", key="run_latency_analytics"):
+        progress = st.progress(0.0, text="관찰 데이터를 가져오는 중...")
         
-        # 출력 데이터에서 메시지를 확인합니다
-        if obs.get("output") and isinstance(obs.get("output"), dict):
-            # messages 배열이 있는 경우
-            if "messages" in obs.get("output"):
-                messages = obs.get("output").get("messages", [])
-                for msg in messages:
-                    if isinstance(msg, dict) and msg.get("type", "").lower() == "human":
-                        # 사용자 메시지를 발견하면 해당 관찰 데이터로 가상의 사용자 질문 객체 생성
-                        return {
-                            "id": obs.get("id", ""),
-                            "name": "사용자 메시지",
-                            "input": {"content": msg.get("content", "")}
-                        }
+        def on_progress(done, total):
+            progress.progress(done / total, text=f"관찰 데이터를 가져오는 중... ({done}/{total})")
         
-        # 이름이 "user" 또는 "human"을 포함하는 관찰 데이터를 찾습니다
-        if "user" in str(obs.get("name", "")).lower() or "human" in str(obs.get("name", "")).lower():
-            return obs
+        with profile_section("데이터 로드"):
+            observations_by_trace = fetch_observations_batch(trace_ids, on_progress=on_progress)
+        progress.empty()
         
-        # 메타데이터에서 사용자 질문 힌트를 찾습니다
-        if obs.get("metadata") and ("user_message" in str(obs.get("metadata")) or "human_message" in str(obs.get("metadata"))):
-            return obs
-            
-        # 입력 또는 출력 데이터에서 content 키가 있고 type이 "human"인 경우
-        for data_key in ["input", "output"]:
-            data = obs.get(data_key, {})
-            if isinstance(data, dict):
-                if "content" in data and "type" in data and data.get("type", "").lower() == "human":
-                    return obs
-    
-    return None
+        with profile_section("추출"), timed_step("latency_percentiles"):
+            df = observations_to_frame(observations_by_trace)
+            st.session_state.latency_analytics = {
+                "trace_count": sum(1 for observations in observations_by_trace.values() if observations),
+                "observation_count": len(df),
+                "by_node": latency_percentiles(df, "node"),
+                "by_name": latency_percentiles(df, "name")
+            }
+    
+    analytics = st.session_state.get("latency_analytics")
+    if not analytics:
+        return
+    
+    st.success(f"{analytics['trace_count']}개 트레이스, {analytics['observation_count']:,}개 관찰 데이터를 분석했습니다.")
+    
+    column_names = {"count": "호출 수", "mean": "평균(ms)", "p50": "p50(ms)", "p90": "p90(ms)", "p99": "p99(ms)"}
+    tabs = st.tabs(["LangGraph 노드별", "관찰 이름별"])
+    with tabs[0], profile_section("렌더링"):
+        st.dataframe(
+            analytics["by_node"].rename(columns={"node": "노드", **column_names}).round(1),
+            hide_index=True, use_container_width=True
+        )
+    with tabs[1], profile_section("렌더링"):
+        st.dataframe(
+            analytics["by_name"].rename(columns={"name": "관찰 이름", **column_names}).round(1),
+            hide_index=True, use_container_width=True
+        )
 
-def find_final_answer(observations):
-    """최종 답변을 찾습니다"""
-    # 시간순으로 정렬 (가장 마지막 응답을 찾기 위해)
-    # None값이 있는 경우 빈 문자열로 대체하여 정렬 오류 방지
-    sorted_obs = sorted(observations, key=lambda x: x.get("endTime") or "", reverse=True)
-    
-    for obs in sorted_obs:
-        # 출력 데이터에서 메시지 배열이 있는지 확인 (LangGraph 형식)
-        if isinstance(obs.get("output"), dict) and "messages" in obs.get("output", {}):
-            messages = obs.get("output", {}).get("messages", [])
-            if messages:
-                # 마지막 메시지를 찾아서 최종 답변으로 사용
-                last_message = messages[-1]
-                if isinstance(last_message, dict) and "content" in last_message:
-                    # 가상의 최종 답변 객체 생성
-                    return {
-                        "id": obs.get("id", ""),
-                        "name": obs.get("name", "") or "최종 답변",
-                        "output": {"content": last_message.get("content", "")}
-                    }
-                    
-        # 출력 데이터가 있는 관찰 중 응답 또는 답변으로 보이는 것을 찾습니다
-        if obs.get("output") and isinstance(obs.get("output"), dict):
-            return obs
-            
-        # 이름에 "response", "answer", "output" 등이 포함된 관찰을 찾습니다
-        if any(key in str(obs.get("name", "")).lower() for key in ["response", "answer", "output", "assistant"]):
-            return obs
+def display_usage_analytics(days, project_names):
+    """조회 기간의 GENERATION 관찰 데이터를 모아 모델/노드/일자별 토큰 사용량과 비용을 표시합니다"""
+    st.markdown("---")
+    st.markdown("### 💰 토큰 사용량 및 비용")
+    scope = f" (프로젝트: {', '.join(project_names)})" if len(PROJECTS) > 1 else ""
+    st.caption(f"최근 {days}일간의 GENERATION 관찰 데이터를 집계합니다{scope}. 이미 집계한 날짜는 캐시된 일 단위 합계를 재사용합니다.")
+    
+    if st.button("사용량 집계 실행", key="run_usage_analytics"):
+        try:
+            with st.spinner("GENERATION 데이터를 집계하는 중..."), profile_section("데이터 로드"), timed_step("usage_rollups"):
+                # 프로젝트별 부분 집계를 이어 붙여 함께 합산
+                partials = []
+                for name in project_names:
+                    with use_project(name):
+                        partials.append(load_usage_partials(days))
+                non_empty = [partial for partial in partials if not partial.empty]
+                rollups = usage_rollups(pd.concat(non_empty, ignore_index=True) if non_empty else partials[0])
+            st.session_state.usage_analytics = {"days": days, "rollups": rollups}
+        except Exception as e:
+            st.error(f"사용량 집계 중 오류가 발생했습니다: {str(e)}")
+            with st.expander("오류 세부 정보"):
+                st.code(traceback.format_exc())
+    
+    analytics = st.session_state.get("usage_analytics")
+    if not analytics:
+        return
+    
+    rollups = analytics["rollups"]
+    by_model = rollups["model"]
+    if by_model.empty:
+        st.info(f"최근 {analytics['days']}일간 GENERATION 데이터가 없습니다.")
+        return
     
-    return None
+    col1, col2, col3 = st.columns(3)
+    col1.metric("GENERATION 수", f"{int(by_model['generations'].sum()):,}")
+    col2.metric("전체 토큰", f"{int(by_model['total_tokens'].sum()):,}")
+    col3.metric("전체 비용", f"${by_model['cost'].sum():,.4f}")
+    
+    column_names = {
+        "generations": "호출 수",
+        "input_tokens": "입력 토큰",
+        "output_tokens": "출력 토큰",
+        "total_tokens": "전체 토큰",
+        "cost": "비용($)"
+    }
+    tabs = st.tabs(["모델별", "노드별", "일자별"])
+    with tabs[0], profile_section("렌더링"):
+        st.dataframe(by_model.rename(columns={"model": "모델", **column_names}), hide_index=True, use_container_width=True)
+    with tabs[1], profile_section("렌더링"):
+        st.dataframe(rollups["node"].rename(columns={"node": "노드", **column_names}), hide_index=True, use_container_width=True)
+    with tabs[2], profile_section("렌더링"):
+        by_day = rollups["day"].copy()
+        by_day["day"] = by_day["day"].dt.strftime("%Y-%m-%d")
+        st.bar_chart(by_day.set_index("day")[["input_tokens", "output_tokens"]].rename(columns=column_names))
+        st.dataframe(by_day.rename(columns={"day": "일자", **column_names}), hide_index=True, use_container_width=True)
 
-def find_system_prompts(observations):
-    """ChatVertexAI의 시스템 프롬프트를 찾습니다"""
-    system_prompts = []
-    unique_contents = set()  # 중복 제거를 위한 세트
-    
-    for obs in observations:
-        # ChatVertexAI 생성 관찰 데이터 확인 (GENERATION 타입)
-        if obs.get("type") == "GENERATION" and obs.get("name") == "ChatVertexAI":
-            # 입력 메시지 배열에서 시스템 프롬프트 검색
-            input_messages = obs.get("input", [])
-            
-            for msg in input_messages:
-                if isinstance(msg, dict) and msg.get("role") == "system":
-                    content = msg.get("content")
-                    if content and str(content) not in unique_contents:
-                        unique_contents.add(str(content))
-                        system_prompts.append({
-                            "id": obs.get("id", ""),
-                            "name": f"{obs.get('name', '')} - {obs.get('metadata', {}).get('langgraph_node', '알 수 없음')}",
-                            "content": content,
-                            "original_obs": obs
-                        })
+def display_archive_search(project_names):
+    """로컬 트레이스 아카이브에서 질문/답변/시스템 프롬프트 내용으로 트레이스를 검색합니다"""
+    st.markdown("---")
+    st.markdown("### 🗂️ 트레이스 아카이브 검색")
+    
+    if not TRACE_ARCHIVE.available:
+        st.warning("트레이스 아카이브를 열 수 없습니다. SQLite FTS5 지원 여부를 확인하세요.")
+        return
+    
+    trace_count, indexed_count, oldest, newest = TRACE_ARCHIVE.stats()
+    period = f" ({oldest[:10]} ~ {newest[:10]})" if oldest and newest else ""
+    st.caption(f"관찰 데이터를 가져온 트레이스는 자동으로 색인됩니다. 색인된 트레이스 {indexed_count:,}개 / 기록된 트레이스 {trace_count:,}개{period}")
+    
+    # 목록만 받은 트레이스는 본문이 없으므로 한 번에 가져와 색인
+    trace_ids = [trace.get("id") for trace in st.session_state.traces if trace.get("id")]
+    pending = [trace_id for trace_id in trace_ids if not TRACE_ARCHIVE.has_trace(trace_id)]
+    if pending and st.button(f"조회된 트레이스 {len(pending)}개 색인", key="archive_pending_traces"):
+        progress = st.progress(0.0, text="관찰 데이터를 가져와 색인하는 중...")
         
-        # 기존 검색 로직 유지 (메타데이터나 입력에서 시스템 프롬프트 검색)        
-        metadata = obs.get("metadata", {})
-        input_data = obs.get("input", {})
+        def on_progress(done, total):
+            progress.progress(done / total, text=f"관찰 데이터를 가져와 색인하는 중... ({done}/{total})")
         
-        is_system_prompt = False
-        content = None
+        with profile_section("데이터 로드"):
+            fetch_observations_batch(pending, on_progress=on_progress)
+        # 색인은 백그라운드에서 진행되므로 끝난 뒤 개수를 다시 표시
+        progress.progress(1.0, text="색인을 마무리하는 중...")
+        flush_trace_index()
+        progress.empty()
+        st.rerun()
+    
+    column_options = {"전체": None, **{label: column for column, label in SEARCH_COLUMNS.items()}}
+    period_options = {"전체 기간": None, "최근 7일": 7, "최근 30일": 30, "최근 90일": 90, "최근 1년": 365}
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        query = st.text_input("검색어", placeholder="예: 환불 요청 (여러 단어는 모두 포함된 트레이스를 찾습니다)", key="archive_query")
+    with col2:
+        column_label = st.selectbox("검색 대상", options=list(column_options), key="archive_column")
+    with col3:
+        period_label = st.selectbox("기간", options=list(period_options), key="archive_period")
+    
+    if not query.strip():
+        return
+    
+    since = None
+    if period_options[period_label]:
+        since = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=period_options[period_label])).strftime("%Y-%m-%dT%H:%M:%S")
+    
+    start = time.perf_counter()
+    with profile_section("추출"), timed_step("archive_search"):
+        results = TRACE_ARCHIVE.search(
+            query, column=column_options[column_label], limit=50, since=since,
+            projects=project_names if len(PROJECTS) > 1 else None
+        )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    if not results:
+        st.info("일치하는 트레이스가 없습니다.")
+        return
+    
+    st.caption(f"{len(results)}개 트레이스 ({elapsed_ms:.1f}ms, 최대 50개까지 관련도 순)")
+    with profile_section("렌더링"):
+        for result in results:
+            project = f" · {result['project']}" if len(PROJECTS) > 1 and result["project"] else ""
+            st.markdown(f"**{result['name'] or '무제 트레이스'}**{project} · {result['timestamp'][:19]} · `{result['trace_id']}`")
+            st.markdown("> " + " ".join(result["snippet"].split()))
+
+def display_rerun_breakdown():
+    """이번 리런에서 발생한 랭퓨즈 요청과 추출 단계의 소요 시간을 표시합니다"""
+    summary = rerun_summary()
+    
+    with st.expander("⏱️ 이번 리런 계측 정보", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        col1.metric("전체 소요 시간", f"{summary['total_ms']:.0f} ms")
+        col2.metric("요청 소요 시간", f"{summary['request_ms']:.0f} ms")
+        col3.metric("수신 데이터", f"{summary['bytes'] / 1024:.1f} KB")
         
-        # 이름에 "system", "prompt", "chatvertexai" 등이 포함된 경우
-        if any(key in str(obs.get("name", "")).lower() for key in ["system", "prompt", "chatvertexai", "vertex"]):
-            is_system_prompt = True
+        st.markdown("**랭퓨즈 요청**")
+        if summary["requests"]:
+            request_df = pd.DataFrame(summary["requests"]).rename(columns={
+                "endpoint": "엔드포인트",
+                "url": "URL",
+                "status": "상태",
+                "latency_ms": "지연 시간(ms)",
+                "bytes": "수신 바이트",
+                "retries": "재시도",
+                "error": "오류"
+            })
+            st.dataframe(request_df, use_container_width=True)
+        else:
+            st.info("이번 리런에서는 랭퓨즈 요청이 없었습니다.")
         
-        # 메타데이터에 시스템 프롬프트 관련 키워드가 있는 경우
-        if isinstance(metadata, dict) and any(key in str(metadata).lower() for key in ["system_prompt", "system_message", "instructions"]):
-            is_system_prompt = True
-            # 메타데이터에서 프롬프트 내용 추출
-            for key in ["system_prompt", "system_message", "system_content", "instructions"]:
-                if key in metadata:
-                    content = metadata[key]
-                    break
+        st.markdown("**추출 단계**")
+        if summary["steps"]:
+            step_df = pd.DataFrame(summary["steps"]).rename(columns={
+                "step": "단계",
+                "duration_ms": "소요 시간(ms)"
+            })
+            st.dataframe(step_df, use_container_width=True)
+        else:
+            st.info("이번 리런에서는 추출 단계가 실행되지 않았습니다.")
+
+def display_session_memory():
+    """이 세션의 세션 상태가 차지하는 메모리 추정치와 용량 제한 캐시 사용량을 표시합니다"""
+    with st.expander("🧠 세션 메모리 사용량", expanded=False):
+        rows = [{"키": key, "크기(KB)": estimate_size(value) / 1024} for key, value in st.session_state.items()]
+        rows.sort(key=lambda row: row["크기(KB)"], reverse=True)
+        total_kb = sum(row["크기(KB)"] for row in rows)
+        st.metric("세션 상태 합계 (추정)", f"{total_kb / 1024:.1f} MB")
+        st.caption("프로세스 공유 캐시와 함께 참조하는 객체도 세션 몫으로 계산합니다.")
+        st.dataframe(pd.DataFrame(rows, columns=["키", "크기(KB)"]), hide_index=True, use_container_width=True)
         
-        # 입력이 리스트인 경우 (LangGraph 형식) - 메시지 배열 확인
-        if isinstance(input_data, list):
-            for item in input_data:
-                if isinstance(item, dict):
-                    # role이 system인 메시지 찾기
-                    if item.get("role") == "system" or item.get("type") == "system":
-                        content = item.get("content")
-                        is_system_prompt = True
-                        break
-                    # content 필드와 type이 system인 메시지 찾기
-                    elif "content" in item and item.get("type") == "system":
-                        content = item.get("content")
-                        is_system_prompt = True
-                        break
-            
-        # 입력 데이터에 시스템 프롬프트 관련 키워드가 있는 경우
-        if isinstance(input_data, dict) and any(key in str(input_data).lower() for key in ["system_prompt", "system_message", "instructions"]):
-            is_system_prompt = True
-            # 입력 데이터에서 프롬프트 내용 추출
-            for key in ["system_prompt", "system_message", "system_content", "instructions"]:
-                if key in input_data:
-                    content = input_data[key]
-                    break
-                    
-        if is_system_prompt:
-            # 중복 검사 - 같은 내용의 프롬프트는 추가하지 않음
-            if content and str(content) not in unique_contents:
-                unique_contents.add(str(content))
-                system_prompts.append({
-                    "id": obs.get("id", ""),
-                    "name": obs.get("name", ""),
-                    "content": content,
-                    "original_obs": obs
-                })
-    
-    return system_prompts
+        caches = [value for value in st.session_state.values() if isinstance(value, ByteBudgetCache)]
+        for cache in caches:
+            # 저장 이후 디코딩된 필드까지 반영한 크기로 표시
+            cache.resize()
+            st.markdown(f"**{cache.name}** - {len(cache)}개 트레이스, "
+                        f"{cache.total_bytes / 1024 / 1024:.2f} / {cache.max_bytes / 1024 / 1024:.0f} MB, "
+                        f"제거 {cache.evictions}회")
+            entries = pd.DataFrame(cache.entry_sizes(), columns=["트레이스 ID", "크기(KB)"])
+            entries["크기(KB)"] = entries["크기(KB)"] / 1024
+            st.dataframe(entries, hide_index=True, use_container_width=True)
 
 def display_traces_and_details():
     """트레이스 목록과 세부 정보를 표시합니다"""
     
     traces = st.session_state.traces
     
-    # 트레이스 데이터 가공
-    trace_data = []
-    for trace in traces:
-        trace_data.append({
-            "이름": trace.get("name", ""),
-            "상태": trace.get("status", ""),
-            "생성일": trace.get("timestamp", ""),
-            "ID": trace.get("id", "")
-        })
-    
-    # 데이터프레임으로 변환
-    trace_df = pd.DataFrame(trace_data)
+    # 트레이스 데이터 가공 후 데이터프레임으로 변환
+    trace_df = build_trace_table(traces)
+    trace_data = trace_df.to_dict("records")
     
     # 데이터프레임 표시
-    st.markdown("### 트레이스 목록")
-    st.dataframe(trace_df, use_container_width=True)
+    with profile_section("렌더링"):
+        st.markdown("### 트레이스 목록")
+        st.dataframe(trace_df, use_container_width=True)
     
     # 트레이스 세부 정보
     st.markdown("### 트레이스 세부 정보")
@@ -321,6 +471,8 @@ def display_traces_and_details():
                 # 수동 새로고침 버튼
                 if st.button("관찰 데이터 새로고침", key="refresh_observations"):
                     st.session_state.load_observations = True
+                    # 공유 캐시를 건너뛰고 랭퓨즈에서 다시 가져오기
+                    observation_cache_for(selected_trace_id).pop(selected_trace_id)
             
             # 메타데이터 표시
             if selected_trace.get("metadata"):
@@ -372,6 +524,9 @@ def display_traces_and_details():
                                 st.session_state.favorite_type,
                                 note
                             )
+                            # 유사 예제 검색 색인에 추가 (관찰 데이터 로드보다 먼저 실행되므로 캐시에서 조회)
+                            index_favorite(selected_trace_id, st.session_state.favorite_type,
+                                           selected_trace.get('name', '익명 트레이스'), fetch_cached_observations(selected_trace_id))
                             st.success(f"트레이스가 {'좋은' if st.session_state.favorite_type == 'good' else '나쁜'} 예제로 즐겨찾기에 추가되었습니다!")
                             # 입력 폼 숨기기
                             st.session_state.show_note_input = False
@@ -393,8 +548,8 @@ def display_traces_and_details():
             # 관찰 데이터 가져오기
             if should_load:
                 try:
-                    with st.spinner("관찰 데이터를 가져오는 중..."):
-                        observations = fetch_langfuse_observations(selected_trace_id)
+                    with st.spinner("관찰 데이터를 가져오는 중..."), profile_section("데이터 로드"):
+                        observations = fetch_cached_observations(selected_trace_id)
                         st.session_state.observations = observations
                         
                     if not observations:
@@ -410,14 +565,17 @@ def display_traces_and_details():
                 st.success(f"{len(observations)}개의 관찰 데이터가 있습니다.")
                 
                 # 사용자 질문, 최종 답변, 시스템 프롬프트 추출
-                user_question = find_user_question(observations)
-                final_answer = find_final_answer(observations)
-                system_prompts = find_system_prompts(observations)
+                with profile_section("추출"), timed_step("find_user_question"):
+                    user_question = find_user_question(observations)
+                with profile_section("추출"), timed_step("find_final_answer"):
+                    final_answer = find_final_answer(observations)
+                with profile_section("추출"), timed_step("find_system_prompts"):
+                    system_prompts = find_system_prompts(observations)
                 
                 # 주요 데이터 표시
                 tabs = st.tabs(["사용자 질문", "최종 답변", "시스템 프롬프트"])
                 
-                with tabs[0]:  # 사용자 질문 탭
+                with tabs[0], profile_section("렌더링"):  # 사용자 질문 탭
                     if user_question:
                         st.markdown(f"**이름:** {user_question.get('name', '무제')}")
                         st.markdown(f"**ID:** {user_question.get('id', '')}")
@@ -451,7 +609,7 @@ def display_traces_and_details():
                     else:
                         st.info("사용자 질문을 찾을 수 없습니다.")
                 
-                with tabs[1]:  # 최종 답변 탭
+                with tabs[1], profile_section("렌더링"):  # 최종 답변 탭
                     if final_answer:
                         st.markdown(f"**이름:** {final_answer.get('name', '무제')}")
                         st.markdown(f"**ID:** {final_answer.get('id', '')}")
@@ -504,7 +662,7 @@ def display_traces_and_details():
                     else:
                         st.info("최종 답변을 찾을 수 없습니다.")
                 
-                with tabs[2]:  # 시스템 프롬프트 탭
+                with tabs[2], profile_section("렌더링"):  # 시스템 프롬프트 탭
                     if system_prompts:
                         for idx, prompt in enumerate(system_prompts):
                             # 프롬프트 내용 표시
@@ -526,8 +684,13 @@ def display_traces_and_details():
                     else:
                         st.info("ChatVertexAI 시스템 프롬프트를 찾을 수 없습니다.")
                 
+                # 스팬 트리 / 워터폴 표시 옵션
+                if st.checkbox("🌳 스팬 트리 워터폴 보기", value=False, key="show_span_tree"):
+                    with profile_section("렌더링"):
+                        display_span_waterfall(selected_trace_id, observations)
+                
                 # 모든 관찰 데이터 표시 옵션
-                with st.expander("모든 관찰 데이터 보기", expanded=False):
+                with st.expander("모든 관찰 데이터 보기", expanded=False), profile_section("렌더링"):
                     st.markdown("### 전체 관찰 데이터")
                     
                     # 데이터 유형별로 정렬
@@ -572,4 +735,84 @@ def display_traces_and_details():
             else:
                 st.info("이 트레이스에는 관찰 데이터가 없습니다.")
         else:
-            st.warning("선택한 트레이스를 찾을 수 없습니다. 다시 조회해보세요.") 
\ No newline at end of file
+            st.warning("선택한 트레이스를 찾을 수 없습니다. 다시 조회해보세요.") 
+
+def display_span_waterfall(trace_id, observations):
+    """parentObservationId로 구성한 스팬 트리를 워터폴 타임라인으로 표시합니다"""
+    # 같은 트레이스에 대해서는 트리를 한 번만 구성
+    cached = st.session_state.get("span_tree_cache")
+    if not cached or cached["trace_id"] != trace_id or cached["count"] != len(observations):
+        with profile_section("추출"), timed_step("build_span_tree"):
+            tree = build_span_tree(observations)
+        st.session_state.span_tree_cache = {"trace_id": trace_id, "count": len(observations), "tree": tree}
+    else:
+        tree = cached["tree"]
+    
+    nodes = tree["nodes"]
+    if not nodes:
+        st.info("표시할 스팬이 없습니다.")
+        return
+    
+    max_tree_depth = 0
+    all_rows = flatten_span_tree(tree)
+    if all_rows:
+        max_tree_depth = max(row["depth"] for row in all_rows)
+    
+    # 표시 옵션
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        max_depth = st.slider("최대 깊이", min_value=0, max_value=max(max_tree_depth, 1), value=min(max_tree_depth, 4), key="span_tree_depth")
+    with col2:
+        critical_only = st.checkbox("크리티컬 패스만 보기", value=False, key="span_tree_critical_only")
+    
+    rows = flatten_span_tree(tree, max_depth=max_depth, critical_only=critical_only)
+    if not rows:
+        st.info("조건에 맞는 스팬이 없습니다.")
+        return
+    
+    # 크리티컬 패스 요약
+    critical_nodes = [node for node in nodes if node["critical"]]
+    total_ms = max(node["end_ms"] for node in nodes) - tree["trace_start_ms"]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("전체 스팬 수", f"{len(nodes):,}")
+    col2.metric("트레이스 길이", f"{total_ms:,.0f} ms")
+    col3.metric("크리티컬 패스 스팬 수", f"{len(critical_nodes):,}")
+    
+    # 워터폴 차트 (행 순서는 깊이 우선 순회 순서, 브라우저 부담을 줄이기 위해 행 수 제한)
+    if len(rows) > MAX_WATERFALL_ROWS:
+        st.info(f"{len(rows):,}개 스팬 중 앞의 {MAX_WATERFALL_ROWS:,}개만 표시합니다. 깊이를 줄이거나 크리티컬 패스만 보기를 사용하세요.")
+        rows = rows[:MAX_WATERFALL_ROWS]
+    waterfall_df = pd.DataFrame(rows)
+    waterfall_df["label"] = waterfall_df.apply(
+        lambda row: f"{row['order']:>4} {'  ' * row['depth']}{row['name']}", axis=1
+    )
+    waterfall_df["구분"] = waterfall_df["critical"].map({True: "크리티컬 패스", False: "기타"})
+    
+    chart = alt.Chart(waterfall_df).mark_bar(height=10).encode(
+        x=alt.X("start_offset_ms:Q", title="트레이스 시작 후 경과 시간 (ms)"),
+        x2="end_offset_ms:Q",
+        y=alt.Y("label:N", sort=alt.SortField("order"), title=None, axis=alt.Axis(labelLimit=300)),
+        color=alt.Color("구분:N", scale=alt.Scale(domain=["크리티컬 패스", "기타"], range=["#e4572e", "#76b7b2"])),
+        tooltip=[
+            alt.Tooltip("name:N", title="이름"),
+            alt.Tooltip("type:N", title="유형"),
+            alt.Tooltip("node:N", title="노드"),
+            alt.Tooltip("duration_ms:Q", title="전체(ms)", format=",.0f"),
+            alt.Tooltip("self_ms:Q", title="자체(ms)", format=",.0f"),
+            alt.Tooltip("child_ms:Q", title="자식(ms)", format=",.0f"),
+        ]
+    ).properties(height=max(14 * len(waterfall_df), 120))
+    st.altair_chart(chart, use_container_width=True)
+    
+    # 자체 시간 기준 상위 스팬
+    st.markdown("**자체 시간 상위 스팬**")
+    top_df = waterfall_df.nlargest(20, "self_ms")[["name", "type", "node", "duration_ms", "self_ms", "child_ms", "critical"]]
+    st.dataframe(top_df.rename(columns={
+        "name": "이름",
+        "type": "유형",
+        "node": "노드",
+        "duration_ms": "전체(ms)",
+        "self_ms": "자체(ms)",
+        "child_ms": "자식(ms)",
+        "critical": "크리티컬"
+    }).round(1), hide_index=True, use_container_width=True)
@@ -2,15 +2,44 @@
 랭퓨즈 연동 유틸리티 모듈 - 랭퓨즈에서 트레이스 데이터를 가져오는 기능
 """
 
+import time
+import heapq
+import queue
+import logging
+import threading
+import contextvars
 import requests
-from requests.auth import HTTPBasicAuth
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from .helpers import (
-    LANGFUSE_HOST, 
-    LANGFUSE_PROJECT, 
-    LANGFUSE_PUBLIC_KEY, 
-    LANGFUSE_SECRET_KEY
+    LANGFUSE_TIMEOUT,
+    LANGFUSE_MAX_RETRIES,
+    LANGFUSE_MAX_WORKERS,
+    LANGFUSE_PAGE_SIZE,
+    LANGFUSE_CASSETTE_MODE
 )
+from .projects import (
+    PROJECTS, DEFAULT_PROJECT, get_project, current_project, explicit_project, use_project,
+    remember_trace_project, known_trace_project
+)
+from .lazy_json import loads_lazy
+from .trace_archive import archive_trace_list
+from .trace_indexer import index_trace_async
+from .jsonl_archive import load_exported_record
+from .cassette import load_cassette, save_cassette
+from .instrumentation import record_request
+from .metrics import LANGFUSE_REQUESTS, LANGFUSE_REQUEST_SECONDS, LANGFUSE_OBSERVATION_FALLBACKS
+
+logger = logging.getLogger(__name__)
+
+# 재시도할 HTTP 상태 코드 (요청 한도 초과, 일시적인 서버 오류)
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+# 트레이스 ID별 관찰 데이터 공유 캐시 (기본 프로젝트, 다른 프로젝트는 각 프로젝트의 캐시 사용)
+OBSERVATION_CACHE = DEFAULT_PROJECT.observation_cache
+
+# (최대 개수, 조회 기간)별 최근 트레이스 목록 공유 캐시 (기본 프로젝트)
+TRACE_LIST_CACHE = DEFAULT_PROJECT.trace_list_cache
 
 def normalize_host(host):
     """호스트 주소를 정규화합니다. 0.0.0.0을 localhost로 변환합니다."""
@@ -18,99 +47,165 @@ def normalize_host(host):
         return host.replace('0.0.0.0', 'localhost')
     return host
 
-def fetch_langfuse_traces(limit=100, days=7):
-    """랭퓨즈에서 최근 트레이스를 가져옵니다."""
-    if not all([LANGFUSE_PUBLIC_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_PROJECT]):
-        print("랭퓨즈 API 자격 증명이 설정되지 않았습니다.")
-        return []
+def _credentials_configured():
+    """요청에 필요한 자격 증명이 있는지 확인합니다 (카세트 재생 중에는 필요 없음)"""
+    return LANGFUSE_CASSETTE_MODE == "replay" or current_project().configured
+
+def _api_url(path):
+    """현재 프로젝트 호스트의 API 주소 (0.0.0.0 → localhost)"""
+    return f"{normalize_host(current_project().host)}{path}"
+
+def _replay_get(endpoint, url, params):
+    """기록된 카세트에서 응답을 돌려줍니다 (없으면 네트워크 오류와 같은 예외)"""
+    start = time.perf_counter()
+    response = load_cassette(url, params, namespace=current_project().namespace)
+    latency_ms = (time.perf_counter() - start) * 1000
+    if response is None:
+        record_request(endpoint, url, None, latency_ms, 0, 0, error="cassette not found")
+        LANGFUSE_REQUESTS.inc(endpoint=endpoint, status="error")
+        raise requests.ConnectionError(f"기록된 카세트가 없습니다: {url} {params or ''}")
+    record_request(endpoint, url, response.status_code, latency_ms, len(response.content), 0)
+    LANGFUSE_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    LANGFUSE_REQUEST_SECONDS.observe(latency_ms / 1000, endpoint=endpoint)
+    return response
+
+def _langfuse_get(endpoint, url, params=None):
+    """랭퓨즈 API에 GET 요청을 보내고 상태, 지연 시간, 수신 바이트, 재시도 횟수를 기록합니다"""
+    if LANGFUSE_CASSETTE_MODE == "replay":
+        return _replay_get(endpoint, url, params)
     
-    try:
-        # 시간 범위 설정 (최근 X일)
-        start_time = (datetime.now() - timedelta(days=days)).isoformat()
-        
-        # 호스트 주소 정규화 (0.0.0.0 → localhost)
-        host = normalize_host(LANGFUSE_HOST)
+    # 인증/헤더가 설정된 프로젝트 전용 세션으로 요청 (연결 재사용)
+    project = current_project()
+    
+    retries = 0
+    start = time.perf_counter()
+    while True:
+        try:
+            response = project.session.get(url, params=params, timeout=LANGFUSE_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if retries < LANGFUSE_MAX_RETRIES:
+                retries += 1
+                time.sleep(0.5 * 2 ** (retries - 1))
+                continue
+            latency_ms = (time.perf_counter() - start) * 1000
+            record_request(endpoint, url, None, latency_ms, 0, retries, error=str(e))
+            LANGFUSE_REQUESTS.inc(endpoint=endpoint, status="error")
+            LANGFUSE_REQUEST_SECONDS.observe(latency_ms / 1000, endpoint=endpoint)
+            raise
         
-        # API 요청 URL
-        url = f"{host}/api/public/traces"
+        if response.status_code in RETRY_STATUS_CODES and retries < LANGFUSE_MAX_RETRIES:
+            retries += 1
+            time.sleep(0.5 * 2 ** (retries - 1))
+            continue
         
-        # 요청 매개변수
+        latency_ms = (time.perf_counter() - start) * 1000
+        record_request(endpoint, url, response.status_code, latency_ms, len(response.content), retries)
+        LANGFUSE_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+        LANGFUSE_REQUEST_SECONDS.observe(latency_ms / 1000, endpoint=endpoint)
+        logger.debug("%s %s -> %s (%.1fms, 재시도 %d회)", endpoint, url, response.status_code, latency_ms, retries)
+        if LANGFUSE_CASSETTE_MODE == "record":
+            save_cassette(endpoint, url, params, response, namespace=project.namespace)
+        return response
+
+def _parse_body(response):
+    """응답 본문을 지연 파싱합니다 (JSON은 UTF-8이므로 인코딩 추정 없이 바로 디코딩)"""
+    return loads_lazy(response.content.decode("utf-8"))
+
+def _log_request_error(message, e):
+    """요청 실패 내용을 로그로 남깁니다"""
+    logger.warning("%s: %s", message, e)
+    if hasattr(e, 'response') and e.response is not None:
+        logger.warning("응답 상태: %s, 응답 내용: %s", e.response.status_code, e.response.text[:500])
+
+def iter_langfuse_trace_pages(limit=100, days=7, page_size=LANGFUSE_PAGE_SIZE):
+    """랭퓨즈에서 최근 트레이스를 페이지 단위로 가져오며 페이지마다 목록을 반환합니다 (요청 실패 시 예외 전달)"""
+    if not _credentials_configured():
+        logger.warning("랭퓨즈 API 자격 증명이 설정되지 않았습니다.")
+        return
+    
+    # 시간 범위 설정 (최근 X일)
+    start_time = (datetime.now() - timedelta(days=days)).isoformat()
+    
+    # API 요청 URL
+    url = _api_url("/api/public/traces")
+    
+    # 페이지 크기는 고정하고 마지막 페이지에서 최대 개수에 맞춰 자름
+    page_size = max(1, min(page_size, limit))
+    fetched = 0
+    page = 1
+    while fetched < limit:
+        # 요청 매개변수 (목록에는 기본 필드만 필요하므로 input/output 등은 제외 요청, 지원하지 않는 서버는 무시)
         params = {
-            "limit": limit,
-            "startTime": start_time
+            "limit": page_size,
+            "page": page,
+            "startTime": start_time,
+            "fields": "core"
         }
         
-        # 헤더 설정
-        headers = {"X-Project-Name": LANGFUSE_PROJECT}
-        
-        # 인증 설정 - HTTPBasicAuth 사용 (공식 문서 방식)
-        # username: Public Key, password: Secret Key
-        auth = HTTPBasicAuth(LANGFUSE_PUBLIC_KEY, LANGFUSE_SECRET_KEY)
-        
-        print(f"트레이스 요청 URL: {url}")
-        print(f"인증 정보: {LANGFUSE_PUBLIC_KEY[:5]}... / {LANGFUSE_SECRET_KEY[:5]}...")
+        # API 요청 및 응답 검증
+        response = _langfuse_get("traces", url, params=params)
+        response.raise_for_status()
         
-        # API 요청
-        response = requests.get(url, auth=auth, headers=headers, params=params)
-        print(f"응답 상태 코드: {response.status_code}")
+        body = _parse_body(response)
+        data = body.get("data", [])[:limit - fetched]
+        if not data:
+            break
         
-        # 응답 검증
-        response.raise_for_status()
+        fetched += len(data)
+        yield data
         
-        result = response.json().get("data", [])
-        print(f"가져온 트레이스 수: {len(result)}")
-        return result
+        total_pages = body.get("meta", {}).get("totalPages")
+        if (total_pages is not None and page >= total_pages) or (total_pages is None and len(data) < page_size):
+            break
+        page += 1
+    
+    logger.debug("가져온 트레이스 수: %d", fetched)
+
+def fetch_langfuse_traces(limit=100, days=7):
+    """랭퓨즈에서 최근 트레이스를 가져옵니다."""
+    try:
+        traces = []
+        for page in iter_langfuse_trace_pages(limit=limit, days=days):
+            traces.extend(page)
+        return traces
     except Exception as e:
-        print(f"랭퓨즈 트레이스 조회 실패: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"응답 상태: {e.response.status_code}")
-            print(f"응답 내용: {e.response.text}")
+        _log_request_error("랭퓨즈 트레이스 조회 실패", e)
         return []
 
-def fetch_langfuse_observations(trace_id):
-    """특정 트레이스의 관찰 데이터를 가져옵니다."""
-    if not all([LANGFUSE_PUBLIC_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_PROJECT]):
-        print("랭퓨즈 API 자격 증명이 설정되지 않았습니다.")
+def fetch_langfuse_observations(trace_id, trace_data=None):
+    """특정 트레이스의 관찰 데이터를 가져옵니다. (trace_data를 주면 트레이스 상세 요청을 생략)"""
+    if not _credentials_configured():
+        logger.warning("랭퓨즈 API 자격 증명이 설정되지 않았습니다.")
         return []
     
     try:
         # 호스트 주소 정규화 (0.0.0.0 → localhost)
-        host = normalize_host(LANGFUSE_HOST)
-        
-        # 먼저 트레이스 상세 정보를 가져옵니다
-        trace_url = f"{host}/api/public/traces/{trace_id}"
-        
-        # 헤더 설정
-        headers = {"X-Project-Name": LANGFUSE_PROJECT}
+        host = normalize_host(current_project().host)
         
-        # 인증 설정 - HTTPBasicAuth 사용 (공식 문서 방식)
-        auth = HTTPBasicAuth(LANGFUSE_PUBLIC_KEY, LANGFUSE_SECRET_KEY)
-        
-        print(f"트레이스 상세 정보 요청 URL: {trace_url}")
-        
-        # 트레이스 상세 정보 요청
-        trace_response = requests.get(trace_url, auth=auth, headers=headers)
-        print(f"트레이스 상세 응답 상태 코드: {trace_response.status_code}")
-        
-        # 응답 검증
-        trace_response.raise_for_status()
-        
-        # 트레이스 상세 정보에서 observations 필드 확인
-        trace_data = trace_response.json()
+        # 먼저 트레이스 상세 정보를 가져옵니다 (프로젝트 확인 때 이미 받았으면 재사용)
+        if trace_data is None:
+            trace_url = f"{host}/api/public/traces/{trace_id}"
+            
+            # 트레이스 상세 정보 요청
+            trace_response = _langfuse_get("trace_detail", trace_url)
+            
+            # 응답 검증
+            trace_response.raise_for_status()
+            
+            # 트레이스 상세 정보에서 observations 필드 확인 (관찰별 input/output은 접근할 때 디코딩)
+            trace_data = _parse_body(trace_response)
         
         # observations 필드가 있다면 바로 사용
         if "observations" in trace_data:
             observations = trace_data.get("observations", [])
-            print(f"트레이스에서 직접 {len(observations)}개의 관찰 데이터를 찾았습니다.")
+            logger.debug("트레이스에서 직접 %d개의 관찰 데이터를 찾았습니다.", len(observations))
             return observations
         
         # observations 필드가 없다면 별도 API로 요청 시도
         observations_url = f"{host}/api/public/traces/{trace_id}/observations"
-        print(f"관찰 데이터 별도 요청 URL: {observations_url}")
         
         # API 요청
-        obs_response = requests.get(observations_url, auth=auth, headers=headers)
-        print(f"관찰 데이터 응답 상태 코드: {obs_response.status_code}")
+        obs_response = _langfuse_get("trace_observations", observations_url)
         
         # 404 오류면 트레이스 내에 포함된 observations 필드 확인
         if obs_response.status_code == 404:
@@ -118,70 +213,354 @@ def fetch_langfuse_observations(trace_id):
             # 1) 다른 엔드포인트 시도 - spens, generations 등
             alternatives = ["observations", "spans", "generations", "scores"]
             for endpoint in alternatives:
+                LANGFUSE_OBSERVATION_FALLBACKS.inc(stage=f"alt_{endpoint}")
                 alt_url = f"{host}/api/public/traces/{trace_id}/{endpoint}"
-                print(f"대체 엔드포인트 시도: {alt_url}")
-                alt_response = requests.get(alt_url, auth=auth, headers=headers)
+                alt_response = _langfuse_get(f"trace_{endpoint}_fallback", alt_url)
                 
                 if alt_response.status_code == 200:
                     try:
-                        result = alt_response.json().get("data", [])
-                        print(f"대체 엔드포인트 {endpoint}에서 {len(result)}개의 데이터를 찾았습니다.")
+                        result = _parse_body(alt_response).get("data", [])
+                        logger.debug("대체 엔드포인트 %s에서 %d개의 데이터를 찾았습니다.", endpoint, len(result))
                         return result
                     except:
                         pass
             
             # 2) JSON 응답을 파싱해보기
-            print("직접 트레이스 데이터에서 관찰 정보 추출 시도 중")
+            LANGFUSE_OBSERVATION_FALLBACKS.inc(stage="trace_data")
             if "data" in trace_data:
                 trace_details = trace_data.get("data", {})
                 if "observations" in trace_details:
                     observations = trace_details.get("observations", [])
-                    print(f"트레이스 데이터에서 {len(observations)}개의 관찰 데이터를 추출했습니다.")
+                    logger.debug("트레이스 데이터에서 %d개의 관찰 데이터를 추출했습니다.", len(observations))
                     return observations
             
             # 3) 마지막 시도: JSON 데이터를 직접 참조해서 사용
-            print("제공된 JSON 샘플 기반 관찰 데이터 표시")
+            LANGFUSE_OBSERVATION_FALLBACKS.inc(stage="sample")
             if trace_id in sample_observations:
-                print(f"샘플 데이터에서 관찰 데이터를 찾았습니다.")
+                logger.debug("샘플 데이터에서 관찰 데이터를 찾았습니다.")
                 return sample_observations[trace_id]
             
             # 대체 방법: 모든 관찰 데이터를 가져와서 필터링
-            all_observations_url = f"{host}/api/public/observations?traceId={trace_id}"
-            print(f"모든 관찰 데이터에서 필터링 시도: {all_observations_url}")
-            all_obs_response = requests.get(all_observations_url, auth=auth, headers=headers)
+            LANGFUSE_OBSERVATION_FALLBACKS.inc(stage="observations_filter")
+            all_observations_url = f"{host}/api/public/observations"
+            all_obs_response = _langfuse_get("observations_filter_fallback", all_observations_url, params={"traceId": trace_id})
             
             if all_obs_response.status_code == 200:
                 try:
-                    result = all_obs_response.json().get("data", [])
+                    result = _parse_body(all_obs_response).get("data", [])
                     filtered_result = [obs for obs in result if obs.get("traceId") == trace_id]
-                    print(f"필터링으로 {len(filtered_result)}개의 관찰 데이터를 찾았습니다.")
+                    logger.debug("필터링으로 %d개의 관찰 데이터를 찾았습니다.", len(filtered_result))
                     return filtered_result
                 except:
                     pass
             
-            print(f"관찰 데이터를 찾지 못했습니다. 트레이스 ID: {trace_id}")
+            LANGFUSE_OBSERVATION_FALLBACKS.inc(stage="exhausted")
+            logger.warning("관찰 데이터를 찾지 못했습니다. 트레이스 ID: %s", trace_id)
             return []
             
         # 정상 응답인 경우 데이터 반환
         obs_response.raise_for_status()
-        result = obs_response.json().get("data", [])
-        print(f"가져온 관찰 데이터 수: {len(result)}")
+        result = _parse_body(obs_response).get("data", [])
+        logger.debug("가져온 관찰 데이터 수: %d", len(result))
         return result
             
     except Exception as e:
-        print(f"랭퓨즈 관찰 데이터 조회 실패: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"응답 상태: {e.response.status_code}")
-            print(f"응답 내용: {e.response.text}")
-            
-            # 404 에러의 경우 디버깅 정보 추가 제공
-            if hasattr(e, 'response') and e.response.status_code == 404:
-                print(f"404 오류: 트레이스 ID {trace_id}에 대한 관찰 데이터를 찾을 수 없습니다.")
-                print(f"트레이스 ID가 올바른지, 그리고 해당 트레이스에 관찰 데이터가 있는지 확인하세요.")
+        _log_request_error("랭퓨즈 관찰 데이터 조회 실패", e)
+        
+        # 404 에러의 경우 디버깅 정보 추가 제공
+        if getattr(e, 'response', None) is not None and e.response.status_code == 404:
+            logger.warning("404 오류: 트레이스 ID %s에 대한 관찰 데이터를 찾을 수 없습니다.", trace_id)
         
-        import traceback
-        print(traceback.format_exc())
+        logger.debug("관찰 데이터 조회 예외", exc_info=True)
+        return []
+
+def fetch_langfuse_generations(from_time, to_time, page_size=100):
+    """기간 내 GENERATION 관찰 데이터를 페이지 단위로 모두 가져옵니다
+
+    집계 결과가 캐시되므로 일부 페이지만 가져온 상태로 반환하지 않도록 실패 시 예외를 그대로 전달합니다.
+    """
+    if not _credentials_configured():
+        logger.warning("랭퓨즈 API 자격 증명이 설정되지 않았습니다.")
         return []
+    
+    url = _api_url("/api/public/observations")
+    
+    generations = []
+    page = 1
+    while True:
+        params = {
+            "type": "GENERATION",
+            "fromStartTime": from_time.isoformat(),
+            "toStartTime": to_time.isoformat(),
+            "limit": page_size,
+            "page": page
+        }
+        response = _langfuse_get("generations", url, params=params)
+        response.raise_for_status()
+        
+        # 집계에는 사용량/비용만 필요하므로 input/output은 디코딩하지 않음
+        body = _parse_body(response)
+        data = body.get("data", [])
+        generations.extend(data)
+        
+        total_pages = body.get("meta", {}).get("totalPages")
+        if not data or (total_pages is not None and page >= total_pages) or (total_pages is None and len(data) < page_size):
+            break
+        page += 1
+    
+    logger.debug("가져온 GENERATION 수: %d (%s ~ %s)", len(generations), from_time, to_time)
+    return generations
+
+def _tag_project(traces):
+    """트레이스에 현재 프로젝트 이름을 붙이고, 관찰 데이터를 같은 프로젝트에서 가져오도록 기록합니다"""
+    project = current_project()
+    for trace in traces:
+        trace["project"] = project.name
+        remember_trace_project(trace.get("id"), project.name)
+    return traces
+
+def fetch_cached_traces(limit=100, days=7, refresh=False):
+    """공유 캐시를 먼저 확인하고, 없으면 랭퓨즈에서 최근 트레이스를 가져와 캐시에 저장합니다 (현재 프로젝트)"""
+    cache = current_project().trace_list_cache
+    key = (limit, days)
+    traces = None if refresh else cache.get(key)
+    if traces is None:
+        traces = _tag_project(fetch_langfuse_traces(limit=limit, days=days))
+        if traces:
+            cache.set(key, traces)
+            archive_trace_list(traces)
+    return traces
+
+def iter_cached_trace_pages(limit=100, days=7):
+    """캐시된 트레이스 목록이 있으면 한 번에, 없으면 페이지 단위로 반환하고 모두 받으면 캐시에 저장합니다 (현재 프로젝트)"""
+    cache = current_project().trace_list_cache
+    key = (limit, days)
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+    
+    traces = []
+    for page in iter_langfuse_trace_pages(limit=limit, days=days):
+        _tag_project(page)
+        traces.extend(page)
+        # 이름/시각은 페이지마다 아카이브에 기록 (본문은 관찰 데이터를 가져올 때 색인)
+        archive_trace_list(page)
+        yield page
+    
+    # 중간에 취소된 경우에는 여기까지 오지 않으므로 완전한 목록만 캐시됨
+    if traces:
+        cache.set(key, traces)
+
+def _trace_time(trace):
+    return trace.get("timestamp") or ""
+
+def merge_traces_by_time(*trace_lists):
+    """최신순으로 정렬된 트레이스 목록들을 하나의 최신순 목록으로 병합합니다"""
+    return list(heapq.merge(*trace_lists, key=_trace_time, reverse=True))
+
+def iter_project_trace_pages(names, limit=100, days=7, errors=None):
+    """여러 프로젝트의 최근 트레이스 목록을 동시에 가져오며 도착하는 대로 (프로젝트 이름, 페이지)를 반환합니다
+
+    프로젝트마다 최대 limit개를 가져옵니다. 프로젝트가 하나면 스레드 없이 가져오고 요청 실패 시 예외를 전달하며,
+    여러 개면 실패한 프로젝트만 건너뛰고 errors(dict)에 {프로젝트 이름: 예외}로 기록합니다.
+    """
+    projects = [get_project(name) for name in dict.fromkeys(names)]
+    if len(projects) == 1:
+        with use_project(projects[0]):
+            for page in iter_cached_trace_pages(limit=limit, days=days):
+                yield projects[0].name, page
+        return
+    
+    pages = queue.Queue()
+    stop = threading.Event()
+    done = object()
+    
+    def fetch_project(project):
+        try:
+            with use_project(project):
+                for page in iter_cached_trace_pages(limit=limit, days=days):
+                    # 소비하는 쪽이 중단되면 남은 페이지는 요청하지 않음
+                    if stop.is_set():
+                        return
+                    pages.put((project.name, page))
+        except Exception as e:
+            _log_request_error(f"랭퓨즈 트레이스 조회 실패 ({project.name})", e)
+            if errors is not None:
+                errors[project.name] = e
+        finally:
+            pages.put(done)
+    
+    executor = ThreadPoolExecutor(max_workers=len(projects), thread_name_prefix="trace-list")
+    try:
+        # 현재 리런의 계측 컨텍스트를 작업 스레드에도 전달
+        for project in projects:
+            executor.submit(contextvars.copy_context().run, fetch_project, project)
+        remaining = len(projects)
+        while remaining:
+            item = pages.get()
+            if item is done:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        # 리런 중단 등으로 도중에 닫혀도 남은 요청을 기다리지 않음
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def fetch_traces_across_projects(names, limit=100, days=7):
+    """여러 프로젝트의 최근 트레이스를 동시에 가져와 시각 순으로 병합한 최신 limit개를 반환합니다"""
+    by_project = {}
+    for name, page in iter_project_trace_pages(names, limit=limit, days=days, errors={}):
+        by_project.setdefault(name, []).extend(page)
+    return merge_traces_by_time(*by_project.values())[:limit]
+
+class TraceListLoader(threading.Thread):
+    """여러 프로젝트의 트레이스 목록을 백그라운드에서 가져와 도착하는 대로 병합하는 스레드
+
+    화면은 리런마다 snapshot()으로 지금까지 받은 최신 limit개를 읽으므로, 조회가 끝나기 전에도 트레이스를 고를 수 있습니다.
+    프로젝트별 페이지는 최신순이라 병합할 때마다 limit개로 잘라도 최종 결과가 바뀌지 않습니다.
+    """
+
+    def __init__(self, names, limit=100, days=7):
+        super().__init__(name="trace-list-loader", daemon=True)
+        self.names = list(names)
+        self.limit = limit
+        self.days = days
+        self.errors = {}
+        self.error = None
+        self.cancelled = False
+        self._traces = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        # 현재 리런의 계측 컨텍스트를 스레드에도 전달
+        self._context = contextvars.copy_context()
+
+    def run(self):
+        self._context.run(self._load)
+
+    def _load(self):
+        pages = iter_project_trace_pages(self.names, limit=self.limit, days=self.days, errors=self.errors)
+        try:
+            for _, page in pages:
+                if self._stop_event.is_set():
+                    break
+                with self._lock:
+                    self._traces = merge_traces_by_time(self._traces, page)[:self.limit]
+        except Exception as e:
+            self.error = e
+        finally:
+            # 취소된 경우 남은 프로젝트 요청도 중단
+            pages.close()
+
+    def snapshot(self):
+        """지금까지 받은 트레이스 (최신순, 최대 limit개)"""
+        with self._lock:
+            return list(self._traces)
+
+    def cancel(self):
+        self.cancelled = True
+        self._stop_event.set()
+
+def observation_cache_for(trace_id):
+    """트레이스의 관찰 데이터를 보관하는 공유 캐시 (프로젝트를 모르면 현재 프로젝트의 캐시)"""
+    return (known_trace_project(trace_id) or current_project()).observation_cache
+
+def _fetch_trace(trace_id):
+    """현재 프로젝트에서 트레이스 상세 본문을 가져옵니다 (없거나 실패하면 None)"""
+    if not _credentials_configured():
+        return None
+    try:
+        response = _langfuse_get("trace_lookup", _api_url(f"/api/public/traces/{trace_id}"))
+        if response.status_code != 200:
+            return None
+        return _parse_body(response)
+    except (requests.RequestException, ValueError):
+        return None
+
+def _known_trace_project(trace_id):
+    """네트워크 요청 없이 알 수 있는 트레이스의 프로젝트 (모르면 None)
+
+    알려진 프로젝트, use_project로 지정한 프로젝트, 관찰 데이터를 캐시한 프로젝트 순으로 확인합니다.
+    """
+    project = known_trace_project(trace_id) or explicit_project()
+    if project is not None or len(PROJECTS) == 1:
+        return project or DEFAULT_PROJECT
+    return next((project for project in PROJECTS.values() if trace_id in project.observation_cache), None)
+
+def probe_trace_project(trace_id):
+    """모든 프로젝트에 동시에 트레이스를 요청해 (프로젝트, 트레이스 상세 본문)을 반환합니다
+
+    어디에도 없으면 (기본 프로젝트, None)을 반환합니다.
+    """
+    def probe(project):
+        with use_project(project):
+            return _fetch_trace(trace_id)
+    
+    with ThreadPoolExecutor(max_workers=len(PROJECTS), thread_name_prefix="trace-lookup") as executor:
+        futures = {executor.submit(contextvars.copy_context().run, probe, project): project for project in PROJECTS.values()}
+        for future in as_completed(futures):
+            trace_data = future.result()
+            if trace_data is not None:
+                project = futures[future]
+                remember_trace_project(trace_id, project.name)
+                return project, trace_data
+    return DEFAULT_PROJECT, None
+
+def fetch_cached_observations(trace_id, refresh=False):
+    """공유 캐시를 먼저 확인하고, 없으면 랭퓨즈에서 관찰 데이터를 가져와 캐시에 저장합니다 (트레이스가 속한 프로젝트)
+
+    refresh면 캐시를 건너뛰고 다시 가져와 교체합니다 (그동안 다른 요청은 기존 항목을 계속 사용).
+    """
+    project = _known_trace_project(trace_id)
+    observations = project.observation_cache.get(trace_id) if project is not None and not refresh else None
+    if observations is None:
+        # 내보낸 JSONL 아카이브에 있으면 오프셋 색인으로 해당 레코드만 읽음 (프로젝트를 모르는 트레이스도 네트워크 요청 없음)
+        record = load_exported_record(trace_id)
+        observations = (record or {}).get("observations") or None
+        if observations:
+            if project is None:
+                project = PROJECTS.get(record.get("project")) or DEFAULT_PROJECT
+                remember_trace_project(trace_id, record.get("project"))
+        else:
+            trace_data = None
+            if project is None:
+                # 여러 프로젝트 중 어디에 있는지 모르면 동시에 확인하고, 받은 트레이스 상세 본문을 재사용
+                project, trace_data = probe_trace_project(trace_id)
+            with use_project(project):
+                observations = fetch_langfuse_observations(trace_id, trace_data=trace_data)
+        # 빈 결과는 일시적 오류일 수 있으므로 캐시하지 않음
+        if observations:
+            # 입력은 지연 디코딩 상태로 보관 (시스템 프롬프트는 find_system_prompts가 읽을 때 공유 문자열로 바꿈)
+            project.observation_cache.set(trace_id, observations)
+    # 처음 보는 트레이스면 시스템 프롬프트 버전은 카탈로그에, 질문/답변/시스템 프롬프트는 아카이브에 백그라운드로 색인
+    if observations:
+        index_trace_async(trace_id, observations)
+    return observations
+
+def fetch_observations_batch(trace_ids, max_workers=LANGFUSE_MAX_WORKERS, on_progress=None, refresh=False):
+    """여러 트레이스의 관찰 데이터를 스레드 풀로 동시에 가져옵니다
+
+    결과는 {트레이스 ID: 관찰 데이터 목록} 형식이며, on_progress(완료 수, 전체 수)로 진행 상황을 알립니다.
+    refresh면 캐시에 있어도 다시 가져옵니다.
+    """
+    trace_ids = list(dict.fromkeys(trace_ids))
+    results = {}
+    if not trace_ids:
+        return results
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(trace_ids)))) as executor:
+        # 현재 리런의 계측 컨텍스트를 작업 스레드에도 전달
+        futures = {
+            executor.submit(contextvars.copy_context().run, fetch_cached_observations, trace_id, refresh): trace_id
+            for trace_id in trace_ids
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if on_progress:
+                on_progress(done, len(trace_ids))
+    
+    return results
 
 # 예시 관찰 데이터 (개발 시 샘플 데이터로 사용)
 sample_observations = {
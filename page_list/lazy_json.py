@@ -0,0 +1,257 @@
+"""
+지연 JSON 파싱 모듈 - 큰 응답 본문을 요소 단위로 나눠 파싱하고 무거운 필드는 접근할 때 디코딩하는 기능
+"""
+
+import re
+import json
+import threading
+
+# 접근할 때까지 디코딩을 미루는 필드 (관찰 데이터에서 대부분의 용량을 차지)
+DEFAULT_LAZY_KEYS = ("input", "output")
+
+# 문자열/배열/객체 경계 문자
+_STRUCTURE_RE = re.compile(r'["\[\]{}]')
+# 숫자, true/false/null
+_SCALAR_RE = re.compile(r'[^,\]}\s]+')
+_WHITESPACE_RE = re.compile(r'\s*')
+
+_decoder = json.JSONDecoder()
+
+def _skip_whitespace(text, pos):
+    return _WHITESPACE_RE.match(text, pos).end()
+
+def _string_end(text, pos):
+    """pos의 따옴표로 시작하는 JSON 문자열 리터럴의 끝 위치를 찾습니다
+
+    긴 문자열에서는 정규식보다 str.find가 훨씬 빠르므로, 닫는 따옴표 후보를 찾은 뒤
+    바로 앞의 역슬래시 개수로 이스케이프 여부만 확인합니다.
+    """
+    cursor = pos + 1
+    while True:
+        quote = text.find('"', cursor)
+        if quote < 0:
+            raise ValueError(f"JSON 문자열이 닫히지 않았습니다 (위치 {pos})")
+        backslash = quote - 1
+        while text[backslash] == "\\":
+            backslash -= 1
+        if (quote - 1 - backslash) % 2 == 0:
+            return quote + 1
+        cursor = quote + 1
+
+def _value_end(text, pos):
+    """pos에서 시작하는 JSON 값의 끝 위치를 디코딩 없이 찾습니다"""
+    char = text[pos]
+    if char == '"':
+        return _string_end(text, pos)
+    if char not in "[{":
+        return _SCALAR_RE.match(text, pos).end()
+
+    depth = 0
+    cursor = pos
+    while True:
+        match = _STRUCTURE_RE.search(text, cursor)
+        if match is None:
+            raise ValueError(f"JSON 값이 닫히지 않았습니다 (위치 {pos})")
+        char = match.group()
+        if char == '"':
+            cursor = _string_end(text, match.start())
+            continue
+        depth += 1 if char in "[{" else -1
+        cursor = match.end()
+        if depth == 0:
+            return cursor
+
+def iter_object_members(text, pos=0):
+    """pos의 JSON 객체에서 (키, 값 시작, 값 끝)을 순서대로 반환합니다"""
+    pos = _skip_whitespace(text, pos)
+    if text[pos] != "{":
+        raise ValueError(f"JSON 객체가 아닙니다 (위치 {pos})")
+    pos = _skip_whitespace(text, pos + 1)
+    if text[pos] == "}":
+        return
+
+    while True:
+        key_end = _string_end(text, pos)
+        key = json.loads(text[pos:key_end])
+        pos = _skip_whitespace(text, key_end)
+        value_start = _skip_whitespace(text, pos + 1)  # ':' 다음
+        value_end = _value_end(text, value_start)
+        yield key, value_start, value_end
+
+        pos = _skip_whitespace(text, value_end)
+        if text[pos] == "}":
+            return
+        pos = _skip_whitespace(text, pos + 1)  # ',' 다음
+
+def iter_array_elements(text, pos=0):
+    """pos의 JSON 배열에서 각 요소의 (시작, 끝) 위치를 순서대로 반환합니다"""
+    pos = _skip_whitespace(text, pos)
+    if text[pos] != "[":
+        raise ValueError(f"JSON 배열이 아닙니다 (위치 {pos})")
+    pos = _skip_whitespace(text, pos + 1)
+    if text[pos] == "]":
+        return
+
+    while True:
+        end = _value_end(text, pos)
+        yield pos, end
+        pos = _skip_whitespace(text, end)
+        if text[pos] == "]":
+            return
+        pos = _skip_whitespace(text, pos + 1)
+
+# 아직 디코딩하지 않은 필드 자리에 들어가는 표식 (키 목록과 길이는 일반 dict와 동일하게 유지)
+_PENDING = object()
+
+# 공유 캐시에 든 객체를 여러 세션 스레드가 동시에 읽을 수 있으므로 디코딩은 잠금 안에서 처리
+_decode_lock = threading.Lock()
+
+class LazyJSONObject(dict):
+    """무거운 필드를 원본 JSON 문자열로 보관하다가 처음 접근할 때 디코딩하는 dict"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._raw = {}
+
+    def set_raw(self, key, raw):
+        """디코딩하지 않은 JSON 문자열을 필드 값으로 등록합니다"""
+        self._raw[key] = raw
+        super().__setitem__(key, _PENDING)
+
+    @property
+    def raw_size(self):
+        """아직 디코딩하지 않은 필드의 원본 문자열 길이 합"""
+        return sum(len(raw) for raw in list(self._raw.values()))
+
+    def _decode(self, key):
+        with _decode_lock:
+            raw = self._raw.pop(key, None)
+            if raw is not None:
+                value = json.loads(raw)
+                super().__setitem__(key, value)
+                return value
+            return super().__getitem__(key)
+
+    def _decode_all(self):
+        for key in list(self._raw):
+            self._decode(key)
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        return self._decode(key) if value is _PENDING else value
+
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        return self._decode(key) if value is _PENDING else value
+
+    def __setitem__(self, key, value):
+        self._raw.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._raw.pop(key, None)
+        super().__delitem__(key)
+
+    def pop(self, key, *default):
+        if key in self._raw:
+            self._decode(key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        if value is _PENDING:
+            with _decode_lock:
+                value = json.loads(self._raw.pop(key))
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def update(self, *args, **kwargs):
+        # dict.update는 __setitem__을 거치지 않으므로 원본 문자열이 남지 않도록 하나씩 넣음
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __or__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+        merged = self.copy()
+        merged.update(other)
+        return merged
+
+    def __iter__(self):
+        # 재정의해 두어야 dict(obj), {**obj} 가 내부 저장소 대신 __getitem__ 경로를 사용함
+        return super().__iter__()
+
+    def values(self):
+        self._decode_all()
+        return super().values()
+
+    def items(self):
+        self._decode_all()
+        return super().items()
+
+    def copy(self):
+        self._decode_all()
+        return dict(super().items())
+
+    def detached_copy(self):
+        """원본은 지연 상태로 둔 채 모든 필드를 디코딩한 일반 dict 사본을 반환합니다"""
+        with _decode_lock:
+            raw = dict(self._raw)
+            items = list(super().items())
+        return {
+            key: json.loads(raw[key]) if key in raw else (self[key] if value is _PENDING else value)
+            for key, value in items
+        }
+
+    def __eq__(self, other):
+        self._decode_all()
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._decode_all()
+        return super().__repr__()
+
+    def __reduce__(self):
+        self._decode_all()
+        return (dict, (dict(super().items()),))
+
+def detach_observations(observations):
+    """지연 디코딩 객체는 원본 문자열에서 파싱한 사본으로 바꾼 목록을 반환합니다 (캐시에 든 객체는 그대로 지연 상태)"""
+    return [obs.detached_copy() if isinstance(obs, LazyJSONObject) else obs for obs in observations]
+
+def parse_lazy_object(text, pos=0, lazy_keys=DEFAULT_LAZY_KEYS, array_keys=()):
+    """JSON 객체를 LazyJSONObject로 파싱합니다
+
+    lazy_keys의 값은 원본 문자열로 보관하고, array_keys의 배열은 요소마다 같은 방식으로 파싱합니다.
+    """
+    result = LazyJSONObject()
+    for key, start, end in iter_object_members(text, pos):
+        if key in lazy_keys and text[start] in "[{\"":
+            result.set_raw(key, text[start:end])
+        elif key in array_keys and text[start] == "[":
+            result[key] = [
+                parse_lazy_object(text, element_start, lazy_keys) if text[element_start] == "{"
+                else _decoder.raw_decode(text, element_start)[0]
+                for element_start, _ in iter_array_elements(text, start)
+            ]
+        else:
+            result[key] = _decoder.raw_decode(text, start)[0]
+    return result
+
+def loads_lazy(text, array_keys=("observations", "data"), lazy_keys=DEFAULT_LAZY_KEYS):
+    """응답 본문을 파싱합니다. 최상위가 객체가 아니면 일반 JSON으로 디코딩합니다"""
+    pos = _skip_whitespace(text, 0)
+    if pos < len(text) and text[pos] == "{":
+        return parse_lazy_object(text, pos, lazy_keys, array_keys)
+    return json.loads(text)
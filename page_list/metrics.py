@@ -0,0 +1,298 @@
+"""
+메트릭 레지스트리 모듈 - 프로세스 내 카운터/게이지/히스토그램과 Prometheus 텍스트 노출 기능
+"""
+
+import os
+import time
+import tempfile
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# 기본 히스토그램 버킷 (초 단위)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape_label(value):
+    """Prometheus 라벨 값의 특수 문자를 이스케이프합니다"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(label_names, label_values, extra=None):
+    """라벨 이름과 값을 {a="x",b="y"} 형식으로 변환합니다"""
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.extend(f'{name}="{_escape_label(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    """메트릭 값을 Prometheus 숫자 표기로 변환합니다"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    """라벨별 값을 보관하는 메트릭 공통 클래스"""
+
+    metric_type = ""
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} 메트릭의 라벨은 {self.label_names} 이어야 합니다: {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self):
+        """(접미사, 라벨 값, 추가 라벨, 값) 목록을 반환합니다"""
+        with self._lock:
+            return [("", key, None, value) for key, value in sorted(self._values.items())]
+
+class Counter(_Metric):
+    """단조 증가하는 카운터"""
+
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("카운터는 감소할 수 없습니다")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    """임의로 증감할 수 있는 게이지"""
+
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+class Histogram(_Metric):
+    """누적 버킷 기반 히스토그램"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._values[key] = state
+            state["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def time(self, **labels):
+        """블록의 소요 시간(초)을 관측하는 컨텍스트 매니저를 반환합니다"""
+        return _HistogramTimer(self, labels)
+
+    def samples(self):
+        result = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), state["counts"]):
+                    cumulative += count
+                    result.append(("_bucket", key, (("le", _format_value(bound)),), cumulative))
+                result.append(("_sum", key, None, state["sum"]))
+                result.append(("_count", key, None, state["count"]))
+        return result
+
+class _HistogramTimer:
+    """히스토그램에 소요 시간을 기록하는 컨텍스트 매니저"""
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+class MetricsRegistry:
+    """이름으로 메트릭을 등록하고 Prometheus 텍스트로 내보내는 레지스트리"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, label_names, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, label_names, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} 메트릭이 다른 유형으로 이미 등록되어 있습니다")
+            return metric
+
+    def counter(self, name, documentation, label_names=()):
+        return self._register(Counter, name, documentation, label_names)
+
+    def gauge(self, name, documentation, label_names=()):
+        return self._register(Gauge, name, documentation, label_names)
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, label_names, buckets=buckets)
+
+    def render_prometheus(self):
+        """등록된 모든 메트릭을 Prometheus 텍스트 형식으로 반환합니다"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            for suffix, key, extra, value in metric.samples():
+                labels = _format_labels(metric.label_names, key, extra)
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+# 프로세스 전역 레지스트리
+REGISTRY = MetricsRegistry()
+
+# 앱 전반에서 사용하는 메트릭
+LANGFUSE_REQUESTS = REGISTRY.counter(
+    "prompt_nest_langfuse_requests_total", "랭퓨즈 API 요청 수", ("endpoint", "status"))
+LANGFUSE_REQUEST_SECONDS = REGISTRY.histogram(
+    "prompt_nest_langfuse_request_seconds", "랭퓨즈 API 요청 지연 시간(초)", ("endpoint",))
+LANGFUSE_OBSERVATION_FALLBACKS = REGISTRY.counter(
+    "prompt_nest_langfuse_observation_fallbacks_total", "관찰 데이터 조회 시 대체 경로 사용 횟수", ("stage",))
+CACHE_REQUESTS = REGISTRY.counter(
+    "prompt_nest_cache_requests_total", "캐시 조회 수", ("cache", "result"))
+CACHE_EVICTIONS = REGISTRY.counter(
+    "prompt_nest_cache_evictions_total", "용량 초과로 제거된 캐시 항목 수", ("cache",))
+FAVORITES_WRITES = REGISTRY.counter(
+    "prompt_nest_favorites_writes_total", "즐겨찾기 파일 쓰기 횟수", ("operation",))
+FAVORITES_WRITE_SECONDS = REGISTRY.histogram(
+    "prompt_nest_favorites_write_seconds", "즐겨찾기 파일 쓰기 소요 시간(초)")
+PAGE_RENDER_SECONDS = REGISTRY.histogram(
+    "prompt_nest_page_render_seconds", "페이지 렌더링 소요 시간(초)", ("page",))
+
+def record_cache_lookup(cache, hit):
+    """캐시 적중/미적중을 기록합니다"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """/metrics 경로로 레지스트리를 노출하는 HTTP 핸들러"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics: " + format, *args)
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """메트릭 HTTP 서버를 백그라운드 스레드로 시작합니다 (프로세스당 한 번)"""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning("메트릭 서버를 시작하지 못했습니다 (%s:%s): %s", host, port, e)
+            return None
+        thread = threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True)
+        thread.start()
+        logger.info("메트릭 서버 시작: http://%s:%s/metrics", host, port)
+        return _server
+
+def write_metrics_file(path):
+    """레지스트리를 Prometheus 텍스트 파일로 원자적으로 기록합니다 (node_exporter textfile 형식)
+
+    임시 파일 이름을 매번 새로 만들므로 여러 곳에서 동시에 기록해도 서로의 임시 파일을 덮어쓰지 않습니다.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, prefix=".metrics-",
+                                     suffix=".tmp", delete=False) as f:
+        f.write(REGISTRY.render_prometheus())
+        tmp_path = f.name
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class MetricsFileWriter(threading.Thread):
+    """주기적으로 메트릭 파일을 기록하는 데몬 스레드 (UI 사용 여부와 관계없이 갱신)"""
+
+    def __init__(self, path, interval):
+        super().__init__(name="metrics-file-writer", daemon=True)
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                write_metrics_file(self.path)
+            except OSError as e:
+                logger.warning("메트릭 파일을 기록하지 못했습니다 (%s): %s", self.path, e)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+_file_writer = None
+
+def start_metrics_file_writer(path, interval):
+    """메트릭 파일 기록 스레드를 시작합니다 (프로세스당 한 번)"""
+    global _file_writer
+    with _server_lock:
+        if _file_writer is None or not _file_writer.is_alive():
+            _file_writer = MetricsFileWriter(path, interval)
+            _file_writer.start()
+            logger.info("메트릭 파일 기록 시작: %s (주기: %s초)", path, interval)
+        return _file_writer
@@ -0,0 +1,138 @@
+"""
+유사 프롬프트 탐지 모듈 - MinHash 서명과 LSH 밴딩으로 문장 몇 개만 다른 프롬프트를 묶는 기능
+"""
+
+import re
+import zlib
+from functools import lru_cache
+from collections import defaultdict
+
+import numpy as np
+
+# 서명 길이 = 밴드 수 x 밴드당 행 수 (16 x 8 이면 자카드 유사도 약 0.7부터 후보가 됨)
+NUM_PERM = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+# 문자 n-그램 길이 (띄어쓰기가 불규칙한 한국어 프롬프트에도 적용되도록 단어 대신 문자 단위)
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# 프로세스마다 같은 서명이 나오도록 고정 시드 사용
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def _normalize(text):
+    return _WHITESPACE_RE.sub(" ", str(text)).strip().lower()
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """정규화한 텍스트의 문자 n-그램을 32비트 해시 배열로 변환합니다"""
+    text = _normalize(text)
+    if len(text) <= size:
+        grams = {text}
+    else:
+        grams = {text[i:i + size] for i in range(len(text) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+@lru_cache(maxsize=4096)
+def minhash_signature(text):
+    """텍스트의 MinHash 서명 (길이 NUM_PERM, 같은 텍스트는 다시 계산하지 않음)"""
+    hashes = shingle_hashes(text)
+    # (순열 수, n-그램 수) 행렬에서 순열마다 최솟값 (uint64 곱셈의 오버플로는 의도된 동작)
+    with np.errstate(over="ignore"):
+        permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    signature = np.bitwise_and(permuted, _MAX_HASH).min(axis=1)
+    signature.setflags(write=False)
+    return signature
+
+def estimate_similarity(signature_a, signature_b):
+    """두 서명의 추정 자카드 유사도"""
+    return float(np.mean(signature_a == signature_b))
+
+class MinHashLSH:
+    """LSH 밴딩 색인 - 같은 밴드 버킷에 들어간 항목만 후보로 비교합니다"""
+
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+        self._signatures = {}
+        self._buckets = [defaultdict(list) for _ in range(LSH_BANDS)]
+
+    def _band_keys(self, signature):
+        return [signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes() for band in range(LSH_BANDS)]
+
+    def add(self, key, text):
+        signature = minhash_signature(text)
+        self._signatures[key] = signature
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band][band_key].append(key)
+
+    def query(self, text, exclude=None):
+        """유사도가 기준 이상인 (키, 유사도) 목록을 유사도 순으로 반환합니다"""
+        signature = minhash_signature(text)
+        candidates = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        candidates.discard(exclude)
+
+        matches = []
+        for key in candidates:
+            similarity = estimate_similarity(signature, self._signatures[key])
+            if similarity >= self.threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def similar_pairs(self):
+        """버킷을 공유하는 항목 쌍 중 유사도가 기준 이상인 (키, 키, 유사도) 목록"""
+        candidate_pairs = set()
+        for buckets in self._buckets:
+            for keys in buckets.values():
+                if len(keys) < 2:
+                    continue
+                for i, key_a in enumerate(keys):
+                    for key_b in keys[i + 1:]:
+                        if key_a != key_b:
+                            candidate_pairs.add((key_a, key_b) if str(key_a) < str(key_b) else (key_b, key_a))
+
+        pairs = []
+        for key_a, key_b in candidate_pairs:
+            similarity = estimate_similarity(self._signatures[key_a], self._signatures[key_b])
+            if similarity >= self.threshold:
+                pairs.append((key_a, key_b, similarity))
+        return pairs
+
+    def clusters(self):
+        """유사한 항목을 연결 요소로 묶어 2개 이상인 묶음만 반환합니다 (큰 묶음 순)"""
+        parent = {}
+
+        def find(key):
+            root = key
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while key != root:
+                parent[key], key = root, parent.get(key, key)
+            return root
+
+        for key_a, key_b, _ in self.similar_pairs():
+            parent.setdefault(key_a, key_a)
+            parent.setdefault(key_b, key_b)
+            root_a, root_b = find(key_a), find(key_b)
+            if root_a != root_b:
+                parent[root_b] = root_a
+
+        groups = defaultdict(list)
+        for key in parent:
+            groups[find(key)].append(key)
+        return sorted((members for members in groups.values() if len(members) > 1), key=len, reverse=True)
+
+def find_duplicate_clusters(items, threshold=0.8):
+    """[(키, 텍스트)] 목록에서 유사 프롬프트 묶음을 찾습니다"""
+    index = MinHashLSH(threshold)
+    for key, text in items:
+        if text:
+            index.add(key, text)
+    return index.clusters()
@@ -0,0 +1,137 @@
+"""
+리런 프로파일러 모듈 - 페이지 함수와 주요 구간의 실행 시간을 측정하고 사이드바에 표시하는 기능
+"""
+
+import os
+import time
+import marshal
+import cProfile
+import pstats
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+# 현재 프로파일링 중인 리런 기록
+_current_profile = ContextVar("page_profile", default=None)
+
+# 사이드바에 표시할 핫스팟 수
+TOP_HOTSPOTS = 10
+
+@contextmanager
+def profile_section(name):
+    """프로파일링 모드에서 구간의 벽시계 시간과 호출 횟수를 기록합니다"""
+    run = _current_profile.get()
+    if run is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        section = run["sections"].setdefault(name, {"calls": 0, "wall_ms": 0.0})
+        section["calls"] += 1
+        section["wall_ms"] += (time.perf_counter() - start) * 1000
+
+def run_profiled(title, func, history_size):
+    """cProfile로 페이지 함수를 실행하고 결과를 세션의 최근 리런 기록에 추가합니다"""
+    history = st.session_state.get("profiler_runs")
+    if history is None or history.maxlen != history_size:
+        history = deque(history or [], maxlen=history_size)
+        st.session_state.profiler_runs = history
+
+    run = {
+        "page": title,
+        "started_at": datetime.now().strftime("%H:%M:%S"),
+        "sections": {},
+    }
+    profile = cProfile.Profile()
+    token = _current_profile.set(run)
+    start = time.perf_counter()
+    profile.enable()
+    try:
+        func()
+    finally:
+        # st.rerun() 등으로 페이지가 중단되어도 측정 결과는 남깁니다
+        profile.disable()
+        _current_profile.reset(token)
+        run["wall_ms"] = (time.perf_counter() - start) * 1000
+        run["stats"] = pstats.Stats(profile).stats
+        run["calls"] = sum(nc for _, nc, _, _, _ in run["stats"].values())
+        history.append(run)
+
+def _merge_stats(runs):
+    """여러 리런의 pstats 통계를 하나로 합칩니다"""
+    merged = {}
+    for run in runs:
+        for func, (cc, nc, tt, ct, callers) in run["stats"].items():
+            if func in merged:
+                merged[func] = pstats.add_func_stats(merged[func], (cc, nc, tt, ct, callers))
+            else:
+                merged[func] = (cc, nc, tt, ct, dict(callers))
+    return merged
+
+def _format_func(func):
+    """pstats 함수 키를 '함수 (파일:줄)' 형식으로 변환합니다"""
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+def _hotspots(stats, top_n=TOP_HOTSPOTS):
+    """자체 실행 시간 기준 상위 함수 목록을 반환합니다"""
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:top_n]
+    return pd.DataFrame([{
+        "함수": _format_func(func),
+        "호출": nc,
+        "자체(ms)": round(tt * 1000, 1),
+        "누적(ms)": round(ct * 1000, 1)
+    } for func, (cc, nc, tt, ct, callers) in rows])
+
+def display_profiler_sidebar():
+    """최근 리런의 측정 결과를 사이드바에 표시합니다"""
+    runs = list(st.session_state.get("profiler_runs") or [])
+    if not runs:
+        return
+
+    with st.sidebar:
+        st.markdown("### ⏱️ 리런 프로파일")
+
+        # 리런별 벽시계 시간
+        st.dataframe(pd.DataFrame([{
+            "시각": run["started_at"],
+            "페이지": run["page"],
+            "시간(ms)": round(run["wall_ms"], 1),
+            "함수 호출": run["calls"]
+        } for run in reversed(runs)]), hide_index=True, use_container_width=True)
+
+        # 구간별 합계
+        sections = {}
+        for run in runs:
+            for name, section in run["sections"].items():
+                total = sections.setdefault(name, {"구간": name, "호출": 0, "합계(ms)": 0.0})
+                total["호출"] += section["calls"]
+                total["합계(ms)"] += section["wall_ms"]
+        if sections:
+            st.markdown("**구간별 시간**")
+            section_df = pd.DataFrame(list(sections.values()))
+            section_df["평균(ms)"] = (section_df["합계(ms)"] / section_df["호출"]).round(1)
+            section_df["합계(ms)"] = section_df["합계(ms)"].round(1)
+            st.dataframe(section_df, hide_index=True, use_container_width=True)
+
+        # 핫스팟과 프로파일 파일 다운로드
+        merged = _merge_stats(runs)
+        st.markdown(f"**상위 핫스팟 (최근 {len(runs)}회)**")
+        st.dataframe(_hotspots(merged), hide_index=True, use_container_width=True)
+
+        st.download_button(
+            "프로파일 다운로드 (.prof)",
+            data=marshal.dumps(merged),
+            file_name=f"prompt_nest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof",
+            mime="application/octet-stream",
+            help="pstats / snakeviz 로 열 수 있는 cProfile 통계 파일입니다"
+        )
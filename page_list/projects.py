@@ -0,0 +1,155 @@
+"""
+랭퓨즈 프로젝트 모듈 - 여러 랭퓨즈 프로젝트의 연결 설정, 프로젝트별 연결 풀/캐시, 현재 요청 대상 프로젝트를 관리하는 기능
+"""
+
+import os
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+from .cache import TTLCache
+from .helpers import (
+    LANGFUSE_HOST,
+    LANGFUSE_PROJECT,
+    LANGFUSE_PUBLIC_KEY,
+    LANGFUSE_SECRET_KEY,
+    LANGFUSE_PROJECTS,
+    LANGFUSE_MAX_WORKERS,
+    BATCH_LOOKUP_MAX_WORKERS,
+    OBSERVATION_CACHE_TTL,
+    OBSERVATION_CACHE_MAX_ENTRIES,
+    TRACE_LIST_CACHE_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+# 환경 변수 설정이 없을 때 만드는 기본 프로젝트 이름
+DEFAULT_PROJECT_NAME = "default"
+
+class LangfuseProject:
+    """랭퓨즈 프로젝트 하나의 연결 설정과 프로젝트 전용 연결 풀/공유 캐시
+
+    캐시 이름에 프로젝트 이름을 붙여 같은 트레이스 ID나 조회 조건이 프로젝트끼리 섞이지 않게 합니다.
+    """
+
+    def __init__(self, name, host, project, public_key, secret_key, namespaced=True):
+        self.name = name
+        self.host = host
+        self.project = project
+        self.public_key = public_key
+        self.secret_key = secret_key
+        self._session = None
+        self._session_lock = threading.Lock()
+
+        # 프로젝트가 하나뿐이면 예전과 같은 캐시 이름과 카세트 키를 사용 (메트릭 레이블, 기록한 카세트 유지)
+        self.namespace = name if namespaced else ""
+        suffix = f":{name}" if namespaced else ""
+        self.observation_cache = TTLCache(f"observations{suffix}", max_entries=OBSERVATION_CACHE_MAX_ENTRIES, ttl_seconds=OBSERVATION_CACHE_TTL)
+        self.trace_list_cache = TTLCache(f"traces{suffix}", max_entries=64, ttl_seconds=TRACE_LIST_CACHE_TTL)
+
+    @property
+    def configured(self):
+        return all([self.public_key, self.secret_key, self.project])
+
+    @property
+    def session(self):
+        """프로젝트 전용 HTTP 세션 (연결을 재사용하며 동시 요청 수만큼 연결 풀을 유지)"""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                pool_size = max(LANGFUSE_MAX_WORKERS, BATCH_LOOKUP_MAX_WORKERS)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                # 인증 설정 - HTTPBasicAuth 사용 (공식 문서 방식)
+                # username: Public Key, password: Secret Key
+                session.auth = HTTPBasicAuth(self.public_key, self.secret_key)
+                # 헤더 설정 (압축 응답은 requests가 기본으로 보내는 Accept-Encoding으로 이미 요청됨)
+                session.headers.update({"X-Project-Name": self.project})
+                self._session = session
+            return self._session
+
+    def __repr__(self):
+        return f"LangfuseProject({self.name!r}, {self.host!r})"
+
+def _project_env(name, key, default):
+    return os.getenv(f"LANGFUSE_{name.upper().replace('-', '_')}_{key}", default)
+
+def load_projects(names=LANGFUSE_PROJECTS):
+    """환경 변수에서 프로젝트 설정을 읽습니다 (이름 순서 유지, 첫 프로젝트가 기본 프로젝트)
+
+    프로젝트별 값은 LANGFUSE_<이름>_HOST 등으로 지정하고, 없으면 공통 LANGFUSE_* 값을 사용합니다.
+    """
+    names = [name.strip() for name in str(names or "").split(",") if name.strip()]
+    if not names:
+        return {DEFAULT_PROJECT_NAME: LangfuseProject(
+            DEFAULT_PROJECT_NAME, LANGFUSE_HOST, LANGFUSE_PROJECT, LANGFUSE_PUBLIC_KEY, LANGFUSE_SECRET_KEY,
+            namespaced=False
+        )}
+
+    projects = {}
+    for name in dict.fromkeys(names):
+        projects[name] = LangfuseProject(
+            name,
+            _project_env(name, "HOST", LANGFUSE_HOST),
+            _project_env(name, "PROJECT", LANGFUSE_PROJECT or name),
+            _project_env(name, "PUBLIC_KEY", LANGFUSE_PUBLIC_KEY),
+            _project_env(name, "SECRET_KEY", LANGFUSE_SECRET_KEY),
+            namespaced=len(names) > 1
+        )
+    return projects
+
+# 프로세스 전역 프로젝트 목록
+PROJECTS = load_projects()
+DEFAULT_PROJECT = next(iter(PROJECTS.values()))
+
+# 현재 요청 대상 프로젝트 (스레드 풀 작업에는 copy_context로 전달)
+_current_project = contextvars.ContextVar("langfuse_project", default=None)
+
+def project_names():
+    return list(PROJECTS)
+
+def get_project(name=None):
+    """이름으로 프로젝트를 찾습니다 (이름이 없거나 모르는 이름이면 기본 프로젝트)"""
+    if name is None:
+        return DEFAULT_PROJECT
+    project = PROJECTS.get(name)
+    if project is None:
+        logger.warning("알 수 없는 랭퓨즈 프로젝트 이름이라 기본 프로젝트를 사용합니다: %s", name)
+        return DEFAULT_PROJECT
+    return project
+
+def current_project():
+    return _current_project.get() or DEFAULT_PROJECT
+
+def explicit_project():
+    """use_project로 지정한 프로젝트 (지정하지 않았으면 None)"""
+    return _current_project.get()
+
+@contextmanager
+def use_project(project):
+    """블록 안의 랭퓨즈 요청과 캐시 조회 대상을 지정한 프로젝트(이름 또는 객체)로 바꿉니다"""
+    if not isinstance(project, LangfuseProject):
+        project = get_project(project)
+    token = _current_project.set(project)
+    try:
+        yield project
+    finally:
+        _current_project.reset(token)
+
+# 트레이스 ID가 속한 프로젝트 (트레이스 목록과 즐겨찾기에서 알게 된 것만 기록)
+_trace_projects = TTLCache("trace_projects", max_entries=100000, ttl_seconds=7 * 24 * 3600)
+
+def remember_trace_project(trace_id, project_name):
+    if trace_id and project_name in PROJECTS:
+        _trace_projects.set(trace_id, project_name)
+
+def known_trace_project(trace_id):
+    """트레이스가 속한 것으로 알려진 프로젝트 (모르면 None)"""
+    name = _trace_projects.get(trace_id)
+    return PROJECTS.get(name) if name else None
@@ -0,0 +1,234 @@
+"""
+프롬프트 버전 카탈로그 모듈 - 트레이스에서 찾은 시스템 프롬프트를 노드별 버전(내용 해시)으로 색인하는 기능
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+
+from .helpers import DATA_DIR
+from .extraction import find_system_prompts
+
+logger = logging.getLogger(__name__)
+
+PROMPT_CATALOG_FILE = os.path.join(DATA_DIR, "prompt_catalog.db")
+# 예전 JSON 형식의 카탈로그 (처음 열 때 가져온 뒤 .migrated로 이름을 바꿈)
+LEGACY_PROMPT_CATALOG_FILE = os.path.join(DATA_DIR, "prompt_catalog.json")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    node TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    content TEXT NOT NULL DEFAULT 'null',
+    first_seen TEXT NOT NULL DEFAULT '',
+    last_seen TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (node, hash)
+);
+CREATE TABLE IF NOT EXISTS version_traces (
+    node TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    trace_id TEXT NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (node, hash, trace_id)
+);
+CREATE INDEX IF NOT EXISTS version_traces_trace ON version_traces (trace_id);
+-- 시스템 프롬프트가 없던 트레이스도 다시 스캔하지 않도록 색인한 트레이스를 따로 기록
+CREATE TABLE IF NOT EXISTS indexed_traces (
+    trace_id TEXT PRIMARY KEY
+);
+"""
+
+class PromptCatalog:
+    """프롬프트 버전 -> 트레이스 ID 색인 (SQLite)
+
+    versions: (노드, 내용 해시)별 내용과 처음/마지막 사용 시각
+    version_traces: 버전을 사용한 트레이스 (트레이스마다 버전 순서 유지)
+    indexed_traces: 이미 색인한 트레이스 (다시 스캔하지 않음)
+
+    같은 프롬프트 내용을 여러 노드가 쓰면 노드마다 별도 버전으로 색인합니다.
+    트레이스 하나를 색인할 때 해당 행만 한 트랜잭션으로 기록하므로 카탈로그가 커져도 쓰기 비용이 늘지 않습니다.
+    """
+
+    def __init__(self, path=PROMPT_CATALOG_FILE, legacy_path=LEGACY_PROMPT_CATALOG_FILE):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._lock = threading.RLock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+        self._migrate_legacy_file()
+        return conn
+
+    def _migrate_legacy_file(self):
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            logger.warning("예전 프롬프트 카탈로그를 읽지 못해 가져오지 않습니다: %s", self.legacy_path)
+            return
+        versions = data.get("versions", [])
+        traces = data.get("traces", {})
+        if isinstance(versions, dict):
+            # 더 예전 형식: 내용 해시만으로 키를 만들었으므로 처음 본 노드로 옮김
+            nodes = {version_hash: version.get("node") for version_hash, version in versions.items()}
+            versions = [{**version, "hash": version_hash} for version_hash, version in versions.items()]
+            traces = {
+                trace_id: [[nodes.get(version_hash), version_hash] for version_hash in version_hashes]
+                for trace_id, version_hashes in traces.items()
+            }
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO versions (node, hash, content, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (version["node"], version["hash"], json.dumps(version.get("content"), ensure_ascii=False),
+                     version.get("first_seen") or "", version.get("last_seen") or "")
+                    for version in versions
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO version_traces (node, hash, trace_id, position) VALUES (?, ?, ?, ?)",
+                [
+                    (node, version_hash, trace_id, position)
+                    for trace_id, keys in traces.items()
+                    for position, (node, version_hash) in enumerate(keys)
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO indexed_traces (trace_id) VALUES (?)", [(trace_id,) for trace_id in traces]
+            )
+        os.replace(self.legacy_path, f"{self.legacy_path}.migrated")
+        logger.info("프롬프트 버전 %d개를 %s에서 %s로 옮겼습니다", len(versions), self.legacy_path, self.path)
+
+    def has_trace(self, trace_id):
+        with self._lock:
+            row = self._connect().execute("SELECT 1 FROM indexed_traces WHERE trace_id = ?", (trace_id,)).fetchone()
+            return row is not None
+
+    def index_trace(self, trace_id, observations):
+        """트레이스의 시스템 프롬프트를 버전별로 등록합니다 (이미 색인한 트레이스는 건너뜀)
+
+        시스템 프롬프트는 GENERATION 관찰 데이터의 입력에만 있으므로 다른 스팬의 입력은 읽지 않습니다.
+        """
+        if not trace_id or not observations:
+            return False
+
+        start_times = {obs.get("id"): obs.get("startTime") for obs in observations}
+        fallback_time = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        generations = [obs for obs in observations if obs.get("type") == "GENERATION"]
+
+        # {(노드, 내용 해시): [내용, 처음 사용 시각, 마지막 사용 시각]} (트레이스 안의 처음 등장 순서 유지)
+        found = {}
+        for prompt in find_system_prompts(generations):
+            key = (prompt.get("node") or "알 수 없음", prompt["content_hash"])
+            seen = start_times.get(prompt.get("id")) or fallback_time
+            version = found.setdefault(key, [prompt.get("content"), seen, seen])
+            version[1] = min(version[1], seen)
+            version[2] = max(version[2], seen)
+        version_keys = list(found)
+        rows = [
+            (node, version_hash, json.dumps(content, ensure_ascii=False), first_seen, last_seen)
+            for (node, version_hash), (content, first_seen, last_seen) in found.items()
+        ]
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute("INSERT OR IGNORE INTO indexed_traces (trace_id) VALUES (?)", (trace_id,))
+                if cursor.rowcount == 0:
+                    return False
+                conn.executemany(
+                    """
+                    INSERT INTO versions (node, hash, content, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (node, hash) DO UPDATE SET
+                        first_seen = MIN(versions.first_seen, excluded.first_seen),
+                        last_seen = MAX(versions.last_seen, excluded.last_seen)
+                    """,
+                    rows,
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO version_traces (node, hash, trace_id, position) VALUES (?, ?, ?, ?)",
+                    [(node, version_hash, trace_id, position) for position, (node, version_hash) in enumerate(version_keys)],
+                )
+        return True
+
+    def version_count(self):
+        """등록된 (노드, 버전) 수 (새 버전이 색인되었는지 확인할 때 사용)"""
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM versions").fetchone()[0]
+
+    def nodes(self):
+        """노드 이름 목록"""
+        with self._lock:
+            rows = self._connect().execute("SELECT DISTINCT node FROM versions ORDER BY node").fetchall()
+        return [node for (node,) in rows]
+
+    def all_versions(self):
+        """모든 노드의 버전 목록을 최근에 사용된 순서로 반환합니다"""
+        return self.versions_for_node(None)
+
+    def versions_for_node(self, node):
+        """노드의 버전 목록을 최근에 사용된 순서로 반환합니다 (None이면 모든 노드)"""
+        sql = """
+            SELECT v.hash, v.node, v.content, v.first_seen, v.last_seen,
+                   (SELECT COUNT(*) FROM version_traces t WHERE t.node = v.node AND t.hash = v.hash)
+            FROM versions v
+        """
+        params = ()
+        if node is not None:
+            sql += " WHERE v.node = ?"
+            params = (node,)
+        sql += " ORDER BY v.last_seen DESC"
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        return [
+            {
+                "hash": version_hash,
+                "node": version_node,
+                "content": json.loads(content),
+                "first_seen": first_seen,
+                "last_seen": last_seen,
+                "trace_count": trace_count,
+            }
+            for version_hash, version_node, content, first_seen, last_seen, trace_count in rows
+        ]
+
+    def traces_for_version(self, node, version_hash):
+        """노드에서 해당 버전을 사용한 트레이스 ID 집합"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT trace_id FROM version_traces WHERE node = ? AND hash = ?", (node, version_hash)
+            ).fetchall()
+        return {trace_id for (trace_id,) in rows}
+
+    def versions_for_trace(self, trace_id):
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT node, hash FROM version_traces WHERE trace_id = ? ORDER BY position", (trace_id,)
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+# 프로세스 전역 카탈로그
+PROMPT_CATALOG = PromptCatalog()
+
+def index_observations(trace_id, observations):
+    """관찰 데이터를 카탈로그에 색인합니다"""
+    if PROMPT_CATALOG.has_trace(trace_id):
+        return
+    try:
+        PROMPT_CATALOG.index_trace(trace_id, observations)
+    except Exception:
+        # 색인 실패가 관찰 데이터 조회를 막지 않도록 로그만 남김
+        logger.exception("프롬프트 카탈로그 색인 실패: %s", trace_id)
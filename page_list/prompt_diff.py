@@ -0,0 +1,118 @@
+"""
+프롬프트 비교 모듈 - 두 텍스트의 줄/단어 단위 차이를 계산해 HTML로 만들고 내용 해시로 캐시하는 기능
+"""
+
+import re
+import html
+import difflib
+
+from .cache import TTLCache
+from .extraction import PROMPT_STORE
+
+# (해시 A, 해시 B, 문맥 줄 수) -> 비교 결과 (긴 프롬프트 쌍을 오가도 다시 계산하지 않음)
+DIFF_CACHE = TTLCache("prompt_diff", max_entries=256, ttl_seconds=3600)
+
+# 공백을 보존하면서 단어 단위로 나누기
+_TOKEN_RE = re.compile(r"\s+|[^\s]+")
+
+_STYLE_DEL = "background-color:#ffcdd2;text-decoration:line-through;"
+_STYLE_INS = "background-color:#a0d8b3;"
+_STYLE_LINE = "font-family:monospace;white-space:pre-wrap;margin:0;padding:1px 6px;"
+_LINE_BACKGROUND = {"equal": "", "delete": "background-color:#fff0f0;", "insert": "background-color:#f0fff4;"}
+_LINE_PREFIX = {"equal": "  ", "delete": "- ", "insert": "+ "}
+
+def _word_diff(old_line, new_line):
+    """바뀐 한 줄 쌍의 단어 단위 차이를 (삭제 표시 HTML, 추가 표시 HTML, 같은 토큰 수)로 만듭니다"""
+    old_tokens = _TOKEN_RE.findall(old_line)
+    new_tokens = _TOKEN_RE.findall(new_line)
+    old_html, new_html = [], []
+    equal_tokens = 0
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False).get_opcodes():
+        old_part = html.escape("".join(old_tokens[i1:i2]))
+        new_part = html.escape("".join(new_tokens[j1:j2]))
+        if tag == "equal":
+            old_html.append(old_part)
+            new_html.append(new_part)
+            equal_tokens += i2 - i1
+            continue
+        if old_part:
+            old_html.append(f'<span style="{_STYLE_DEL}">{old_part}</span>')
+        if new_part:
+            new_html.append(f'<span style="{_STYLE_INS}">{new_part}</span>')
+    return "".join(old_html), "".join(new_html), equal_tokens
+
+def _line_html(kind, content_html):
+    return f'<div style="{_STYLE_LINE}{_LINE_BACKGROUND[kind]}">{_LINE_PREFIX[kind]}{content_html}</div>'
+
+def _compute_diff(old_text, new_text, context):
+    old_lines = old_text.splitlines()
+    new_lines = new_text.splitlines()
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+
+    rows = []
+    stats = {"added": 0, "removed": 0, "changed": 0}
+    # 유사도는 단어(토큰) 단위로 계산 (한 줄짜리 프롬프트도 의미 있는 값이 나오도록)
+    equal_tokens = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            block = old_lines[i1:i2]
+            equal_tokens += sum(len(_TOKEN_RE.findall(line)) for line in block)
+            # 바뀐 곳 주변 문맥만 남기고 긴 동일 구간은 접기
+            if context is not None and len(block) > context * 2 + 1:
+                head = block[:context] if rows else []
+                tail = block[-context:] if i2 < len(old_lines) or j2 < len(new_lines) else []
+                rows.extend(_line_html("equal", html.escape(line)) for line in head)
+                rows.append(f'<div style="{_STYLE_LINE}color:#888;">… {len(block) - len(head) - len(tail)}줄 동일 …</div>')
+                rows.extend(_line_html("equal", html.escape(line)) for line in tail)
+            else:
+                rows.extend(_line_html("equal", html.escape(line)) for line in block)
+            continue
+
+        old_block = old_lines[i1:i2]
+        new_block = new_lines[j1:j2]
+        if tag == "replace":
+            # 줄 수가 같은 부분은 줄끼리 단어 단위로 비교
+            paired = min(len(old_block), len(new_block))
+            for old_line, new_line in zip(old_block[:paired], new_block[:paired]):
+                old_html, new_html, equal = _word_diff(old_line, new_line)
+                equal_tokens += equal
+                rows.append(_line_html("delete", old_html))
+                rows.append(_line_html("insert", new_html))
+            stats["changed"] += paired
+            old_block, new_block = old_block[paired:], new_block[paired:]
+
+        rows.extend(_line_html("delete", html.escape(line)) for line in old_block)
+        rows.extend(_line_html("insert", html.escape(line)) for line in new_block)
+        stats["removed"] += len(old_block)
+        stats["added"] += len(new_block)
+
+    total_tokens = len(_TOKEN_RE.findall(old_text)) + len(_TOKEN_RE.findall(new_text))
+    stats["ratio"] = 2 * equal_tokens / total_tokens if total_tokens else 1.0
+    return {"html": "".join(rows), "stats": stats, "identical": old_lines == new_lines}
+
+def diff_texts(old_text, new_text, context=3):
+    """두 텍스트의 줄/단어 단위 비교 결과 {html, stats, identical}를 반환합니다 (내용 해시로 캐시)"""
+    old_text = old_text if isinstance(old_text, str) else str(old_text or "")
+    new_text = new_text if isinstance(new_text, str) else str(new_text or "")
+    key = (PROMPT_STORE.content_hash(old_text), PROMPT_STORE.content_hash(new_text), context)
+
+    result = DIFF_CACHE.get(key)
+    if result is None:
+        result = _compute_diff(old_text, new_text, context)
+        DIFF_CACHE.set(key, result)
+    return result
+
+def pair_system_prompts(prompts_a, prompts_b):
+    """두 트레이스의 시스템 프롬프트를 노드 기준으로 짝지어 [(노드, 프롬프트 A, 프롬프트 B)]로 반환합니다
+
+    한쪽에만 있는 노드는 반대쪽을 None으로 둡니다.
+    """
+    by_node_a = {}
+    for prompt in prompts_a:
+        by_node_a.setdefault(prompt.get("node") or "알 수 없음", prompt)
+    by_node_b = {}
+    for prompt in prompts_b:
+        by_node_b.setdefault(prompt.get("node") or "알 수 없음", prompt)
+
+    nodes = list(by_node_a) + [node for node in by_node_b if node not in by_node_a]
+    return [(node, by_node_a.get(node), by_node_b.get(node)) for node in nodes]
@@ -0,0 +1,115 @@
+"""
+프롬프트 패싯 색인 모듈 - 카테고리/모델/태그 값별 프롬프트 ID 집합을 유지해 조합 필터와 값별 개수를 집합 연산으로 계산하는 기능
+"""
+
+import threading
+
+# 패싯 이름 -> 프롬프트 필드
+FACET_FIELDS = {
+    "category": "category",
+    "model": "model",
+    "tag": "tags",
+}
+
+def _facet_values(prompt, facet):
+    value = prompt.get(FACET_FIELDS[facet])
+    if facet == "tag":
+        return set(value or [])
+    return {value} if value else set()
+
+class PromptFacetIndex:
+    """패싯 값별 프롬프트 ID 집합 (역색인)
+
+    프롬프트를 추가/교체/삭제하면 해당 프롬프트가 속한 집합만 고칩니다.
+    같은 패싯 안에서 여러 값을 고르면 합집합, 서로 다른 패싯끼리는 교집합으로 거릅니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ids = set()
+        self._postings = {facet: {} for facet in FACET_FIELDS}
+        # 프롬프트 ID -> {패싯: 값 집합} (교체/삭제 시 이전 값을 찾기 위해 보관)
+        self._values = {}
+
+    @classmethod
+    def build(cls, prompts):
+        index = cls()
+        for prompt in prompts:
+            index.add(prompt)
+        return index
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, prompt_id):
+        return prompt_id in self._ids
+
+    def add(self, prompt):
+        """프롬프트를 색인합니다 (같은 ID가 있으면 교체)"""
+        with self._lock:
+            self.remove(prompt["id"])
+            values = {facet: _facet_values(prompt, facet) for facet in FACET_FIELDS}
+            for facet, facet_values in values.items():
+                postings = self._postings[facet]
+                for value in facet_values:
+                    postings.setdefault(value, set()).add(prompt["id"])
+            self._values[prompt["id"]] = values
+            self._ids.add(prompt["id"])
+
+    def add_many(self, prompts):
+        with self._lock:
+            for prompt in prompts:
+                self.add(prompt)
+
+    def remove(self, prompt_id):
+        with self._lock:
+            values = self._values.pop(prompt_id, None)
+            if values is None:
+                return False
+            for facet, facet_values in values.items():
+                postings = self._postings[facet]
+                for value in facet_values:
+                    ids = postings.get(value)
+                    if ids is not None:
+                        ids.discard(prompt_id)
+                        if not ids:
+                            del postings[value]
+            self._ids.discard(prompt_id)
+            return True
+
+    def values(self, facet):
+        """패싯의 값 목록 (정렬)"""
+        with self._lock:
+            return sorted(self._postings[facet])
+
+    def matching_ids(self, selections, exclude=None):
+        """선택한 패싯 값에 모두 해당하는 프롬프트 ID 집합 (exclude 패싯의 선택은 무시)
+
+        selections는 {패싯: 값 목록}이며, 값 목록이 비어 있는 패싯은 거르지 않습니다.
+        """
+        with self._lock:
+            result = None
+            # 작은 집합부터 교집합을 구해 중간 결과를 작게 유지
+            unions = []
+            for facet, selected in selections.items():
+                if facet == exclude or not selected:
+                    continue
+                postings = self._postings[facet]
+                unions.append(set().union(*(postings.get(value, ()) for value in selected)))
+            for ids in sorted(unions, key=len):
+                result = ids if result is None else result & ids
+                if not result:
+                    break
+            return set(self._ids) if result is None else result
+
+    def counts(self, facet, selections):
+        """다른 패싯의 선택을 적용했을 때 패싯 값별 프롬프트 수
+
+        자기 패싯의 선택은 빼고 계산하므로 같은 패싯의 다른 값을 골랐을 때의 결과 수를 미리 보여줄 수 있습니다.
+        """
+        with self._lock:
+            base = self.matching_ids(selections, exclude=facet)
+            postings = self._postings[facet]
+            if len(base) == len(self._ids):
+                return {value: len(ids) for value, ids in postings.items()}
+            return {value: len(ids & base) for value, ids in postings.items()}
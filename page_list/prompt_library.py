@@ -0,0 +1,174 @@
+"""
+프롬프트 저장소 모듈 - 프롬프트를 SQLite에 레코드 단위로 저장해 즐겨찾기/수정/삭제 시 해당 레코드만 기록하는 기능
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 프롬프트 레코드 필드 (tags는 JSON 문자열, favorite는 0/1로 저장)
+PROMPT_FIELDS = ("id", "title", "content", "category", "model", "tags", "description", "favorite", "created_at")
+
+# 저장 열 (그 밖의 키는 extra 열에 JSON 객체로 보관해 불러올 때 되돌려 줌)
+_COLUMNS = PROMPT_FIELDS + ("extra",)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL DEFAULT '',
+    content TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '[]',
+    description TEXT NOT NULL DEFAULT '',
+    favorite INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT '',
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS prompts_created_at ON prompts (created_at);
+CREATE INDEX IF NOT EXISTS prompts_category ON prompts (category);
+"""
+
+def _to_row(prompt):
+    return (
+        prompt["id"],
+        prompt.get("title") or "",
+        prompt.get("content") or "",
+        prompt.get("category") or "",
+        prompt.get("model") or "",
+        json.dumps(prompt.get("tags") or [], ensure_ascii=False),
+        prompt.get("description") or "",
+        1 if prompt.get("favorite") else 0,
+        prompt.get("created_at") or "",
+        json.dumps({key: value for key, value in prompt.items() if key not in PROMPT_FIELDS}, ensure_ascii=False),
+    )
+
+def _from_row(fields, row):
+    prompt = dict(zip(fields, row))
+    if "tags" in prompt:
+        prompt["tags"] = json.loads(prompt["tags"] or "[]")
+    if "favorite" in prompt:
+        prompt["favorite"] = bool(prompt["favorite"])
+    if "extra" in prompt:
+        for key, value in json.loads(prompt.pop("extra") or "{}").items():
+            prompt.setdefault(key, value)
+    return prompt
+
+class PromptLibrary:
+    """프롬프트 ID로 색인된 레코드 저장소
+
+    처음 열 때 예전 형식의 JSON 파일(legacy_path)이 있으면 가져오고 파일 이름을 .migrated로 바꿉니다.
+    """
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._writes = 0
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        # extra 열이 없던 예전 저장소에 열 추가
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(prompts)")}
+        if "extra" not in columns:
+            conn.execute("ALTER TABLE prompts ADD COLUMN extra TEXT NOT NULL DEFAULT '{}'")
+        self._conn = conn
+        self._migrate_legacy_file()
+        return conn
+
+    def _migrate_legacy_file(self):
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                prompts = json.load(f)
+        except (OSError, ValueError):
+            logger.warning("예전 프롬프트 파일을 읽지 못해 가져오지 않습니다: %s", self.legacy_path)
+            return
+        if not isinstance(prompts, list):
+            logger.warning("예전 프롬프트 파일 형식이 올바르지 않아 가져오지 않습니다: %s", self.legacy_path)
+            return
+        records = [prompt for prompt in prompts if isinstance(prompt, dict) and prompt.get("id")]
+        self.upsert_many(records)
+        os.replace(self.legacy_path, f"{self.legacy_path}.migrated")
+        logger.info("프롬프트 %d개를 %s에서 %s로 옮겼습니다", len(records), self.legacy_path, self.path)
+        if len(records) < len(prompts):
+            # 원본은 .migrated 파일로 남아 있으므로 건너뛴 항목을 직접 확인할 수 있음
+            logger.warning(
+                "ID가 없거나 객체가 아닌 항목 %d개는 가져오지 않았습니다 (원본: %s.migrated)",
+                len(prompts) - len(records), self.legacy_path
+            )
+
+    def version(self):
+        """변경 감지용 버전 (이 연결의 쓰기 횟수, 다른 연결의 커밋마다 바뀌는 data_version)"""
+        with self._lock:
+            conn = self._connect()
+            return (self._writes, conn.execute("PRAGMA data_version").fetchone()[0])
+
+    def load(self, fields=None):
+        """모든 프롬프트를 등록 순서대로 반환합니다 (fields를 주면 해당 필드만 읽고, 없으면 extra 키까지 포함)"""
+        fields = tuple(fields or _COLUMNS)
+        unknown = set(fields) - set(_COLUMNS)
+        if unknown:
+            raise ValueError(f"알 수 없는 프롬프트 필드: {sorted(unknown)}")
+        with self._lock:
+            rows = self._connect().execute(f"SELECT {', '.join(fields)} FROM prompts ORDER BY seq").fetchall()
+        return [_from_row(fields, row) for row in rows]
+
+    def get(self, prompt_id):
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM prompts WHERE id = ?", (prompt_id,)
+            ).fetchone()
+        return _from_row(_COLUMNS, row) if row else None
+
+    def upsert(self, prompt):
+        """프롬프트 하나를 추가하거나 교체합니다 (등록 순서는 유지)"""
+        self.upsert_many([prompt])
+
+    @staticmethod
+    def _upsert_rows(conn, prompts):
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        updates = ", ".join(f"{field} = excluded.{field}" for field in _COLUMNS if field != "id")
+        conn.executemany(
+            f"INSERT INTO prompts ({', '.join(_COLUMNS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}",
+            [_to_row(prompt) for prompt in prompts],
+        )
+
+    def upsert_many(self, prompts):
+        if not prompts:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._upsert_rows(conn, prompts)
+            self._writes += 1
+
+    def set_favorite(self, prompt_id, favorite):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute("UPDATE prompts SET favorite = ? WHERE id = ?", (1 if favorite else 0, prompt_id))
+            self._writes += 1
+        return cursor.rowcount > 0
+
+    def delete(self, prompt_id):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute("DELETE FROM prompts WHERE id = ?", (prompt_id,))
+            self._writes += 1
+        return cursor.rowcount > 0
@@ -1,6 +1,22 @@
 import streamlit as st
-from .data_utils import load_prompts, save_prompts
-from .helpers import CATEGORIES
+import json
+import uuid
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from .data_utils import PROMPT_LIBRARY, load_prompts, load_prompt_facets, upsert_prompts, set_prompt_favorite, delete_prompt
+from .helpers import CATEGORIES, MODELS
+from .near_duplicates import MinHashLSH, find_duplicate_clusters
+from .prompt_catalog import PROMPT_CATALOG
+
+# 패싯 필터 (패싯 이름, 표시 이름)
+FACET_FILTERS = [("category", "카테고리"), ("model", "모델"), ("tag", "태그")]
+
+# 유사 프롬프트 묶음 캐시 (프롬프트 저장소 버전, 카탈로그 버전 수, 기준, 트레이스 포함 여부) -> (묶음, 표시 이름)
+# 접힌 expander 안도 리런마다 실행되므로 프롬프트나 카탈로그가 바뀔 때만 MinHash/LSH 색인을 다시 만듦
+MAX_CLUSTER_CACHE_ENTRIES = 8
+_cluster_cache = OrderedDict()
+_cluster_cache_lock = threading.Lock()
 
 def prompt_list_page():
     """프롬프트 목록 페이지"""
@@ -12,29 +28,54 @@ def prompt_list_page():
     # 프롬프트 불러오기
     prompts = load_prompts()
     
+    # JSON 파일에서 프롬프트 가져오기 (유사 프롬프트 표시)
+    display_prompt_import(prompts)
+    
+    # 라이브러리와 트레이스 시스템 프롬프트의 유사 프롬프트 묶음
+    display_duplicate_clusters(prompts)
+    
     # 검색 및 필터링 기능
     st.markdown("### 검색 및 필터링")
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2 = st.columns([2, 1])
     
     with col1:
         search_term = st.text_input("검색어", placeholder="제목 또는 내용으로 검색")
     
     with col2:
-        available_categories = ["전체"] + (list(set([p["category"] for p in prompts])) if prompts else CATEGORIES)
-        category_filter = st.selectbox(
-            "카테고리 필터", 
-            options=available_categories
-        )
-    
-    with col3:
         sort_option = st.selectbox(
             "정렬 기준",
             options=["최신순", "오래된순", "제목 오름차순", "제목 내림차순"]
         )
     
-    # 필터링 적용
-    filtered_prompts = prompts
+    # 패싯 필터 (같은 패싯 안에서는 하나라도 해당, 패싯끼리는 모두 해당)
+    facets = load_prompt_facets()
+    selections = {}
+    for facet, _ in FACET_FILTERS:
+        # 삭제 등으로 사라진 값은 선택에서 제외
+        key = f"prompt_facet_{facet}"
+        values = set(facets.values(facet))
+        st.session_state[key] = [value for value in st.session_state.get(key, []) if value in values]
+        selections[facet] = st.session_state[key]
+    
+    for column, (facet, label) in zip(st.columns(len(FACET_FILTERS)), FACET_FILTERS):
+        # 다른 패싯의 선택을 적용했을 때 값별 프롬프트 수
+        counts = facets.counts(facet, selections)
+        with column:
+            st.multiselect(
+                f"{label} 필터",
+                options=facets.values(facet),
+                format_func=lambda value, counts=counts: f"{value} ({counts.get(value, 0)})",
+                key=f"prompt_facet_{facet}",
+                placeholder="전체"
+            )
+    
+    # 필터링 적용 (패싯은 색인의 집합 연산으로 거르고, 검색어는 남은 프롬프트에서만 확인)
+    if any(selections.values()):
+        prompts_by_id = {p["id"]: p for p in prompts}
+        filtered_prompts = [prompts_by_id[prompt_id] for prompt_id in facets.matching_ids(selections) if prompt_id in prompts_by_id]
+    else:
+        filtered_prompts = prompts
     
     # 검색어 필터링
     if search_term:
@@ -45,10 +86,6 @@ def prompt_list_page():
             any(search_term.lower() in tag.lower() for tag in p["tags"])
         ]
     
-    # 카테고리 필터링
-    if category_filter != "전체":
-        filtered_prompts = [p for p in filtered_prompts if p["category"] == category_filter]
-    
     # 정렬 적용
     if sort_option == "최신순":
         filtered_prompts = sorted(filtered_prompts, key=lambda x: x["created_at"], reverse=True)
@@ -91,32 +128,145 @@ def prompt_list_page():
                     # 즐겨찾기 토글 버튼
                     favorite_label = "즐겨찾기 해제" if prompt.get("favorite") else "즐겨찾기 추가"
                     if st.button(favorite_label, key=f"fav_{i}"):
-                        # 즐겨찾기 상태 토글
+                        # 즐겨찾기 상태 토글 (해당 프롬프트 레코드만 저장)
                         prompt["favorite"] = not prompt.get("favorite", False)
-                        
-                        # 원래 프롬프트 목록 업데이트
-                        for p in prompts:
-                            if p["id"] == prompt["id"]:
-                                p["favorite"] = prompt["favorite"]
-                                break
-                        
-                        # 저장
-                        save_prompts(prompts)
+                        set_prompt_favorite(prompt["id"], prompt["favorite"])
                         
                         # 성공 메시지
                         action = "추가되었습니다" if prompt["favorite"] else "해제되었습니다"
                         st.success(f"즐겨찾기에 {action}!")
-                        st.experimental_rerun()
+                        st.rerun()
                     
                     # 삭제 버튼
                     if st.button("삭제", key=f"del_{i}"):
                         if st.session_state.get(f"confirm_delete_{i}", False):
                             # 삭제 확인 상태인 경우 실제 삭제 수행
-                            prompts = [p for p in prompts if p["id"] != prompt["id"]]
-                            save_prompts(prompts)
+                            delete_prompt(prompt["id"])
+                            st.session_state[f"confirm_delete_{i}"] = False
                             st.success("프롬프트가 삭제되었습니다!")
-                            st.experimental_rerun()
+                            st.rerun()
                         else:
                             # 삭제 확인 상태로 변경
                             st.session_state[f"confirm_delete_{i}"] = True
-                            st.warning("정말 삭제하시겠습니까? 다시 한 번 '삭제' 버튼을 클릭하면 영구적으로 삭제됩니다.") 
\ No newline at end of file
+                            st.warning("정말 삭제하시겠습니까? 다시 한 번 '삭제' 버튼을 클릭하면 영구적으로 삭제됩니다.") 
+
+def display_duplicate_clusters(prompts):
+    """문장 몇 개만 다른 유사 프롬프트를 묶어서 표시합니다"""
+    with st.expander("🧬 유사 프롬프트 묶음", expanded=False):
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            threshold = st.slider("유사도 기준", min_value=0.5, max_value=1.0, value=0.8, step=0.05, key="duplicate_threshold")
+        with col2:
+            include_traces = st.checkbox("트레이스 시스템 프롬프트 포함", value=True, key="duplicate_include_traces")
+        
+        clusters, labels = duplicate_clusters(prompts, threshold, include_traces)
+        if not clusters:
+            st.info("유사한 프롬프트 묶음이 없습니다.")
+            return
+        
+        st.markdown(f"**{len(clusters)}개 묶음** ({sum(len(cluster) for cluster in clusters)}개 프롬프트)")
+        for idx, cluster in enumerate(clusters):
+            st.markdown(f"**묶음 {idx + 1}** - {len(cluster)}개")
+            for key in sorted(cluster, key=lambda key: labels[key]):
+                st.markdown(f"- {labels[key]}")
+
+def duplicate_clusters(prompts, threshold, include_traces):
+    """유사 프롬프트 묶음과 키별 표시 이름을 반환합니다 (프롬프트와 카탈로그가 그대로면 캐시된 결과 사용)"""
+    cache_key = (PROMPT_LIBRARY.version(), PROMPT_CATALOG.version_count() if include_traces else 0, threshold, include_traces)
+    with _cluster_cache_lock:
+        cached = _cluster_cache.get(cache_key)
+        if cached is not None:
+            _cluster_cache.move_to_end(cache_key)
+            return cached
+    
+    # 키: ("prompt", 프롬프트 ID) 또는 ("trace", 노드, 프롬프트 버전 해시)
+    labels = {}
+    items = []
+    for prompt in prompts:
+        key = ("prompt", prompt["id"])
+        labels[key] = f"📋 {prompt['title']} ({prompt['category']})"
+        items.append((key, prompt["content"]))
+    if include_traces:
+        for version in PROMPT_CATALOG.all_versions():
+            key = ("trace", version["node"], version["hash"])
+            labels[key] = f"🔍 {version['node']} 노드 프롬프트 {version['hash'][:8]} ({version['trace_count']}개 트레이스)"
+            items.append((key, version["content"] if isinstance(version["content"], str) else json.dumps(version["content"], ensure_ascii=False)))
+    
+    clusters = find_duplicate_clusters(items, threshold)
+    # 묶음에 든 항목의 표시 이름만 보관
+    result = (clusters, {key: labels[key] for cluster in clusters for key in cluster})
+    with _cluster_cache_lock:
+        _cluster_cache[cache_key] = result
+        while len(_cluster_cache) > MAX_CLUSTER_CACHE_ENTRIES:
+            _cluster_cache.popitem(last=False)
+    return result
+
+def _prepare_imported_prompt(item):
+    """가져온 항목에 프롬프트 목록에 필요한 기본값을 채웁니다"""
+    return {
+        "id": str(uuid.uuid4()),
+        "title": item.get("title") or item["content"][:30],
+        "content": item["content"],
+        "category": item.get("category") or CATEGORIES[0],
+        "model": item.get("model") or MODELS[0],
+        "tags": item.get("tags") or [],
+        "description": item.get("description", ""),
+        "favorite": bool(item.get("favorite", False)),
+        "created_at": item.get("created_at") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+def display_prompt_import(prompts):
+    """JSON 파일의 프롬프트를 가져오면서 기존 프롬프트와 유사한 항목을 표시합니다"""
+    with st.expander("📥 프롬프트 가져오기", expanded=False):
+        uploaded = st.file_uploader("프롬프트 JSON 파일 (프롬프트 객체 배열)", type=["json"], key="prompt_import_file")
+        if uploaded is None:
+            return
+        
+        try:
+            items = json.loads(uploaded.getvalue().decode("utf-8"))
+        except (UnicodeDecodeError, ValueError) as e:
+            st.error(f"JSON 파일을 읽을 수 없습니다: {str(e)}")
+            return
+        items = [item for item in items if isinstance(item, dict) and item.get("content")] if isinstance(items, list) else []
+        if not items:
+            st.warning("가져올 프롬프트가 없습니다. content 필드가 있는 객체 배열이어야 합니다.")
+            return
+        
+        threshold = st.slider("유사도 기준", min_value=0.5, max_value=1.0, value=0.8, step=0.05, key="import_duplicate_threshold")
+        
+        # 기존 프롬프트로 색인을 만들고, 가져오는 항목끼리의 중복도 잡도록 확인한 항목을 차례로 추가
+        index = MinHashLSH(threshold)
+        titles = {}
+        for prompt in prompts:
+            index.add(("prompt", prompt["id"]), prompt["content"])
+            titles[("prompt", prompt["id"])] = prompt["title"]
+        
+        rows = []
+        for i, item in enumerate(items):
+            title = item.get("title") or item["content"][:30]
+            matches = index.query(item["content"])
+            rows.append({
+                "제목": title,
+                "유사한 프롬프트": ", ".join(
+                    ("(가져오는 파일) " if key[0] == "import" else "") + titles[key] for key, _ in matches[:3]
+                ),
+                "유사도": matches[0][1] if matches else None,
+                "중복 의심": bool(matches)
+            })
+            index.add(("import", i), item["content"])
+            titles[("import", i)] = title
+        
+        duplicates = sum(row["중복 의심"] for row in rows)
+        st.markdown(f"**{len(items)}개 중 {duplicates}개가 기존 프롬프트 또는 파일 안의 다른 항목과 유사합니다.**")
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        
+        skip_duplicates = st.checkbox("중복 의심 항목 제외", value=True, key="import_skip_duplicates")
+        if st.button("가져오기", key="import_prompts"):
+            imported = [
+                _prepare_imported_prompt(item)
+                for item, row in zip(items, rows)
+                if not (skip_duplicates and row["중복 의심"])
+            ]
+            upsert_prompts(imported)
+            st.success(f"{len(imported)}개의 프롬프트를 가져왔습니다.")
+            st.rerun()
@@ -0,0 +1,29 @@
+"""
+유사 예제 표시 모듈 - 유사 예제 색인의 검색 결과를 여러 페이지에서 같은 표로 보여주는 기능
+"""
+
+import streamlit as st
+
+from .similarity_index import SIMILARITY_INDEX
+
+# 검색 결과의 문서 종류 표시
+SIMILAR_KIND_LABELS = {"good": "✅ 좋은 예제", "bad": "❌ 나쁜 예제", "prompt": "📋 프롬프트"}
+
+def display_similar_examples(query_text, k=5, kinds=None, exclude=None):
+    """질의와 비슷한 즐겨찾기/프롬프트를 유사도 순으로 표시합니다"""
+    if not query_text:
+        st.info("비교할 질문/답변 내용이 없습니다.")
+        return
+    
+    results = SIMILARITY_INDEX.search(query_text, k=k, kinds=kinds, exclude=exclude)
+    if not results:
+        st.info("비슷한 예제를 찾지 못했습니다.")
+        return
+    
+    st.dataframe([{
+        "유형": SIMILAR_KIND_LABELS.get(meta.get("type") if meta["key"][0] == "favorite" else meta["key"][0], ""),
+        "이름": meta.get("name", ""),
+        "ID": meta["key"][1],
+        "유사도": round(score, 3),
+        "미리보기": meta.get("preview", "")[:100]
+    } for score, meta in results], hide_index=True, use_container_width=True)
@@ -0,0 +1,324 @@
+"""
+유사 예제 검색 모듈 - 즐겨찾기의 질문/답변과 프롬프트 목록을 문자 n-그램 TF-IDF 벡터로 색인하고 코사인 유사도로 찾는 기능
+"""
+
+import os
+import re
+import json
+import zlib
+import logging
+import threading
+
+import numpy as np
+
+from .helpers import DATA_DIR
+from .extraction import PROMPT_STORE, find_user_question, find_final_answer, question_text, answer_text
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_INDEX_FILE = os.path.join(DATA_DIR, "similarity_index.npz")
+
+# 저널에 쌓인 변경이 이 수와 문서 수보다 많아지면 기본 파일로 합침
+JOURNAL_COMPACT_MIN = 256
+
+# 해싱 트릭으로 n-그램을 고정 차원에 사상 (문서 1000개당 약 32MB)
+VECTOR_DIM = 1 << 13
+NGRAM_SIZES = (2, 3, 4)
+# 아주 긴 답변은 앞부분만 색인
+MAX_TEXT_LENGTH = 20000
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def text_vector(text):
+    """문자 n-그램 개수에 서브리니어 TF(1 + log)를 적용한 벡터"""
+    text = _WHITESPACE_RE.sub(" ", str(text)[:MAX_TEXT_LENGTH]).strip().lower()
+    indices = [
+        zlib.crc32(text[i:i + size].encode("utf-8")) % VECTOR_DIM
+        for size in NGRAM_SIZES
+        for i in range(len(text) - size + 1)
+    ]
+    counts = np.bincount(np.asarray(indices, dtype=np.int64), minlength=VECTOR_DIM).astype(np.float32)
+    nonzero = counts > 0
+    counts[nonzero] = 1 + np.log(counts[nonzero])
+    return counts
+
+class SimilarityIndex:
+    """행 단위로 추가/삭제할 수 있는 TF 행렬과 문서 빈도로 TF-IDF 코사인 검색을 하는 색인
+
+    IDF 가중치는 검색할 때 적용하므로 문서를 추가해도 기존 행을 다시 계산하지 않습니다.
+    점수 = (tf_d * idf^2) . tf_q / (|tf_d * idf| |tf_q * idf|)
+
+    파일은 압축한 기본 행렬(path)과 추가/삭제를 희소 벡터로 한 줄씩 덧붙이는 저널(path.journal)로 나눠,
+    문서 하나를 바꿀 때 전체 행렬을 다시 쓰지 않습니다. 저널이 커지면 기본 파일로 합칩니다.
+    """
+
+    def __init__(self, path=SIMILARITY_INDEX_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._tf = np.zeros((0, VECTOR_DIM), dtype=np.float32)
+        self._df = np.zeros(VECTOR_DIM, dtype=np.float64)
+        self._count = 0
+        self._meta = []
+        self._row_by_key = {}
+        self._norms = None
+        # 아직 저널에 기록하지 않은 변경, 저널에 기록된 변경 수
+        self._pending = []
+        self._journal_ops = 0
+
+    @property
+    def journal_path(self):
+        return f"{self.path}.journal"
+
+    @staticmethod
+    def _key_id(key):
+        return f"{key[0]}:{key[1]}"
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        self._load_base()
+        self._replay_journal()
+
+    def _load_base(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                tf = data["tf"]
+                meta = json.loads(str(data["meta"]))
+            if tf.shape[1] != VECTOR_DIM:
+                logger.warning("유사 예제 색인의 차원이 달라 새로 만듭니다: %s", self.path)
+                return
+        except (OSError, ValueError, KeyError):
+            logger.warning("유사 예제 색인을 읽지 못해 새로 만듭니다: %s", self.path)
+            return
+        self._tf = tf.astype(np.float32)
+        self._count = len(meta)
+        self._meta = meta
+        self._df = (tf[:self._count] > 0).sum(axis=0).astype(np.float64)
+        self._row_by_key = {self._key_id(m["key"]): row for row, m in enumerate(meta)}
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        # 기록 도중 중단된 마지막 줄은 건너뜀
+                        continue
+                    if op.get("op") == "add":
+                        vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+                        vector[np.asarray(op["indices"], dtype=np.int64)] = op["values"]
+                        self._add_vector(tuple(op["meta"]["key"]), vector, op["meta"])
+                    elif op.get("op") == "remove":
+                        self._remove(tuple(op["key"]))
+                    self._journal_ops += 1
+        except OSError:
+            logger.warning("유사 예제 색인 저널을 읽지 못했습니다: %s", self.journal_path)
+
+    def save(self):
+        """쌓인 변경을 저널에 덧붙입니다 (저널이 커지면 기본 파일로 합침)"""
+        with self._lock:
+            if not self._pending:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if self._journal_ops + len(self._pending) > max(JOURNAL_COMPACT_MIN, self._count):
+                self.compact()
+                return
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(op, ensure_ascii=False) + "\n" for op in self._pending)
+            self._journal_ops += len(self._pending)
+            self._pending = []
+
+    def compact(self):
+        """현재 행렬을 압축한 기본 파일로 기록하고 저널을 비웁니다"""
+        with self._lock:
+            self._load()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp.npz"
+            np.savez_compressed(tmp_path, tf=self._tf[:self._count], meta=np.array(json.dumps(self._meta, ensure_ascii=False)))
+            os.replace(tmp_path, self.path)
+            # 기본 파일 교체 후 저널 삭제 (그 사이에 중단돼도 저널 재생은 같은 결과)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._journal_ops = 0
+            self._pending = []
+
+    def __contains__(self, key):
+        with self._lock:
+            self._load()
+            return self._key_id(key) in self._row_by_key
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return self._count
+
+    def keys(self, kind=None):
+        """색인된 문서 키 목록 (kind를 주면 해당 종류만)"""
+        with self._lock:
+            self._load()
+            return [tuple(m["key"]) for m in self._meta if kind is None or m["key"][0] == kind]
+
+    def meta(self, key):
+        with self._lock:
+            self._load()
+            row = self._row_by_key.get(self._key_id(key))
+            return dict(self._meta[row]) if row is not None else None
+
+    def add(self, key, text, **meta):
+        """문서를 추가합니다 (같은 키가 있으면 교체)"""
+        vector = text_vector(text)
+        entry = {"key": list(key), "preview": str(text)[:200], **meta}
+        with self._lock:
+            self._load()
+            self._add_vector(key, vector, entry)
+            indices = np.flatnonzero(vector)
+            self._pending.append({
+                "op": "add",
+                "meta": entry,
+                "indices": indices.tolist(),
+                "values": [round(float(value), 5) for value in vector[indices]],
+            })
+
+    def _add_vector(self, key, vector, entry):
+        with self._lock:
+            self._remove(key)
+            if self._count == len(self._tf):
+                # 용량을 두 배씩 늘려 추가 비용을 분할 상환
+                grown = np.zeros((max(16, len(self._tf) * 2), VECTOR_DIM), dtype=np.float32)
+                grown[:self._count] = self._tf[:self._count]
+                self._tf = grown
+            row = self._count
+            self._tf[row] = vector
+            self._df += vector > 0
+            self._meta.append(entry)
+            self._row_by_key[self._key_id(key)] = row
+            self._count += 1
+            self._norms = None
+
+    def remove(self, key):
+        """문서를 삭제합니다 (마지막 행을 빈자리로 옮김)"""
+        with self._lock:
+            self._load()
+            removed = self._remove(key)
+            if removed:
+                self._pending.append({"op": "remove", "key": list(key)})
+            return removed
+
+    def _remove(self, key):
+        with self._lock:
+            row = self._row_by_key.pop(self._key_id(key), None)
+            if row is None:
+                return False
+            self._df -= self._tf[row] > 0
+            last = self._count - 1
+            if row != last:
+                self._tf[row] = self._tf[last]
+                self._meta[row] = self._meta[last]
+                self._row_by_key[self._key_id(self._meta[row]["key"])] = row
+            self._tf[last] = 0
+            self._meta.pop()
+            self._count -= 1
+            self._norms = None
+            return True
+
+    def search(self, text, k=5, kinds=None, exclude=None):
+        """질의와 코사인 유사도가 높은 문서 k개를 [(유사도, 메타데이터)]로 반환합니다"""
+        query = text_vector(text)
+        with self._lock:
+            self._load()
+            if self._count == 0 or not query.any():
+                return []
+            tf = self._tf[:self._count]
+            idf = np.log((1 + self._count) / (1 + self._df)) + 1
+            idf_sq = (idf * idf).astype(np.float32)
+            if self._norms is None:
+                self._norms = np.sqrt(np.einsum("ij,ij,j->i", tf, tf, idf_sq))
+            scores = tf @ (query * idf_sq)
+            scores /= np.maximum(self._norms * np.sqrt(np.dot(query * query, idf_sq)), 1e-12)
+
+            if kinds is not None or exclude is not None:
+                exclude_id = self._key_id(exclude) if exclude is not None else None
+                for row, meta in enumerate(self._meta):
+                    if (kinds is not None and meta["key"][0] not in kinds) or self._key_id(meta["key"]) == exclude_id:
+                        scores[row] = -1
+
+            k = min(k, self._count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(float(scores[row]), dict(self._meta[row])) for row in top if scores[row] > 0]
+
+# 프로세스 전역 색인
+SIMILARITY_INDEX = SimilarityIndex()
+
+def favorite_text(observations):
+    """즐겨찾기 트레이스의 질문과 답변을 색인용 텍스트로 합칩니다"""
+    question = question_text(find_user_question(observations))
+    answer = answer_text(find_final_answer(observations))
+    return f"{question}\n{answer}".strip()
+
+def index_favorite(trace_id, type_key, name, observations):
+    """즐겨찾기 트레이스를 색인에 추가합니다 (질문/답변을 찾지 못하면 건너뜀)"""
+    text = favorite_text(observations or [])
+    if not text:
+        return False
+    SIMILARITY_INDEX.add(("favorite", trace_id), text, type=type_key, name=name)
+    SIMILARITY_INDEX.save()
+    return True
+
+def index_favorites(favorites):
+    """[(트레이스 ID, 유형, 이름, 관찰 데이터)]를 한 번에 색인하고 파일은 한 번만 기록합니다"""
+    indexed = 0
+    for trace_id, type_key, name, observations in favorites:
+        text = favorite_text(observations or [])
+        if text:
+            SIMILARITY_INDEX.add(("favorite", trace_id), text, type=type_key, name=name)
+            indexed += 1
+    if indexed:
+        SIMILARITY_INDEX.save()
+    return indexed
+
+def remove_favorite(trace_id):
+    if SIMILARITY_INDEX.remove(("favorite", trace_id)):
+        SIMILARITY_INDEX.save()
+
+# 마지막으로 색인과 맞춘 프롬프트 저장소 버전 (같으면 프롬프트 목록을 다시 읽지 않음)
+_synced_prompts_version = None
+_sync_lock = threading.Lock()
+
+def sync_prompts_if_changed(version, load):
+    """프롬프트 저장소 버전이 마지막 동기화 이후 바뀐 경우에만 load()로 프롬프트를 읽어 색인과 맞춥니다"""
+    global _synced_prompts_version
+    with _sync_lock:
+        if version == _synced_prompts_version:
+            return False
+        sync_prompts(load())
+        _synced_prompts_version = version
+        return True
+
+def sync_prompts(prompts):
+    """프롬프트 목록과 색인을 맞춥니다 (내용이 바뀐 프롬프트만 다시 색인)"""
+    changed = False
+    current = set()
+    for prompt in prompts:
+        key = ("prompt", prompt["id"])
+        current.add(prompt["id"])
+        content_hash = PROMPT_STORE.content_hash(prompt["content"])
+        meta = SIMILARITY_INDEX.meta(key)
+        if meta is None or meta.get("content_hash") != content_hash:
+            SIMILARITY_INDEX.add(key, prompt["content"], name=prompt["title"], content_hash=content_hash)
+            changed = True
+
+    for key in SIMILARITY_INDEX.keys("prompt"):
+        if key[1] not in current:
+            SIMILARITY_INDEX.remove(key)
+            changed = True
+
+    if changed:
+        SIMILARITY_INDEX.save()
@@ -0,0 +1,148 @@
+"""
+스팬 트리 모듈 - parentObservationId로 관찰 데이터를 트리로 연결하고 자체 시간과 크리티컬 패스를 계산하는 기능
+"""
+
+from datetime import datetime
+
+def _parse_time_ms(value):
+    """ISO 8601 시각 문자열을 epoch 밀리초로 변환합니다 (실패하면 None)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1000
+    except ValueError:
+        return None
+
+def _union_length(intervals):
+    """겹칠 수 있는 구간 목록의 합집합 길이를 계산합니다 (시작 시각 기준 정렬된 입력)"""
+    total = 0.0
+    current_start = current_end = None
+    for start, end in intervals:
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        elif end > current_end:
+            current_end = end
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+def build_span_tree(observations):
+    """관찰 데이터를 스팬 트리로 구성합니다
+
+    id 인덱스를 한 번 만들고 각 관찰을 부모에 연결하므로 연결 자체는 O(n)입니다.
+    부모가 없거나 찾을 수 없는 관찰은 루트로 취급합니다.
+    """
+    nodes = []
+    index_by_id = {}
+
+    for obs in observations:
+        start_ms = _parse_time_ms(obs.get("startTime"))
+        end_ms = _parse_time_ms(obs.get("endTime"))
+        if start_ms is None:
+            start_ms = end_ms
+        if end_ms is None or (start_ms is not None and end_ms < start_ms):
+            end_ms = start_ms
+        index_by_id[obs.get("id")] = len(nodes)
+        nodes.append({
+            "id": obs.get("id", ""),
+            "parent_id": obs.get("parentObservationId"),
+            "name": obs.get("name", "") or "무제",
+            "type": obs.get("type", ""),
+            "node": (obs.get("metadata") or {}).get("langgraph_node", "") if isinstance(obs.get("metadata"), dict) else "",
+            "start_ms": start_ms,
+            "end_ms": end_ms,
+            "children": [],
+        })
+
+    roots = []
+    for idx, node in enumerate(nodes):
+        parent_idx = index_by_id.get(node["parent_id"])
+        if parent_idx is None or parent_idx == idx:
+            roots.append(idx)
+        else:
+            nodes[parent_idx]["children"].append(idx)
+
+    # 시각 정보가 없는 스팬은 트레이스 시작 시각에 길이 0으로 배치
+    known_starts = [n["start_ms"] for n in nodes if n["start_ms"] is not None]
+    trace_start = min(known_starts) if known_starts else 0.0
+    for node in nodes:
+        if node["start_ms"] is None:
+            node["start_ms"] = node["end_ms"] = trace_start
+
+    # 자체 시간 = 전체 시간 - 자식 구간(부모 범위로 잘라낸 합집합)
+    for node in nodes:
+        duration = node["end_ms"] - node["start_ms"]
+        node["children"].sort(key=lambda i: nodes[i]["start_ms"])
+        child_intervals = []
+        for child_idx in node["children"]:
+            child = nodes[child_idx]
+            start = max(child["start_ms"], node["start_ms"])
+            end = min(child["end_ms"], node["end_ms"])
+            if end > start:
+                child_intervals.append((start, end))
+        child_ms = _union_length(child_intervals)
+        node["duration_ms"] = duration
+        node["child_ms"] = child_ms
+        node["self_ms"] = max(duration - child_ms, 0.0)
+        node["critical"] = False
+
+    roots.sort(key=lambda i: nodes[i]["start_ms"])
+    _mark_critical_path(nodes, roots)
+
+    return {"nodes": nodes, "roots": roots, "trace_start_ms": trace_start}
+
+def _mark_critical_path(nodes, roots):
+    """가장 늦게 끝나는 루트부터 거꾸로 따라가며 크리티컬 패스를 표시합니다"""
+    if not roots:
+        return
+
+    stack = [max(roots, key=lambda i: nodes[i]["end_ms"])]
+    while stack:
+        idx = stack.pop()
+        node = nodes[idx]
+        node["critical"] = True
+
+        # 부모가 끝나는 시점부터 거꾸로, 그 시점 이전에 끝나는 자식 중 가장 늦게 끝나는 자식을 선택
+        children = sorted(node["children"], key=lambda i: nodes[i]["end_ms"], reverse=True)
+        cursor = node["end_ms"]
+        for child_idx in children:
+            child = nodes[child_idx]
+            if child["end_ms"] <= cursor and child["start_ms"] >= node["start_ms"]:
+                stack.append(child_idx)
+                cursor = child["start_ms"]
+
+def flatten_span_tree(tree, max_depth=None, critical_only=False):
+    """트리를 깊이 우선 순서의 행 목록으로 펼칩니다 (워터폴 표시용)"""
+    nodes = tree["nodes"]
+    trace_start = tree["trace_start_ms"]
+    rows = []
+
+    # 재귀 대신 명시적 스택을 사용해 깊은 트리에서도 안전하게 순회
+    stack = [(idx, 0) for idx in reversed(tree["roots"])]
+    while stack:
+        idx, depth = stack.pop()
+        node = nodes[idx]
+        if critical_only and not node["critical"]:
+            continue
+
+        rows.append({
+            "order": len(rows),
+            "id": node["id"],
+            "name": node["name"],
+            "type": node["type"],
+            "node": node["node"],
+            "depth": depth,
+            "start_offset_ms": node["start_ms"] - trace_start,
+            "end_offset_ms": node["end_ms"] - trace_start,
+            "duration_ms": node["duration_ms"],
+            "self_ms": node["self_ms"],
+            "child_ms": node["child_ms"],
+            "critical": node["critical"],
+        })
+
+        if max_depth is None or depth < max_depth:
+            stack.extend((child_idx, depth + 1) for child_idx in reversed(node["children"]))
+
+    return rows
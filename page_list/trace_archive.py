@@ -0,0 +1,235 @@
+"""
+트레이스 아카이브 모듈 - 조회한 트레이스의 질문/답변/시스템 프롬프트를 SQLite FTS5로 색인해 전문 검색하는 기능
+"""
+
+import os
+import re
+import json
+import sqlite3
+import logging
+import threading
+
+from .helpers import DATA_DIR
+from .extraction import find_user_question, find_final_answer, find_system_prompts, question_text, answer_text
+
+logger = logging.getLogger(__name__)
+
+TRACE_ARCHIVE_FILE = os.path.join(DATA_DIR, "trace_archive.db")
+
+# 검색 가능한 열 (FTS 열 이름, 표시 이름)
+SEARCH_COLUMNS = {
+    "name": "트레이스 이름",
+    "question": "질문",
+    "answer": "답변",
+    "system_prompts": "시스템 프롬프트",
+}
+
+# 아주 긴 시스템 프롬프트/답변은 앞부분만 색인
+MAX_COLUMN_LENGTH = 50000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS traces (
+    rowid INTEGER PRIMARY KEY,
+    trace_id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL DEFAULT '',
+    timestamp TEXT NOT NULL DEFAULT '',
+    indexed INTEGER NOT NULL DEFAULT 0,
+    project TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS traces_timestamp ON traces (timestamp);
+-- 한국어 조사가 붙은 단어도 찾도록 검색어는 접두어 질의로 변환하고, 짧은 접두어용 색인을 함께 유지
+CREATE VIRTUAL TABLE IF NOT EXISTS trace_text USING fts5 (
+    name, question, answer, system_prompts,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '1 2 3'
+);
+"""
+
+_TERM_RE = re.compile(r"[^\s\"]+")
+
+def build_match_query(text, column=None):
+    """사용자 검색어를 FTS5 MATCH 식으로 바꿉니다 (단어마다 접두어 검색, 모두 포함)"""
+    terms = _TERM_RE.findall(str(text or ""))
+    if not terms:
+        return None
+    query = " ".join(f'"{term}"*' for term in terms)
+    if column:
+        query = f"{{{column}}} : ({query})"
+    return query
+
+def _clip(text):
+    return text[:MAX_COLUMN_LENGTH] if text else ""
+
+def archive_columns(observations):
+    """관찰 데이터에서 색인할 (질문, 답변, 시스템 프롬프트) 텍스트를 꺼냅니다"""
+    question = question_text(find_user_question(observations))
+    answer = answer_text(find_final_answer(observations))
+    prompts = []
+    for prompt in find_system_prompts(observations):
+        content = prompt.get("content")
+        prompts.append(content if isinstance(content, str) else json.dumps(content, ensure_ascii=False))
+    return _clip(question), _clip(answer), _clip("\n\n".join(prompts))
+
+class TraceArchive:
+    """트레이스 메타데이터(traces)와 전문 색인(trace_text)을 같은 rowid로 연결한 아카이브
+
+    트레이스 목록에서 받은 이름/시각은 먼저 기록하고, 관찰 데이터를 가져오면 본문을 색인합니다.
+    """
+
+    def __init__(self, path=TRACE_ARCHIVE_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._available = None
+
+    def _connect(self):
+        if self._conn is not None or self._available is False:
+            return self._conn
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            # 프로젝트 열이 없던 예전 아카이브에 열 추가
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(traces)")}
+            if "project" not in columns:
+                conn.execute("ALTER TABLE traces ADD COLUMN project TEXT NOT NULL DEFAULT ''")
+        except sqlite3.Error:
+            # FTS5 없이 빌드된 SQLite 등에서는 아카이브 없이 동작
+            logger.exception("트레이스 아카이브를 열 수 없어 비활성화합니다: %s", self.path)
+            self._available = False
+            return None
+        self._conn = conn
+        self._available = True
+        return conn
+
+    @property
+    def available(self):
+        with self._lock:
+            return self._connect() is not None
+
+    def _upsert_meta(self, conn, trace_id, name, timestamp, project=None):
+        conn.execute(
+            """
+            INSERT INTO traces (trace_id, name, timestamp, project) VALUES (?, ?, ?, ?)
+            ON CONFLICT (trace_id) DO UPDATE SET
+                name = CASE WHEN excluded.name != '' THEN excluded.name ELSE traces.name END,
+                timestamp = CASE WHEN excluded.timestamp != '' THEN excluded.timestamp ELSE traces.timestamp END,
+                project = CASE WHEN excluded.project != '' THEN excluded.project ELSE traces.project END
+            """,
+            (trace_id, name or "", timestamp or "", project or ""),
+        )
+        return conn.execute("SELECT rowid, name, indexed FROM traces WHERE trace_id = ?", (trace_id,)).fetchone()
+
+    def record_traces(self, traces):
+        """트레이스 목록의 이름/시각/프로젝트를 기록합니다 (이미 색인한 트레이스는 이름 열만 갱신)"""
+        with self._lock:
+            conn = self._connect()
+            if conn is None or not traces:
+                return
+            with conn:
+                for trace in traces:
+                    if not trace.get("id"):
+                        continue
+                    rowid, name, indexed = self._upsert_meta(
+                        conn, trace["id"], trace.get("name"), trace.get("timestamp"), trace.get("project")
+                    )
+                    if indexed:
+                        conn.execute("UPDATE trace_text SET name = ? WHERE rowid = ?", (name, rowid))
+
+    def has_trace(self, trace_id):
+        """본문까지 색인한 트레이스인지 확인합니다"""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return False
+            row = conn.execute("SELECT indexed FROM traces WHERE trace_id = ?", (trace_id,)).fetchone()
+            return bool(row and row[0])
+
+    def index_trace(self, trace_id, observations):
+        """관찰 데이터의 질문/답변/시스템 프롬프트를 색인합니다 (같은 트레이스는 교체)"""
+        if not trace_id or not observations:
+            return False
+        question, answer, system_prompts = archive_columns(observations)
+        start_times = [obs.get("startTime") for obs in observations if obs.get("startTime")]
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return False
+            with conn:
+                rowid, name, _ = self._upsert_meta(conn, trace_id, None, min(start_times) if start_times else None)
+                conn.execute("DELETE FROM trace_text WHERE rowid = ?", (rowid,))
+                conn.execute(
+                    "INSERT INTO trace_text (rowid, name, question, answer, system_prompts) VALUES (?, ?, ?, ?, ?)",
+                    (rowid, name, question, answer, system_prompts),
+                )
+                conn.execute("UPDATE traces SET indexed = 1 WHERE rowid = ?", (rowid,))
+        return True
+
+    def search(self, text, column=None, limit=50, since=None, projects=None):
+        """검색어와 일치하는 트레이스를 관련도 순으로 [{trace_id, name, timestamp, project, snippet}]로 반환합니다
+
+        column을 주면 해당 열에서만 찾고, since(ISO 시각 문자열)를 주면 그 이후 트레이스만,
+        projects(프로젝트 이름 목록)를 주면 해당 프로젝트의 트레이스만 찾습니다 (프로젝트를 모르는 트레이스 포함).
+        """
+        query = build_match_query(text, column)
+        with self._lock:
+            conn = self._connect()
+            if conn is None or query is None:
+                return []
+            sql = """
+                SELECT t.trace_id, t.name, t.timestamp, t.project,
+                       snippet(trace_text, -1, '**', '**', '…', 16)
+                FROM trace_text JOIN traces t ON t.rowid = trace_text.rowid
+                WHERE trace_text MATCH ?
+            """
+            params = [query]
+            if since:
+                sql += " AND t.timestamp >= ?"
+                params.append(since)
+            if projects:
+                projects = list(projects)
+                sql += f" AND t.project IN ('', {', '.join('?' for _ in projects)})"
+                params.extend(projects)
+            sql += " ORDER BY rank LIMIT ?"
+            params.append(int(limit))
+            try:
+                rows = conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError:
+                logger.warning("아카이브 검색식 오류: %s", query)
+                return []
+        return [
+            {"trace_id": trace_id, "name": name, "timestamp": timestamp, "project": project, "snippet": snippet}
+            for trace_id, name, timestamp, project, snippet in rows
+        ]
+
+    def stats(self):
+        """(기록된 트레이스 수, 본문을 색인한 트레이스 수, 가장 오래된 시각, 가장 최근 시각)"""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return 0, 0, None, None
+            return conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(indexed), 0), MIN(NULLIF(timestamp, '')), MAX(NULLIF(timestamp, '')) FROM traces"
+            ).fetchone()
+
+# 프로세스 전역 아카이브
+TRACE_ARCHIVE = TraceArchive()
+
+def archive_observations(trace_id, observations):
+    """관찰 데이터를 아카이브에 색인합니다 (이미 색인한 트레이스는 건너뜀)"""
+    if TRACE_ARCHIVE.has_trace(trace_id):
+        return
+    try:
+        TRACE_ARCHIVE.index_trace(trace_id, observations)
+    except Exception:
+        # 색인 실패가 관찰 데이터 조회를 막지 않도록 로그만 남김
+        logger.exception("트레이스 아카이브 색인 실패: %s", trace_id)
+
+def archive_trace_list(traces):
+    """트레이스 목록의 이름/시각을 아카이브에 기록합니다"""
+    try:
+        TRACE_ARCHIVE.record_traces(traces)
+    except Exception:
+        logger.exception("트레이스 목록 아카이브 기록 실패")
@@ -0,0 +1,94 @@
+"""
+트레이스 색인 워커 모듈 - 가져온 관찰 데이터를 요청 경로 밖에서 프롬프트 카탈로그와 트레이스 아카이브에 색인하는 기능
+"""
+
+import time
+import queue
+import atexit
+import logging
+import threading
+
+from .lazy_json import detach_observations
+from .prompt_catalog import PROMPT_CATALOG, index_observations
+from .trace_archive import TRACE_ARCHIVE, archive_observations
+
+logger = logging.getLogger(__name__)
+
+# 종료 시 남은 색인을 기다리는 최대 시간(초)
+FLUSH_TIMEOUT = 30.0
+
+class TraceIndexer(threading.Thread):
+    """색인할 트레이스를 큐로 받아 하나씩 처리하는 데몬 스레드
+
+    관찰 데이터는 공유/세션 캐시에 든 객체를 그대로 받지만, 색인은 원본 문자열에서 파싱한 사본으로 하므로
+    캐시에 든 입력/출력은 화면에서 읽을 때까지 지연 디코딩 상태로 남습니다.
+    """
+
+    def __init__(self):
+        super().__init__(name="trace-indexer", daemon=True)
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, trace_id, observations):
+        """색인하지 않은 트레이스면 큐에 넣습니다 (이미 대기 중인 트레이스는 건너뜀)"""
+        if not trace_id or not observations:
+            return False
+        if PROMPT_CATALOG.has_trace(trace_id) and TRACE_ARCHIVE.has_trace(trace_id):
+            return False
+        with self._lock:
+            if trace_id in self._pending:
+                return False
+            self._pending.add(trace_id)
+        self._queue.put((trace_id, observations))
+        return True
+
+    def run(self):
+        while True:
+            trace_id, observations = self._queue.get()
+            try:
+                copies = detach_observations(observations)
+                index_observations(trace_id, copies)
+                archive_observations(trace_id, copies)
+            except Exception:
+                logger.exception("트레이스 색인 실패: %s", trace_id)
+            finally:
+                with self._lock:
+                    self._pending.discard(trace_id)
+                self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """대기 중인 색인이 끝날 때까지 기다립니다 (시간 안에 끝나면 True)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+_indexer = None
+_indexer_lock = threading.Lock()
+
+def trace_indexer():
+    """프로세스 전역 색인 워커 (처음 사용할 때 시작)"""
+    global _indexer
+    with _indexer_lock:
+        if _indexer is None or not _indexer.is_alive():
+            _indexer = TraceIndexer()
+            _indexer.start()
+        return _indexer
+
+def index_trace_async(trace_id, observations):
+    """관찰 데이터를 백그라운드에서 카탈로그와 아카이브에 색인하도록 예약합니다"""
+    return trace_indexer().submit(trace_id, observations)
+
+def flush_trace_index(timeout=FLUSH_TIMEOUT):
+    """예약된 색인을 마칠 때까지 기다립니다 (워커가 없으면 바로 반환)"""
+    with _indexer_lock:
+        indexer = _indexer
+    return indexer.flush(timeout) if indexer is not None else True
+
+# 종료 시 남은 색인을 마침
+atexit.register(flush_trace_index)